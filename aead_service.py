@@ -0,0 +1,424 @@
+"""
+asyncio front end for AES-128-GCM.
+
+    async with AEADService(executor='process') as service:
+        ciphertext, mac = await service.encrypt(key, iv, plaintext, aad)
+        plaintext, is_valid = await service.decrypt(key, iv, ciphertext, aad, mac)
+
+Concurrent requests are collected into micro-batches (up to max_batch
+requests, waiting at most max_delay seconds for more) and each batch runs
+through gcm_batch.encrypt_many / decrypt_many on a thread or process pool,
+so the event loop never runs AES itself. At most max_in_flight requests are
+accepted at a time, further callers wait; at most one batch per worker runs,
+so under load the queue grows and batches get larger. stats() reports
+latency percentiles, queue depth and batch sizes.
+
+The service can also be exposed on a local TCP or Unix socket (serve /
+serve_unix, client AEADClient) with a length-prefixed binary protocol:
+
+    request:  op (1 byte, 1 = encrypt, 2 = decrypt) | body length (4 bytes)
+              | key (16) | IV (12) | AAD length (4) | tag (16, zero for encrypt) | AAD | text
+    response: status (1 byte, 0 = ok, 1 = invalid tag, 2 = bad request, 3 = server error)
+              | body length (4 bytes)
+              | ciphertext || tag (encrypt) or plaintext (decrypt)
+
+    python aead_service.py serve --port 8443 --executor process
+    python aead_service.py load --concurrency 1,4,16,64         # in-process service
+    python aead_service.py load --connect 127.0.0.1:8443        # over the socket
+"""
+import argparse
+import asyncio
+import os
+import struct
+import sys
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+from gcm_batch import encrypt_many, decrypt_many
+
+ENCRYPT = 1
+DECRYPT = 2
+OK = 0
+INVALID_TAG = 1
+BAD_REQUEST = 2
+SERVER_ERROR = 3
+
+# op, body length
+HEADER = struct.Struct('>BI')
+# key, IV, AAD length, tag
+REQUEST = struct.Struct('>16s12sI16s')
+
+# Completed requests kept for the latency percentiles
+LATENCY_WINDOW = 10000
+
+def _run_batch(encrypts: List[tuple], decrypts: List[tuple]) -> Tuple[list, list]:
+    """worker: one batch of each kind, a single pool round trip"""
+    return (encrypt_many(encrypts) if encrypts else [],
+            decrypt_many(decrypts) if decrypts else [])
+
+def _run_each(encrypts: List[tuple], decrypts: List[tuple]) -> list:
+    """worker: record by record, so an error only reaches the record that caused it"""
+    results = []
+    for records, run in ((encrypts, encrypt_many), (decrypts, decrypt_many)):
+        for record in records:
+            try:
+                results.append(run([record])[0])
+            except Exception as e:
+                results.append(e)
+    return results
+
+def _check_lengths(key: bytes, iv: bytes):
+    if len(key) != 16:
+        raise ValueError('AES-128 key must be 16 bytes')
+    if len(iv) != 12:
+        raise ValueError('IV must be 12 bytes')
+
+def _fail(items, reason: str = 'AEAD service closed'):
+    """fail the futures of queued (op, record, future) items that are still pending"""
+    for _, _, future in items:
+        if not future.done():
+            future.set_exception(RuntimeError(reason))
+
+def _percentile(ordered: List[float], p: float) -> float:
+    return ordered[min(int(p * len(ordered)), len(ordered) - 1)] if ordered else 0.0
+
+class AEADService:
+    """
+    Micro-batching AES-128-GCM service for one event loop.
+
+    executor is 'thread', 'process' or an Executor to use (not shut down by
+    close()); workers is its size (default: all CPUs). Pure-Python AES holds
+    the GIL, so 'thread' keeps the loop responsive but only 'process' adds
+    throughput across cores.
+    """
+
+    def __init__(self, workers: int = None, executor='thread', max_batch: int = 64,
+                 max_delay: float = 0.001, max_in_flight: int = 1024):
+        assert max_batch >= 1 and max_in_flight >= 1, 'Batch size and in-flight cap must be positive'
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_in_flight = max_in_flight
+        self._pool: Optional[Executor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._dispatches = set()
+        # Stats
+        self.requests = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.in_flight = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+
+    async def start(self):
+        if self._batcher is not None:
+            return
+        if isinstance(self.executor, Executor):
+            self._pool = self.executor
+        elif self.executor == 'process':
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        elif self.executor == 'thread':
+            self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        else:
+            raise ValueError(f'Unknown executor {self.executor!r}')
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._running = asyncio.Semaphore(self.workers)
+        self._batcher = asyncio.create_task(self._collect())
+
+    async def close(self):
+        """stop batching, finish the batches already dispatched and release the pool"""
+        if self._batcher is None:
+            return
+        self._batcher.cancel()
+        try:
+            await self._batcher
+        except asyncio.CancelledError:
+            pass
+        self._batcher = None
+        if self._dispatches:
+            await asyncio.gather(*self._dispatches, return_exceptions=True)
+        while not self._queue.empty():
+            _fail([self._queue.get_nowait()])
+        if not isinstance(self.executor, Executor):
+            self._pool.shutdown()
+        self._pool = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def encrypt(self, key, iv, plaintext, aad=b'') -> Tuple[bytes, bytes]:
+        """(ciphertext, MAC), as gcm.gcm_encrypt; ValueError for a bad key or IV length"""
+        key, iv = bytes(key), bytes(iv)
+        _check_lengths(key, iv)
+        return await self._submit(ENCRYPT, (key, iv, bytes(plaintext), bytes(aad)))
+
+    async def decrypt(self, key, iv, ciphertext, aad=b'', mac=b'') -> Tuple[Optional[bytes], bool]:
+        """(plaintext or None, is_valid), as gcm.gcm_decrypt; ValueError for a bad key or IV length"""
+        key, iv = bytes(key), bytes(iv)
+        _check_lengths(key, iv)
+        return await self._submit(DECRYPT, (key, iv, bytes(ciphertext), bytes(aad), bytes(mac)))
+
+    async def _submit(self, op: int, record: tuple):
+        if self._batcher is None:
+            raise RuntimeError('AEAD service is not started')
+        start = time.perf_counter()
+        async with self._slots:
+            self.in_flight += 1
+            future = asyncio.get_running_loop().create_future()
+            self._queue.put_nowait((op, record, future))
+            try:
+                return await future
+            finally:
+                self.in_flight -= 1
+                self.requests += 1
+                self._latencies.append(time.perf_counter() - start)
+
+    async def _collect(self):
+        """batcher task: wait for a free worker, then gather one batch and dispatch it"""
+        queue = self._queue
+        while True:
+            await self._running.acquire()
+            batch = []
+            try:
+                batch.append(await queue.get())
+                # Give concurrent callers a moment to join, unless the batch is already full
+                if self.max_delay > 0 and queue.qsize() < self.max_batch - 1:
+                    await asyncio.sleep(self.max_delay)
+            except asyncio.CancelledError:
+                # Closed while collecting: the requests taken off the queue are ours to fail
+                _fail(batch)
+                self._running.release()
+                raise
+            while len(batch) < self.max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+            task = asyncio.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: list):
+        try:
+            encrypts = [item for item in batch if item[0] == ENCRYPT]
+            decrypts = [item for item in batch if item[0] == DECRYPT]
+            self.batches += 1
+            self.batched_requests += len(batch)
+            loop = asyncio.get_running_loop()
+            enc_records, dec_records = [r for _, r, _ in encrypts], [r for _, r, _ in decrypts]
+            try:
+                enc_results, dec_results = await loop.run_in_executor(self._pool, _run_batch, enc_records, dec_records)
+                results = enc_results + dec_results
+            except Exception as e:
+                if len(batch) == 1:
+                    results = [e]
+                else:
+                    # One bad record must not fail the others: retry them one by one
+                    try:
+                        results = await loop.run_in_executor(self._pool, _run_each, enc_records, dec_records)
+                    except Exception as e:
+                        results = [e] * len(batch)
+            for (_, _, future), result in zip(encrypts + decrypts, results):
+                # The caller may have been cancelled meanwhile
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        finally:
+            self._running.release()
+
+    def stats(self) -> dict:
+        """request and batch counts, queue depth and latency percentiles (ms) of recent requests"""
+        ordered = sorted(self._latencies)
+        return {
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "mean_batch": self.batched_requests / self.batches if self.batches else 0.0,
+            "latency_ms": {name: _percentile(ordered, p) * 1e3
+                           for name, p in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0))},
+        }
+
+# --- Socket server and client ---
+
+async def _respond(service: AEADService, op: int, body: bytes) -> Tuple[int, bytes]:
+    if len(body) < REQUEST.size or op not in (ENCRYPT, DECRYPT):
+        return BAD_REQUEST, b''
+    key, iv, aad_len, tag = REQUEST.unpack_from(body)
+    aad = body[REQUEST.size:REQUEST.size + aad_len]
+    text = body[REQUEST.size + aad_len:]
+    if len(aad) != aad_len:
+        return BAD_REQUEST, b''
+    if op == ENCRYPT:
+        ciphertext, mac = await service.encrypt(key, iv, text, aad)
+        return OK, ciphertext + mac
+    plaintext, is_valid = await service.decrypt(key, iv, text, aad, tag)
+    return (OK, plaintext) if is_valid else (INVALID_TAG, b'')
+
+async def _handle(service: AEADService, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """one connection: requests are answered in order"""
+    try:
+        while True:
+            try:
+                op, length = HEADER.unpack(await reader.readexactly(HEADER.size))
+                body = await reader.readexactly(length)
+            except asyncio.IncompleteReadError:
+                break
+            try:
+                status, payload = await _respond(service, op, body)
+            except ValueError:
+                status, payload = BAD_REQUEST, b''
+            except Exception:
+                # e.g. the service was closed: answer instead of dropping the connection
+                status, payload = SERVER_ERROR, b''
+            writer.write(HEADER.pack(status, len(payload)) + payload)
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+async def serve(service: AEADService, host: str = '127.0.0.1', port: int = 0) -> asyncio.AbstractServer:
+    """TCP server for the service (port 0 picks a free port, see server.sockets)"""
+    return await asyncio.start_server(lambda r, w: _handle(service, r, w), host, port)
+
+async def serve_unix(service: AEADService, path: str) -> asyncio.AbstractServer:
+    return await asyncio.start_unix_server(lambda r, w: _handle(service, r, w), path)
+
+class AEADClient:
+    """one connection to a serve / serve_unix server, requests are sent one at a time"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    async def connect(cls, host: str = '127.0.0.1', port: int = None, path: str = None) -> 'AEADClient':
+        if path is not None:
+            return cls(*await asyncio.open_unix_connection(path))
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def _call(self, op: int, key, iv, text, aad, tag) -> Tuple[int, bytes]:
+        body = REQUEST.pack(bytes(key), bytes(iv), len(aad), bytes(tag)) + bytes(aad) + bytes(text)
+        async with self._lock:
+            self.writer.write(HEADER.pack(op, len(body)) + body)
+            await self.writer.drain()
+            status, length = HEADER.unpack(await self.reader.readexactly(HEADER.size))
+            return status, await self.reader.readexactly(length)
+
+    @staticmethod
+    def _check(status: int):
+        if status == BAD_REQUEST:
+            raise ValueError('Bad request')
+        if status == SERVER_ERROR:
+            raise RuntimeError('Server error')
+
+    async def encrypt(self, key, iv, plaintext, aad=b'') -> Tuple[bytes, bytes]:
+        status, payload = await self._call(ENCRYPT, key, iv, plaintext, aad, bytes(16))
+        self._check(status)
+        return payload[:-16], payload[-16:]
+
+    async def decrypt(self, key, iv, ciphertext, aad=b'', mac=b'') -> Tuple[Optional[bytes], bool]:
+        status, payload = await self._call(DECRYPT, key, iv, ciphertext, aad, mac)
+        self._check(status)
+        return (payload, True) if status == OK else (None, False)
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+# --- Load generator ---
+
+async def load(encrypt, concurrency: int, requests: int, size: int) -> dict:
+    """
+    requests encryptions of size bytes from concurrency concurrent callers of
+    encrypt (a coroutine function, or one per caller as a sequence);
+    returns throughput and latency percentiles
+    """
+    key = os.urandom(16)
+    plaintext = os.urandom(size)
+    latencies = []
+    callers = encrypt if isinstance(encrypt, Sequence) else [encrypt] * concurrency
+
+    async def caller(encrypt, n, c):
+        for i in range(n):
+            iv = struct.pack('>4xII', c, i)
+            start = time.perf_counter()
+            await encrypt(key, iv, plaintext)
+            latencies.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    await asyncio.gather(*[caller(callers[c], requests // concurrency + (c < requests % concurrency), c)
+                           for c in range(concurrency)])
+    seconds = time.perf_counter() - start
+    latencies.sort()
+    return {"concurrency": concurrency, "requests_per_sec": requests / seconds,
+            "mb_per_sec": requests * size / seconds / 1e6,
+            "p50_ms": _percentile(latencies, 0.5) * 1e3, "p99_ms": _percentile(latencies, 0.99) * 1e3}
+
+def _service(args) -> AEADService:
+    return AEADService(args.workers, args.executor, args.max_batch, args.max_delay, args.max_in_flight)
+
+async def _serve_main(args):
+    async with _service(args) as service:
+        server = await (serve_unix(service, args.unix) if args.unix else serve(service, args.host, args.port))
+        where = args.unix or '%s:%d' % server.sockets[0].getsockname()[:2]
+        print(f"serving AES-128-GCM on {where}", file=sys.stderr)
+        async with server:
+            while True:
+                await asyncio.sleep(args.stats_interval)
+                print(service.stats(), file=sys.stderr)
+
+async def _load_main(args):
+    print(f"{'concurrency':>11} {'req/s':>10} {'MB/s':>8} {'p50 ms':>9} {'p99 ms':>9}")
+    for concurrency in args.concurrency:
+        if args.connect or args.unix:
+            host, _, port = (args.connect or '').rpartition(':')
+            clients = [await AEADClient.connect(host, int(port) if port else None, args.unix)
+                       for _ in range(concurrency)]
+            result = await load([c.encrypt for c in clients], concurrency, args.requests, args.size)
+            for c in clients:
+                await c.close()
+        else:
+            async with _service(args) as service:
+                result = await load(service.encrypt, concurrency, args.requests, args.size)
+        print(f"{concurrency:>11} {result['requests_per_sec']:>10.1f} {result['mb_per_sec']:>8.3f} "
+              f"{result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f}", flush=True)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='asyncio AES-128-GCM service and load generator')
+    sub = parser.add_subparsers(dest='command', required=True)
+    for name in ('serve', 'load'):
+        p = sub.add_parser(name)
+        p.add_argument('--executor', choices=('thread', 'process'), default='process')
+        p.add_argument('--workers', type=int, help='pool size (default: all CPUs)')
+        p.add_argument('--max-batch', type=int, default=64, help='requests per batch')
+        p.add_argument('--max-delay', type=float, default=0.001, help='seconds to wait for a batch to fill')
+        p.add_argument('--max-in-flight', type=int, default=1024, help='requests accepted at once')
+        p.add_argument('--unix', help='Unix socket path')
+    serve_parser, load_parser = sub.choices['serve'], sub.choices['load']
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=0)
+    serve_parser.add_argument('--stats-interval', type=float, default=10.0, help='seconds between stats lines')
+    load_parser.add_argument('--connect', help='HOST:PORT of a running server (default: in-process service)')
+    load_parser.add_argument('--concurrency', type=lambda s: [int(x) for x in s.split(',')],
+                             default=[1, 4, 16, 64], help='comma separated caller counts')
+    load_parser.add_argument('--requests', type=int, default=2000, help='requests per concurrency level')
+    load_parser.add_argument('--size', type=int, default=256, help='plaintext bytes per request')
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(_serve_main(args) if args.command == 'serve' else _load_main(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,11 +1,31 @@
 # Author: Fang Zihao
 from typing import List
+import instrumentation
 from key_expansion import key_expansion
 from confusion import byte_substitution
 from diffusion import diffusion, shift_rows
 from aes_auxiliary import list_xor
+from t_table import round_key_words, encrypt_block
+from aes_bitslice import round_key_bits, encrypt_blocks
 
 def aes128(plaintext: List[int], key: List[int]) -> List[int]:
+    assert len(plaintext) == 16, 'Dimension of plaintext is not 16'
+    assert len(key) == 16, 'Dimension of key is not 16'
+    if instrumentation.ENABLED:
+        instrumentation.count_aes()
+    # T-table engine: S-box, ShiftRows and MixColumns folded into word lookups
+    return encrypt_block(plaintext, round_key_words(key))
+
+def aes128_bitsliced(plaintexts: List[List[int]], key: List[int]) -> List[List[int]]:
+    assert all(len(p) == 16 for p in plaintexts), 'Dimension of plaintext is not 16'
+    assert len(key) == 16, 'Dimension of key is not 16'
+    if instrumentation.ENABLED:
+        instrumentation.count_aes(len(plaintexts))
+    # Bitsliced engine: the whole batch goes through each boolean operation at once
+    ciphertext = encrypt_blocks(bytes(b for p in plaintexts for b in p), round_key_bits(key))
+    return [list(ciphertext[i:i+16]) for i in range(0, len(ciphertext), 16)]
+
+def aes128_reference(plaintext: List[int], key: List[int]) -> List[int]:
     assert len(plaintext) == 16, 'Dimension of plaintext is not 16'
     assert len(key) == 16, 'Dimension of key is not 16'
     keys = key_expansion(key)
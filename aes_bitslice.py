@@ -0,0 +1,176 @@
+"""
+Bitsliced AES-128 over Python big integers.
+
+A batch of N blocks is held as 128 integers of N bits each: integer q holds
+state bit q of every block (q = 8 * byte + 7 - bit, i.e. the bit order of the
+block written out in binary), lane i of every integer belongs to block i.
+Every AND / XOR then works on all N blocks at once.
+
+SubBytes is a boolean circuit (inversion as x^254 in GF(2^8) with bitsliced
+multiplications and XOR-only squarings, then the affine map), ShiftRows is a
+reindexing of the 128 integers and MixColumns is XOR-only xtime logic. No
+table is indexed with secret data.
+"""
+import struct
+from typing import List, Tuple
+from key_expansion import key_expansion
+
+_BLOCK = struct.Struct('>4I')
+
+# --- Packing ---
+
+def pack(blocks: bytes) -> Tuple[List[int], int]:
+    """transpose N 16-byte blocks into 128 N-bit integers, returns (state, N)"""
+    n = len(blocks) // 16
+    bits = format(int.from_bytes(blocks, 'big'), f'0{128 * n}b')
+    return [int(bits[q::128], 2) for q in range(128)], n
+
+
+def unpack(state: List[int], n: int) -> bytes:
+    """inverse of pack"""
+    bits = bytearray(128 * n)
+    for q in range(128):
+        bits[q::128] = format(state[q], f'0{n}b').encode('ascii')
+    return int(bits, 2).to_bytes(16 * n, 'big')
+
+
+# --- GF(2^8) circuits on one bitsliced byte (list of 8 ints, index = bit) ---
+
+def _reduce(p: List[int]) -> List[int]:
+    """reduce a degree <= 14 polynomial modulo x^8 + x^4 + x^3 + x + 1"""
+    for k in range(len(p) - 1, 7, -1):
+        t = p[k]
+        p[k - 4] ^= t
+        p[k - 5] ^= t
+        p[k - 7] ^= t
+        p[k - 8] ^= t
+    return p[:8]
+
+
+def _mul(a: List[int], b: List[int]) -> List[int]:
+    p = [0] * 15
+    for i in range(8):
+        ai = a[i]
+        for j in range(8):
+            p[i + j] ^= ai & b[j]
+    return _reduce(p)
+
+
+def _square(a: List[int]) -> List[int]:
+    # Squaring is linear in characteristic 2: sum a_i x^(2i)
+    p = [0] * 15
+    for i in range(8):
+        p[2 * i] = a[i]
+    return _reduce(p)
+
+
+def _sbox(x: List[int], ones: int) -> List[int]:
+    """S-box circuit: x^254 (the inverse, 0 -> 0) followed by the affine map"""
+    x2 = _square(x)
+    x3 = _mul(x2, x)
+    x6 = _square(x3)
+    x12 = _square(x6)
+    x15 = _mul(x12, x3)
+    x30 = _square(x15)
+    x60 = _square(x30)
+    x120 = _square(x60)
+    x126 = _mul(x120, x6)
+    x127 = _mul(x126, x)
+    y = _square(x127)
+    # b_i ^ b_(i+4) ^ b_(i+5) ^ b_(i+6) ^ b_(i+7) ^ c_i with c = 0x63
+    out = []
+    for i in range(8):
+        v = y[i] ^ y[(i + 4) % 8] ^ y[(i + 5) % 8] ^ y[(i + 6) % 8] ^ y[(i + 7) % 8]
+        if (0x63 >> i) & 1:
+            v ^= ones
+        out.append(v)
+    return out
+
+
+def _byte(state: List[int], k: int) -> List[int]:
+    """bits 0..7 of byte k"""
+    return [state[8 * k + 7 - j] for j in range(8)]
+
+
+def _set_byte(state: List[int], k: int, bits: List[int]):
+    for j in range(8):
+        state[8 * k + 7 - j] = bits[j]
+
+
+# --- Round functions ---
+
+def sub_bytes(state: List[int], ones: int) -> List[int]:
+    out = [0] * 128
+    for k in range(16):
+        _set_byte(out, k, _sbox(_byte(state, k), ones))
+    return out
+
+
+def shift_rows(state: List[int]) -> List[int]:
+    # new[r + 4c] = old[r + 4((c + r) % 4)], moving whole bytes is free reindexing
+    out = [0] * 128
+    for r in range(4):
+        for c in range(4):
+            src = 8 * (r + 4 * ((c + r) % 4))
+            dst = 8 * (r + 4 * c)
+            out[dst:dst + 8] = state[src:src + 8]
+    return out
+
+
+def _xtime(a: List[int]) -> List[int]:
+    a7 = a[7]
+    return [a7, a[0] ^ a7, a[1], a[2] ^ a7, a[3] ^ a7, a[4], a[5], a[6]]
+
+
+def mix_columns(state: List[int]) -> List[int]:
+    out = [0] * 128
+    for c in range(4):
+        a0, a1, a2, a3 = (_byte(state, r + 4 * c) for r in range(4))
+        t = [a0[i] ^ a1[i] ^ a2[i] ^ a3[i] for i in range(8)]
+        for r, (x, y) in enumerate(((a0, a1), (a1, a2), (a2, a3), (a3, a0))):
+            xt = _xtime([x[i] ^ y[i] for i in range(8)])
+            _set_byte(out, r + 4 * c, [x[i] ^ t[i] ^ xt[i] for i in range(8)])
+    return out
+
+
+def round_key_bits(key: List[int]) -> List[List[int]]:
+    """the 128 bits (0 or 1, state bit q at index q) of each of the 11 round keys"""
+    return [[int(b) for b in format(int.from_bytes(bytes(round_key), 'big'), '0128b')]
+            for round_key in key_expansion(list(bytes(key)))]
+
+
+def _round_key_masks(key_bits: List[List[int]], ones: int) -> List[List[int]]:
+    """every round key bit as a lane mask, 0 or all ones, without branching on the bit"""
+    return [[-bit & ones for bit in bits] for bits in key_bits]
+
+
+def _add_round_key(state: List[int], masks: List[int]) -> List[int]:
+    # All 128 integers are XORed, whatever the key's Hamming weight
+    return [s ^ m for s, m in zip(state, masks)]
+
+
+def encrypt_state(state: List[int], n: int, key_bits: List[List[int]]) -> List[int]:
+    """AES-128 on a packed batch of n blocks"""
+    ones = (1 << n) - 1
+    masks = _round_key_masks(key_bits, ones)
+    state = _add_round_key(state, masks[0])
+    for r in range(1, 10):
+        state = _add_round_key(mix_columns(shift_rows(sub_bytes(state, ones))), masks[r])
+    return _add_round_key(shift_rows(sub_bytes(state, ones)), masks[10])
+
+
+def encrypt_blocks(blocks: bytes, key_bits: List[List[int]]) -> bytes:
+    """encrypt concatenated 16-byte blocks (any count) with round_key_bits(key)"""
+    assert len(blocks) % 16 == 0, 'Length of blocks is not a multiple of 16'
+    if not blocks:
+        return b''
+    state, n = pack(blocks)
+    return unpack(encrypt_state(state, n, key_bits), n)
+
+
+def keystream(key_bits: List[List[int]], iv_words: Tuple[int, int, int], counter: int, blocks: int) -> bytes:
+    """E(IV || counter), E(IV || counter + 1), ... for the given number of blocks"""
+    w0, w1, w2 = iv_words
+    pack_block = _BLOCK.pack
+    counters = b''.join([pack_block(w0, w1, w2, c & 0xFFFFFFFF) for c in range(counter, counter + blocks)])
+    return encrypt_blocks(counters, key_bits)
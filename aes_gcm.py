@@ -0,0 +1,156 @@
+"""
+AES-128-GCM file encryption tool.
+
+    python -m aes_gcm encrypt --key HEX [--aad TEXT] INPUT OUTPUT
+    python -m aes_gcm decrypt --key HEX INPUT OUTPUT
+
+The input is memory-mapped and streamed through the GCM encryptor /
+decryptor in fixed-size chunks, so memory use does not depend on the file
+size. Output files are binary:
+
+    magic "AGCM" | version (1 byte) | IV (12 bytes) | AAD length (4 bytes, big-endian)
+    | tag (16 bytes) | AAD | ciphertext
+
+Decrypted data is written to OUTPUT.part and only renamed to OUTPUT once the
+tag has been verified.
+
+--backend (or AES_GCM_BACKEND) picks the engine, table or numpy; NumPy is
+only imported when the numpy backend is used for a large enough chunk.
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from contextlib import contextmanager
+import backends
+from gcm import AESGCM
+
+MAGIC = b'AGCM'
+VERSION = 1
+# magic, version, IV, AAD length, tag
+HEADER = struct.Struct('>4sB12sI16s')
+TAG_OFFSET = HEADER.size - 16
+
+DEFAULT_CHUNK_BYTES = 1 << 20
+
+@contextmanager
+def _mapped(path: str):
+    """read-only memoryview of a whole file (empty files give an empty view)"""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            yield memoryview(b'')
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            view = memoryview(m)
+            try:
+                yield view
+            finally:
+                view.release()
+
+def _read_key(args) -> bytes:
+    if args.key_file:
+        with open(args.key_file, 'rb') as f:
+            raw = f.read()
+        key = raw if len(raw) == 16 else bytes.fromhex(raw.decode('ascii').strip())
+    else:
+        key = bytes.fromhex(args.key)
+    if len(key) != 16:
+        raise SystemExit('error: AES-128 key must be 16 bytes')
+    return key
+
+def _report(action: str, n: int, seconds: float):
+    rate = n / seconds / 1e6 if seconds > 0 else float('inf')
+    print(f"{action} {n} bytes in {seconds:.3f} s ({rate:.2f} MB/s)", file=sys.stderr)
+
+def encrypt_file(key: bytes, src: str, dst: str, aad: bytes = b'', iv: bytes = None,
+                 chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> int:
+    """encrypt src into dst, returns the number of plaintext bytes"""
+    iv = iv if iv is not None else os.urandom(12)
+    enc = AESGCM(key).encryptor(iv)
+    enc.update_aad(aad)
+    with _mapped(src) as data, open(dst, 'wb') as out:
+        # The tag is not known yet, it is patched into the header at the end
+        out.write(HEADER.pack(MAGIC, VERSION, iv, len(aad), bytes(16)))
+        out.write(aad)
+        for start in range(0, len(data), chunk_bytes):
+            out.write(enc.update(data[start:start + chunk_bytes]))
+        out.seek(TAG_OFFSET)
+        out.write(enc.finalize())
+        return len(data)
+
+def decrypt_file(key: bytes, src: str, dst: str, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> int:
+    """decrypt src into dst, returns the number of plaintext bytes or -1 if the tag is invalid"""
+    part = dst + '.part'
+    with _mapped(src) as data:
+        if len(data) < HEADER.size:
+            raise SystemExit('error: input is too short to be an AES-GCM file')
+        magic, version, iv, aad_len, tag = HEADER.unpack(data[:HEADER.size])
+        if magic != MAGIC or version != VERSION:
+            raise SystemExit('error: input is not an AES-GCM file')
+        dec = AESGCM(key).decryptor(iv)
+        dec.update_aad(data[HEADER.size:HEADER.size + aad_len])
+        body = data[HEADER.size + aad_len:]
+        n = len(body)
+        try:
+            with open(part, 'wb') as out:
+                try:
+                    for start in range(0, n, chunk_bytes):
+                        with body[start:start + chunk_bytes] as chunk:
+                            out.write(dec.update(chunk))
+                except BaseException:
+                    # Unverified plaintext must not stay behind
+                    out.close()
+                    os.remove(part)
+                    raise
+        finally:
+            body.release()
+    if not dec.finalize(tag):
+        os.remove(part)
+        return -1
+    os.replace(part, dst)
+    return n
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m aes_gcm', description='AES-128-GCM file encryption')
+    sub = parser.add_subparsers(dest='command', required=True)
+    for name in ('encrypt', 'decrypt'):
+        p = sub.add_parser(name)
+        group = p.add_mutually_exclusive_group(required=True)
+        group.add_argument('--key', help='key as 32 hex digits')
+        group.add_argument('--key-file', help='file holding the raw 16-byte key or its hex form')
+        p.add_argument('--backend', choices=[name for name, b in backends.BACKENDS.items()
+                                             if 'streaming' in b.capabilities],
+                       help='engine to use (default: ' + backends.ENV_VAR + ' or the fastest installed)')
+        p.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_BYTES,
+                       help='bytes per streaming step (rounded down to a multiple of 16)')
+        p.add_argument('input')
+        p.add_argument('output')
+        if name == 'encrypt':
+            p.add_argument('--aad', default='', help='additional authenticated data (UTF-8 text)')
+            p.add_argument('--iv', help='IV as 24 hex digits (random if omitted)')
+    args = parser.parse_args(argv)
+
+    if args.backend:
+        backends.select(args.backend)
+    key = _read_key(args)
+    chunk_bytes = max(args.chunk_size // 16 * 16, 16)
+    start = time.perf_counter()
+    if args.command == 'encrypt':
+        iv = bytes.fromhex(args.iv) if args.iv else None
+        if iv is not None and len(iv) != 12:
+            raise SystemExit('error: IV must be 12 bytes')
+        n = encrypt_file(key, args.input, args.output, args.aad.encode('utf-8'), iv, chunk_bytes)
+        _report('encrypted', n, time.perf_counter() - start)
+        return 0
+    n = decrypt_file(key, args.input, args.output, chunk_bytes)
+    if n < 0:
+        print("error: MAC tag is invalid, no output written", file=sys.stderr)
+        return 1
+    _report('decrypted', n, time.perf_counter() - start)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Batched AES-128 CTR keystream on NumPy.
+
+All counter blocks of a message are known up front, so the whole batch is
+kept as four uint32 column arrays and every round is a handful of table
+gathers and XORs over the batch. Requires NumPy; gcm.py imports this module
+only when a message is large enough to use it.
+"""
+from typing import List, Tuple
+import numpy as np
+import t_table
+
+TE0 = np.array(t_table.TE0, dtype=np.uint32)
+TE1 = np.array(t_table.TE1, dtype=np.uint32)
+TE2 = np.array(t_table.TE2, dtype=np.uint32)
+TE3 = np.array(t_table.TE3, dtype=np.uint32)
+TE4 = np.array(t_table.TE4, dtype=np.uint32)
+
+
+def encrypt_columns(s0, s1, s2, s3, rk: List[int]):
+    """
+    Encrypt a batch of blocks given as four uint32 arrays of column words.
+    """
+    rk = np.array(rk, dtype=np.uint32)
+    s0 = s0 ^ rk[0]
+    s1 = s1 ^ rk[1]
+    s2 = s2 ^ rk[2]
+    s3 = s3 ^ rk[3]
+    for r in range(4, 40, 4):
+        t0 = TE0[s0 >> 24] ^ TE1[(s1 >> 16) & 0xFF] ^ TE2[(s2 >> 8) & 0xFF] ^ TE3[s3 & 0xFF] ^ rk[r]
+        t1 = TE0[s1 >> 24] ^ TE1[(s2 >> 16) & 0xFF] ^ TE2[(s3 >> 8) & 0xFF] ^ TE3[s0 & 0xFF] ^ rk[r + 1]
+        t2 = TE0[s2 >> 24] ^ TE1[(s3 >> 16) & 0xFF] ^ TE2[(s0 >> 8) & 0xFF] ^ TE3[s1 & 0xFF] ^ rk[r + 2]
+        t3 = TE0[s3 >> 24] ^ TE1[(s0 >> 16) & 0xFF] ^ TE2[(s1 >> 8) & 0xFF] ^ TE3[s2 & 0xFF] ^ rk[r + 3]
+        s0, s1, s2, s3 = t0, t1, t2, t3
+    # Final round: SubBytes + ShiftRows + AddRoundKey
+    m0, m1, m2, m3 = np.uint32(0xFF000000), np.uint32(0x00FF0000), np.uint32(0x0000FF00), np.uint32(0x000000FF)
+    t0 = (TE4[s0 >> 24] & m0) ^ (TE4[(s1 >> 16) & 0xFF] & m1) ^ (TE4[(s2 >> 8) & 0xFF] & m2) ^ (TE4[s3 & 0xFF] & m3) ^ rk[40]
+    t1 = (TE4[s1 >> 24] & m0) ^ (TE4[(s2 >> 16) & 0xFF] & m1) ^ (TE4[(s3 >> 8) & 0xFF] & m2) ^ (TE4[s0 & 0xFF] & m3) ^ rk[41]
+    t2 = (TE4[s2 >> 24] & m0) ^ (TE4[(s3 >> 16) & 0xFF] & m1) ^ (TE4[(s0 >> 8) & 0xFF] & m2) ^ (TE4[s1 & 0xFF] & m3) ^ rk[42]
+    t3 = (TE4[s3 >> 24] & m0) ^ (TE4[(s0 >> 16) & 0xFF] & m1) ^ (TE4[(s1 >> 8) & 0xFF] & m2) ^ (TE4[s2 & 0xFF] & m3) ^ rk[43]
+    return t0, t1, t2, t3
+
+
+def counter_columns(iv_words: Tuple[int, int, int], counter: int, blocks: int):
+    """
+    Column arrays of the counter blocks IV || counter, ..., IV || counter + blocks - 1
+    (the last 32 bits wrap around).
+    """
+    w0, w1, w2 = iv_words
+    s3 = ((np.arange(blocks, dtype=np.uint64) + counter) & 0xFFFFFFFF).astype(np.uint32)
+    return (np.full(blocks, w0, dtype=np.uint32), np.full(blocks, w1, dtype=np.uint32),
+            np.full(blocks, w2, dtype=np.uint32), s3)
+
+
+def columns_to_bytes(t0, t1, t2, t3) -> np.ndarray:
+    """
+    Interleave four column arrays back into a flat uint8 array of blocks.
+    """
+    out = np.empty((len(t0), 4), dtype='>u4')
+    out[:, 0] = t0
+    out[:, 1] = t1
+    out[:, 2] = t2
+    out[:, 3] = t3
+    return out.view(np.uint8).reshape(-1)
+
+
+def keystream(rk: List[int], iv_words: Tuple[int, int, int], counter: int, blocks: int) -> np.ndarray:
+    """
+    Keystream of the given number of counter blocks as a flat uint8 array.
+    """
+    return columns_to_bytes(*encrypt_columns(*counter_columns(iv_words, counter, blocks), rk))
+
+
+def multi_keystream(rk: List[int], iv_words: List[Tuple[int, int, int]], blocks: List[int]) -> bytes:
+    """
+    Keystreams of several IVs in one batch: for every IV, the given number of
+    blocks starting at counter 1 (E(J0) first), concatenated.
+    """
+    words = np.array(iv_words, dtype=np.uint32).reshape(-1, 3)
+    blocks = np.array(blocks, dtype=np.int64)
+    s0 = np.repeat(words[:, 0], blocks)
+    s1 = np.repeat(words[:, 1], blocks)
+    s2 = np.repeat(words[:, 2], blocks)
+    # Position of every block inside its own IV's run, plus 1
+    starts = np.cumsum(blocks) - blocks
+    s3 = (np.arange(len(s0), dtype=np.int64) - np.repeat(starts, blocks) + 1).astype(np.uint32)
+    return columns_to_bytes(*encrypt_columns(s0, s1, s2, s3, rk)).tobytes()
+
+
+def ctr_xor(rk: List[int], iv_words: Tuple[int, int, int], counter: int, data, out=None) -> bytes:
+    """
+    XOR data with the CTR keystream starting at the given counter value.
+    With out (a writable buffer of len(data) bytes, may be data itself) the
+    result is written there and None is returned.
+    """
+    n = len(data)
+    stream = keystream(rk, iv_words, counter, (n + 15) // 16)
+    if out is not None:
+        np.bitwise_xor(np.frombuffer(data, dtype=np.uint8), stream[:n], out=np.frombuffer(out, dtype=np.uint8))
+        return None
+    return np.bitwise_xor(np.frombuffer(data, dtype=np.uint8), stream[:n]).tobytes()
@@ -1,5 +1,6 @@
 # test_aes.py
-from aes import aes128
+import random
+from aes import aes128, aes128_reference, aes128_bitsliced
 
 # NIST FIPS-197 Appendix B test vector
 plaintext = [0x00, 0x11, 0x22, 0x33, 0x44, 0x55, 0x66, 0x77,
@@ -11,4 +12,31 @@ expected =  [0x69, 0xc4, 0xe0, 0xd8, 0x6a, 0x7b, 0x04, 0x30,
 
 result = aes128(plaintext, key)
 print(f"Pass: {result == expected}")
-# Should output: Pass: True
\ No newline at end of file
+# Should output: Pass: True
+
+result = aes128_reference(plaintext, key)
+print(f"Reference pass: {result == expected}")
+# Should output: Reference pass: True
+
+# T-table engine against the reference path on random blocks
+rng = random.Random(197)
+match = True
+for _ in range(200):
+    p = [rng.randrange(256) for _ in range(16)]
+    k = [rng.randrange(256) for _ in range(16)]
+    match &= aes128(p, k) == aes128_reference(p, k)
+print(f"T-table matches reference: {match}")
+# Should output: T-table matches reference: True
+
+# Bitsliced engine on one batch of random blocks
+blocks = [[rng.randrange(256) for _ in range(16)] for _ in range(100)]
+result = aes128_bitsliced(blocks, key)
+print(f"Bitsliced matches reference: {result == [aes128_reference(p, key) for p in blocks]}")
+# Should output: Bitsliced matches reference: True
+
+# Keys of extreme Hamming weight (every round key lane mask 0 or all ones)
+match = True
+for k in ([0] * 16, [255] * 16):
+    match &= aes128_bitsliced(blocks[:5], k) == [aes128_reference(p, k) for p in blocks[:5]]
+print(f"Bitsliced matches reference for all-zero and all-one keys: {match}")
+# Should output: Bitsliced matches reference for all-zero and all-one keys: True
@@ -1,7 +1,10 @@
 # author: linzheng tan
 
-from typing import List, Optional
-from ghash import gcm_gf_mult
+import decimal
+from typing import List, Optional, Sequence, Tuple
+import gf128
+from gf128 import mul as gf_mult
+from ghash import _reduce256
 from gcm_auxiliary import int_to_list, xor_bytes
 
 # --- GF(2^128) Arithmetic Utilities ---
@@ -12,24 +15,20 @@ def list_to_int(l: List[int]) -> int:
         val = (val << 8) | b
     return val
 
+def gf_mul(a_list: List[int], b_list: List[int]) -> List[int]:
+    return int_to_list(gf_mult(list_to_int(a_list), list_to_int(b_list)), 16)
+
 def gf_pow(x_list: List[int], power: int) -> List[int]:
-    res = [0x80] + [0] * 15 # GCM Identity: 1 is 0x8000...
-    base = list(x_list)
-    p = power
-    while p > 0:
-        if p % 2 == 1:
-            res = gcm_gf_mult(res, base)
-        base = gcm_gf_mult(base, base)
-        p //= 2
-    return res
+    # GCM Identity: 1 is 0x8000...; windowed exponentiation in gf128
+    return int_to_list(gf128.power(list_to_int(x_list), power), 16)
 
 def gf_inverse(a_list: List[int]) -> List[int]:
-    return gf_pow(a_list, (1 << 128) - 2)
+    """a^(2^128 - 2), computed by Itoh-Tsujii"""
+    return int_to_list(gf128.inverse(list_to_int(a_list)), 16)
 
 def gf_sqrt(a_list: List[int]) -> List[int]:
-    """Calculate Square Root using Fermat's Little Theorem: a^(2^127)"""
-    power: int = 1 << 127
-    return gf_pow(a_list, power)
+    """Square Root a^(2^127), a precomputed linear map since squaring is linear"""
+    return int_to_list(gf128.sqrt(list_to_int(a_list)), 16)
 
 # --- Linear Algebra Solver for x^2 + x = k ---
 
@@ -39,11 +38,9 @@ def build_linear_map_matrix() -> List[int]:
     for i in range(128):
         # Basis vector e_i (integer with i-th bit set)
         e_i_int = 1 << (127 - i)
-        e_i = int_to_list(e_i_int, 16)
         
         # Calculate L(e_i) = e_i^2 + e_i
-        sq = gcm_gf_mult(e_i, e_i)
-        val = list_to_int(sq) ^ e_i_int
+        val = gf128.square(e_i_int) ^ e_i_int
         matrix.append(val)
     return matrix
 
@@ -95,6 +92,133 @@ def solve_linear_system_gf2(matrix_rows: List[int], k_val: int) -> Optional[int]
                 z |= (1 << (127 - col))
     return z
 
+# --- Cached solver for z^2 + z = K ---
+
+# (solution columns, consistency columns), built on first use
+_trace_solver = None
+
+def _bits(k: int):
+    """indices i (0 = most significant) of the set bits of a 128-bit integer"""
+    while k:
+        low = k & -k
+        yield 128 - low.bit_length()
+        k ^= low
+
+def _quadratic_solver() -> Tuple[List[int], List[int]]:
+    """
+    Reduce the fixed matrix of L(z) = z^2 + z once, keeping the row operations.
+
+    Returns per bit i of K the contribution S[i] of that bit to the solution z
+    and C[i] to the consistency check, so that
+        z = XOR of S[i] and the system is solvable iff XOR of C[i] == 0
+    over the set bits of K.
+    """
+    global _trace_solver
+    if _trace_solver is not None:
+        return _trace_solver
+    n = 128
+    col_vecs = build_linear_map_matrix()
+    M = [0] * n
+    for j in range(n):
+        for i in _bits(col_vecs[j]):
+            M[i] |= (1 << (127 - j))
+    # T[r] records which rows of the original system were combined into row r
+    T = [1 << (127 - r) for r in range(n)]
+
+    pivots = []
+    curr_row = 0
+    for col in range(n):
+        if curr_row >= n: break
+        pivot = -1
+        for r in range(curr_row, n):
+            if (M[r] >> (127 - col)) & 1:
+                pivot = r
+                break
+        if pivot == -1: continue
+        M[curr_row], M[pivot] = M[pivot], M[curr_row]
+        T[curr_row], T[pivot] = T[pivot], T[curr_row]
+        for r in range(n):
+            if r != curr_row and (M[r] >> (127 - col)) & 1:
+                M[r] ^= M[curr_row]
+                T[r] ^= T[curr_row]
+        pivots.append((curr_row, col))
+        curr_row += 1
+
+    S = [0] * n
+    C = [0] * n
+    for r, col in pivots:
+        for i in _bits(T[r]):
+            S[i] ^= 1 << (127 - col)
+    # Rows without a pivot must reduce K to zero
+    for r in range(curr_row, n):
+        for i in _bits(T[r]):
+            C[i] ^= 1 << (127 - r)
+    _trace_solver = (S, C)
+    return _trace_solver
+
+def solve_trace_equation(k_val: int) -> Optional[int]:
+    """One root z of z^2 + z = K (the other is z + 1), None if there is none."""
+    S, C = _quadratic_solver()
+    z = 0
+    check = 0
+    for i in _bits(k_val):
+        z ^= S[i]
+        check ^= C[i]
+    if check: return None
+    return z
+
+def _batch_inverse(values: List[int]) -> List[int]:
+    """Montgomery's trick: all inverses with one field inversion (0 maps to 0 like gf_inverse)"""
+    nonzero = [i for i, v in enumerate(values) if v]
+    result = [0] * len(values)
+    if not nonzero: return result
+    prefix = [values[nonzero[0]]]
+    for i in nonzero[1:]:
+        prefix.append(gf_mult(prefix[-1], values[i]))
+    inv = gf128.inverse(prefix[-1])
+    for k in range(len(nonzero) - 1, 0, -1):
+        result[nonzero[k]] = gf_mult(inv, prefix[k - 1])
+        inv = gf_mult(inv, values[nonzero[k]])
+    result[nonzero[0]] = inv
+    return result
+
+def solve_quadratic_gf2_128_batch(triples: Sequence[Tuple[List[int], List[int], List[int]]]) -> List[List[List[int]]]:
+    """
+    Solves many a*x^2 + b*x + c = 0 at once, same results as
+    solve_quadratic_gf2_128 per triple. All inversions of the batch share one
+    field inversion and every trace equation uses the cached solver.
+    """
+    A = [list_to_int(t[0]) for t in triples]
+    B = [list_to_int(t[1]) for t in triples]
+    Cs = [list_to_int(t[2]) for t in triples]
+    results: List[List[List[int]]] = [[] for _ in triples]
+
+    # Linear case a = 0: x = c / b; square case b = 0: x = sqrt(c / a);
+    # quadratic case: u = b/a, v = c/a
+    linear = [i for i in range(len(triples)) if A[i] == 0 and B[i] != 0]
+    square = [i for i in range(len(triples)) if A[i] != 0 and B[i] == 0]
+    quadratic = [i for i in range(len(triples)) if A[i] != 0 and B[i] != 0]
+    inverses = _batch_inverse([B[i] for i in linear] + [A[i] for i in square] + [A[i] for i in quadratic])
+    for i, inv_b in zip(linear, inverses):
+        results[i] = [int_to_list(gf_mult(Cs[i], inv_b), 16)]
+    for i, inv_a in zip(square, inverses[len(linear):]):
+        results[i] = [int_to_list(gf128.sqrt(gf_mult(Cs[i], inv_a)), 16)]
+
+    U = {}
+    V = {}
+    for i, inv_a in zip(quadratic, inverses[len(linear) + len(square):]):
+        U[i] = gf_mult(B[i], inv_a)
+        V[i] = gf_mult(Cs[i], inv_a)
+    # K = v / u^2
+    inv_u2 = _batch_inverse([gf_mult(U[i], U[i]) for i in quadratic])
+    for i, inv in zip(quadratic, inv_u2):
+        z = solve_trace_equation(gf_mult(V[i], inv))
+        if z is None: continue
+        x1 = gf_mult(U[i], z)
+        # The other root is u*(z+1) = x1 + u
+        results[i] = [int_to_list(x1, 16), int_to_list(x1 ^ U[i], 16)]
+    return results
+
 def solve_quadratic_gf2_128(a: List[int], b: List[int], c: List[int]) -> List[List[int]]:
     """
     Solves ax^2 + bx + c = 0 in GF(2^128).
@@ -104,35 +228,31 @@ def solve_quadratic_gf2_128(a: List[int], b: List[int], c: List[int]) -> List[Li
     # 1. Linear Case (Degenerate)
     if list_to_int(a) == 0:
         if list_to_int(b) == 0: return []
-        return [gcm_gf_mult(c, gf_inverse(b))]
+        return [gf_mul(c, gf_inverse(b))]
+
+    # b = 0: a*x^2 = c has the single (double) root sqrt(c/a)
+    if list_to_int(b) == 0:
+        return [gf_sqrt(gf_mul(c, gf_inverse(a)))]
 
     # 2. Setup Transform
     inv_a = gf_inverse(a)
-    u = gcm_gf_mult(b, inv_a)      # u = b/a
-    v = gcm_gf_mult(c, inv_a)      # v = c/a
+    u = gf_mul(b, inv_a)      # u = b/a
+    v = gf_mul(c, inv_a)      # v = c/a
     
     # K = v / u^2
-    u2 = gcm_gf_mult(u, u)
+    u2 = gf_mul(u, u)
     inv_u2 = gf_inverse(u2)
-    K_list = gcm_gf_mult(v, inv_u2)
+    K_list = gf_mul(v, inv_u2)
     K_int = list_to_int(K_list)
 
-    # 3. Solve z^2 + z = K via Matrix
-    col_vecs = build_linear_map_matrix()
-    rows = [0] * 128
-    for j in range(128): 
-        val = col_vecs[j]
-        for i in range(128):
-            if (val >> (127 - i)) & 1:
-                rows[i] |= (1 << (127 - j))
-    
-    z_int = solve_linear_system_gf2(rows, K_int)
+    # 3. Solve z^2 + z = K via the cached reduced matrix
+    z_int = solve_trace_equation(K_int)
     
     if z_int is None: return [] # No solution
 
     # 4. Map back to x1
     z_list = int_to_list(z_int, 16)
-    x1 = gcm_gf_mult(u, z_list)
+    x1 = gf_mul(u, z_list)
     
     # 5. Calculate x2
     # The other root for z^2+z=K is z+1.
@@ -141,3 +261,439 @@ def solve_quadratic_gf2_128(a: List[int], b: List[int], c: List[int]) -> List[Li
     x2 = xor_bytes(x1, u)
     
     return [x1, x2]
+
+# --- Polynomials over GF(2^128) ---
+#
+# A polynomial is a list of field elements (128-bit ints in GCM bit order),
+# p[i] the coefficient of x^i, without trailing zeros; [] is the zero polynomial.
+
+# Operand sizes (coefficients) where the faster multiplication / division / gcd takes over
+KARATSUBA_THRESHOLD = 16
+KRONECKER_THRESHOLD = 64
+FFT_THRESHOLD = 8
+NEWTON_THRESHOLD = 64
+HGCD_THRESHOLD = 32
+
+_fft_engine = False     # not probed yet
+
+def _load_fft_engine():
+    """the poly_numpy module, or None when NumPy is not installed (imported on first use)"""
+    global _fft_engine
+    if _fft_engine is False:
+        try:
+            import poly_numpy
+        except ImportError:
+            poly_numpy = None
+        _fft_engine = poly_numpy
+    return _fft_engine
+
+def poly_trim(p: List[int]) -> List[int]:
+    while p and not p[-1]:
+        p.pop()
+    return p
+
+def poly_add(a: List[int], b: List[int]) -> List[int]:
+    """a + b (= a - b)"""
+    if len(a) < len(b):
+        a, b = b, a
+    out = list(a)
+    for i, v in enumerate(b):
+        out[i] ^= v
+    return poly_trim(out)
+
+def poly_scale(p: List[int], c: int) -> List[int]:
+    """c * p for a field element c"""
+    if not c: return []
+    return [gf_mult(c, v) for v in p]
+
+def poly_monic(p: List[int]) -> List[int]:
+    if not p or p[-1] == gf128.ONE: return list(p)
+    return poly_scale(p, gf128.inverse(p[-1]))
+
+def poly_eval(p: List[int], x: int) -> int:
+    """p(x) by Horner's rule"""
+    y = 0
+    for c in reversed(p):
+        y = gf_mult(y, x) ^ c
+    return y
+
+def _mul_schoolbook(a: List[int], b: List[int]) -> List[int]:
+    out = [0] * (len(a) + len(b) - 1)
+    # Every coefficient takes part in several products: spread each once
+    spread_b = [gf128.spread(v) for v in b]
+    mul_spread = gf128.mul_spread
+    for i, ai in enumerate(a):
+        if ai:
+            spread_a = gf128.spread(ai)
+            for j, bj in enumerate(spread_b, i):
+                out[j] ^= mul_spread(spread_a, bj)
+    return out
+
+def _mul_karatsuba(a: List[int], b: List[int]) -> List[int]:
+    k = max(len(a), len(b)) // 2
+    a0, a1 = a[:k], a[k:]
+    b0, b1 = b[:k], b[k:]
+    out = [0] * (len(a) + len(b) - 1)
+    if not a1 or not b1:
+        # Unbalanced operands: split only the long one
+        if not a1:
+            a0, a1, b = b0, b1, a
+        for i, v in enumerate(_mul(a0, b)):
+            out[i] = v
+        for i, v in enumerate(_mul(a1, b), k):
+            out[i] ^= v
+        return out
+    z0 = _mul(a0, b0)
+    z2 = _mul(a1, b1)
+    # (a0 + a1)(b0 + b1) - z0 - z2 is the middle term, subtraction is XOR
+    sa = [x ^ y for x, y in zip(a0, a1)] + a0[len(a1):] + a1[len(a0):]
+    sb = [x ^ y for x, y in zip(b0, b1)] + b0[len(b1):] + b1[len(b0):]
+    z1 = _mul(sa, sb)
+    for i, v in enumerate(z0):
+        out[i] = v
+        z1[i] ^= v
+    for i, v in enumerate(z2):
+        z1[i] ^= v
+    for i, v in enumerate(z2, 2 * k):
+        out[i] ^= v
+    for i, v in enumerate(z1, k):
+        out[i] ^= v
+    return out
+
+# Exact integer arithmetic on decimals of any size (libmpdec multiplies large
+# operands with a number-theoretic transform, CPython ints with Karatsuba)
+_DECIMAL = decimal.Context(prec=decimal.MAX_PREC, Emax=decimal.MAX_EMAX, Emin=decimal.MIN_EMIN)
+_DIGIT_PARITY = str.maketrans('0123456789', '0101010101')
+
+def _mul_kronecker(a: List[int], b: List[int]) -> List[int]:
+    """
+    Kronecker substitution: pack each polynomial into one number with a 256-bit
+    slot per coefficient, so the carry-less product of the packed numbers holds
+    every unreduced coefficient product. As in gf128.clmul the carry-less
+    product is an integer product of bit-spread operands, here with a group of
+    w decimal digits per bit, wide enough for the term count of every output
+    bit (at most 128 * min(len(a), len(b))).
+    """
+    w = len(str(128 * min(len(a), len(b))))
+    spread = str.maketrans({'0': '0' * w, '1': '0' * (w - 1) + '1'})
+
+    def pack(p):
+        # highest coefficient first, each in the low 128 bits of its slot
+        return ''.join(['0' * 128 + format(c, '0128b') for c in reversed(p)]).translate(spread)
+    product = str(_DECIMAL.multiply(_DECIMAL.create_decimal(pack(a)), _DECIMAL.create_decimal(pack(b))))
+    # The last digit of each group is the term count of one output bit, its parity the bit
+    n = len(a) + len(b) - 1
+    bits = product[len(product) % w - 1::w] if len(product) % w else product[w - 1::w]
+    bits = bits.translate(_DIGIT_PARITY).rjust(256 * n, '0')
+    end = len(bits)
+    # In GCM bit order the integer carry-less product is one bit short of the 256-bit frame
+    return [_reduce256(int(bits[end - 256 * (k + 1):end - 256 * k], 2) << 1) for k in range(n)]
+
+def _mul(a: List[int], b: List[int]) -> List[int]:
+    """untrimmed product (len(a) + len(b) - 1 coefficients) of non-empty a and b"""
+    shorter = min(len(a), len(b))
+    if shorter >= FFT_THRESHOLD and _load_fft_engine() is not None:
+        return _fft_engine.mul(a, b)
+    if shorter < KARATSUBA_THRESHOLD:
+        return _mul_schoolbook(a, b)
+    if shorter >= KRONECKER_THRESHOLD:
+        return _mul_kronecker(a, b)
+    return _mul_karatsuba(a, b)
+
+def poly_mul(a: List[int], b: List[int]) -> List[int]:
+    """
+    a * b: schoolbook for small operands, Karatsuba from KARATSUBA_THRESHOLD and
+    Kronecker substitution from KRONECKER_THRESHOLD coefficients; with NumPy
+    installed an FFT product (poly_numpy) from FFT_THRESHOLD coefficients
+    """
+    if not a or not b: return []
+    return poly_trim(_mul(a, b))
+
+def poly_square(a: List[int]) -> List[int]:
+    """a^2: squaring is linear in characteristic 2, sum a_i^2 x^(2i)"""
+    out = [0] * (2 * len(a) - 1) if a else []
+    out[::2] = [gf128.square(v) for v in a]
+    return out
+
+def poly_divmod(a: List[int], b: List[int]) -> Tuple[List[int], List[int]]:
+    """
+    (q, r) with a = q * b + r and deg r < deg b, by long division, or by Newton
+    division when quotient and divisor both reach NEWTON_THRESHOLD coefficients
+    """
+    assert b, 'Division by the zero polynomial'
+    r = poly_trim(list(a))
+    n = len(b) - 1
+    if len(r) <= n: return [], r
+    if min(len(r) - n, n) >= NEWTON_THRESHOLD:
+        m = len(r) - 1 - n
+        # rev(q) = rev(a) / rev(b) mod x^(m + 1), two products and a series inverse
+        q = _mul(r[::-1][:m + 1], _series_inverse(b[::-1], m + 1))[:m + 1][::-1]
+        qb = _mul(q, b)
+        return q, poly_trim([x ^ y for x, y in zip(r[:n], qb[:n])])
+    inv_lead = gf128.inverse(b[-1])
+    # Every coefficient of b is multiplied once per quotient term: spread them once
+    spread_b = [gf128.spread(v) for v in b[:-1]]
+    mul_spread = gf128.mul_spread
+    q = [0] * (len(r) - n)
+    for k in range(len(r) - 1, n - 1, -1):
+        c = r[k]
+        if not c: continue
+        c = gf_mult(c, inv_lead)
+        q[k - n] = c
+        # r -= c * x^(k - n) * b
+        spread_c = gf128.spread(c)
+        for i, v in enumerate(spread_b, k - n):
+            r[i] ^= mul_spread(spread_c, v)
+        r[k] = 0
+    return poly_trim(q), poly_trim(r[:n])
+
+def _series_inverse(h: List[int], k: int) -> List[int]:
+    """g with g * h = 1 mod x^k (h[0] != 0), by Newton iteration"""
+    g = [gf128.inverse(h[0])]
+    n = 1
+    while n < k:
+        n = min(2 * n, k)
+        # g' = g (2 - h g) = h g^2 in characteristic 2
+        g = _mul(h[:n], poly_square(g))[:n]
+    return g
+
+class PolyModulus:
+    """
+    Reduction modulo a fixed f (degree n >= 1) for repeated use, as in modular
+    exponentiation. For large n the quotient comes from a precomputed inverse
+    of reversed f (two multiplications per reduction, Newton division) instead
+    of long division.
+    """
+
+    def __init__(self, f: List[int]):
+        self.f = poly_monic(poly_trim(list(f)))
+        self.n = len(self.f) - 1
+        assert self.n >= 1, 'Modulus must have positive degree'
+        self._inv = None
+        if self.n >= NEWTON_THRESHOLD:
+            # reversed f has constant term 1, its inverse covers quotients of degree < n
+            self._inv = _series_inverse(self.f[::-1], self.n)
+        # FFT transforms of the inverse (per quotient length) and of f
+        self._spectra = {}
+        self._f_spectrum = None
+
+    def reduce(self, a: List[int]) -> List[int]:
+        """a mod f"""
+        a = poly_trim(list(a))
+        n = self.n
+        m = len(a) - 1 - n
+        if m < 0: return a
+        if self._inv is None or m >= n:
+            return poly_divmod(a, self.f)[1]
+        if m + 1 >= FFT_THRESHOLD and _load_fft_engine() is not None:
+            return self._reduce_fft(a, m)
+        # rev(q) = rev(a) / rev(f) mod x^(m + 1)
+        q = _mul(a[::-1][:m + 1], self._inv[:m + 1])[:m + 1][::-1]
+        qf = _mul(q, self.f)
+        return poly_trim([x ^ y for x, y in zip(a[:n], qf[:n])])
+
+    def _reduce_fft(self, a: List[int], m: int) -> List[int]:
+        """
+        reduce on poly_numpy, reusing the transforms of the fixed operands. q * f
+        is only needed below x^n and is taken mod x^N - 1 (N > n, half the
+        transform length): its coefficients from x^N on equal those of a.
+        """
+        engine, n = _fft_engine, self.n
+        if m not in self._spectra:
+            size = engine.fft_length(2 * m + 1)
+            self._spectra[m] = size, engine.transform(self._inv[:m + 1], size)
+        size, spectrum = self._spectra[m]
+        q = engine.mul_transformed(a[::-1][:m + 1], spectrum, size, m + 1)[::-1]
+        if self._f_spectrum is None:
+            size = engine.fft_length(n + 1)
+            self._f_spectrum = size, engine.transform(self.f, size)
+        size, spectrum = self._f_spectrum
+        qf = engine.mul_transformed(q, spectrum, size, n)
+        wrap = size // engine.SLOT
+        r = [x ^ y for x, y in zip(a[:n], qf)]
+        for i, v in enumerate(a[wrap:]):
+            r[i] ^= v
+        return poly_trim(r)
+
+    def mul(self, a: List[int], b: List[int]) -> List[int]:
+        return self.reduce(poly_mul(a, b))
+
+    def square(self, a: List[int]) -> List[int]:
+        return self.reduce(poly_square(a))
+
+def poly_powmod(a: List[int], e: int, f) -> List[int]:
+    """a^e mod f (f a polynomial or a PolyModulus)"""
+    mod = f if isinstance(f, PolyModulus) else PolyModulus(f)
+    result = [gf128.ONE]
+    base = mod.reduce(a)
+    for bit in bin(e)[2:]:
+        result = mod.square(result)
+        if bit == '1':
+            result = mod.mul(result, base)
+    return mod.reduce(result)
+
+_IDENTITY = (([gf128.ONE], []), ([], [gf128.ONE]))
+
+def _add_shifted(p: List[int], hi: List[int], k: int) -> List[int]:
+    """p + x^k hi"""
+    out = p + [0] * (k + len(hi) - len(p))
+    for i, v in enumerate(hi, k):
+        out[i] ^= v
+    return poly_trim(out)
+
+def _apply(m, c_hi: List[int], d_hi: List[int], k: int, a: List[int], b: List[int]):
+    """x^k (c_hi, d_hi) + M (a, b) for a 2x2 polynomial matrix M"""
+    (m00, m01), (m10, m11) = m
+    c = poly_add(poly_mul(m00, a), poly_mul(m01, b))
+    d = poly_add(poly_mul(m10, a), poly_mul(m11, b))
+    return _add_shifted(c, c_hi, k), _add_shifted(d, d_hi, k)
+
+def _hgcd(a: List[int], b: List[int], matrix: bool = True):
+    """
+    Half-gcd of a and b with deg a = n > deg b: (M, c, d) where M is the product
+    of the Euclidean steps that take (a, b) to (c, d) = M (a, b) with
+    deg c >= ceil(n / 2) > deg d. The quotients of the upper halves of a and b
+    are their first quotients, so two recursions on half the degree replace
+    half of the steps, O(M(n) log n) instead of O(n^2). matrix=False skips the
+    final product of M (None is returned).
+    """
+    n = len(a) - 1
+    m = (n + 1) // 2
+    if len(b) - 1 < m:
+        return _IDENTITY, a, b
+    if n < HGCD_THRESHOLD:
+        r0, r1 = _IDENTITY
+        while len(b) - 1 >= m:
+            q, r = poly_divmod(a, b)
+            a, b = b, r
+            r0, r1 = r1, (poly_add(r0[0], poly_mul(q, r1[0])), poly_add(r0[1], poly_mul(q, r1[1])))
+        return (r0, r1), a, b
+    # M (a, b) = x^m M (a_hi, b_hi) + M (a_lo, b_lo), the first part from the recursion
+    r, c, d = _hgcd(a[m:], b[m:])
+    c, d = _apply(r, c, d, m, poly_trim(a[:m]), poly_trim(b[:m]))
+    if len(d) - 1 < m:
+        return r, c, d
+    q, rem = poly_divmod(c, d)
+    (r00, r01), (r10, r11) = r
+    r = ((r10, r11), (poly_add(r00, poly_mul(q, r10)), poly_add(r01, poly_mul(q, r11))))
+    c, d = d, rem
+    if len(d) - 1 < m:
+        return r, c, d
+    k = 2 * m - (len(c) - 1)
+    s, c_hi, d_hi = _hgcd(c[k:], d[k:])
+    c, d = _apply(s, c_hi, d_hi, k, poly_trim(c[:k]), poly_trim(d[:k]))
+    if not matrix:
+        return None, c, d
+    (s00, s01), (s10, s11) = s
+    (r00, r01), (r10, r11) = r
+    return (((poly_add(poly_mul(s00, r00), poly_mul(s01, r10)), poly_add(poly_mul(s00, r01), poly_mul(s01, r11))),
+             (poly_add(poly_mul(s10, r00), poly_mul(s11, r10)), poly_add(poly_mul(s10, r01), poly_mul(s11, r11)))),
+            c, d)
+
+def poly_gcd(a: List[int], b: List[int]) -> List[int]:
+    """
+    monic gcd by Euclid's algorithm, with half-gcd steps (_hgcd) that halve the
+    degree while the operands have more than HGCD_THRESHOLD coefficients
+    """
+    a = poly_trim(list(a))
+    b = poly_trim(list(b))
+    if len(a) < len(b):
+        a, b = b, a
+    while b:
+        if len(a) > len(b) > HGCD_THRESHOLD:
+            _, a, b = _hgcd(a, b, matrix=False)
+            if not b: break
+        a, b = b, poly_divmod(a, b)[1]
+    return poly_monic(a)
+
+def poly_gcd_many(polys: Sequence[List[int]]) -> List[int]:
+    """
+    gcd of several polynomials; after the first pair the running gcd is usually
+    small, so later steps cost one reduction of each polynomial modulo it
+    """
+    g: List[int] = []
+    for p in sorted(polys, key=len):
+        g = poly_gcd(g, p) if g else poly_monic(poly_trim(list(p)))
+        if len(g) == 1: break
+    return g
+
+def _frobenius_powers(mod: PolyModulus) -> List[List[int]]:
+    """x^(2^i) mod f for i < 128, by repeated modular squaring"""
+    powers = [mod.reduce([0, gf128.ONE])]
+    for _ in range(127):
+        powers.append(mod.square(powers[-1]))
+    return powers
+
+def _trace_map(beta: int, spread_powers: List[List[int]]) -> List[int]:
+    """
+    Tr(beta x) = sum over i < 128 of beta^(2^i) x^(2^i) mod f, a combination
+    of the shared powers from _frobenius_powers (given spread) instead of 127
+    modular squarings per beta; each coefficient is reduced once, at the end
+    """
+    acc = [0] * max(len(p) for p in spread_powers)
+    clmul_spread = gf128.clmul_spread
+    c = beta
+    for p in spread_powers:
+        spread_c = gf128.spread(c)
+        for j, v in enumerate(p):
+            acc[j] ^= clmul_spread(spread_c, v)
+        c = gf128.square(c)
+    return poly_trim([_reduce256(v << 1) for v in acc])
+
+def _split_roots(g: List[int], powers: List[List[int]]) -> List[int]:
+    """
+    roots of a monic squarefree g that splits into linear factors, given the
+    powers x^(2^i) mod g. A factor h is split by gcd(h, Tr(beta x) mod h) for
+    one basis element beta after the other; Tr(beta x) mod h comes from the
+    same trace modulo the factor h was split from, so each Tr(beta x) mod g is
+    computed once.
+    """
+    spread_powers = [[gf128.spread(v) for v in p] for p in powers]
+
+    def traces(h, parent):
+        """Tr(beta_i x) mod h by i, reduced from parent's and kept"""
+        kept = {}
+        def trace(i):
+            if i not in kept:
+                kept[i] = poly_divmod(parent(i), h)[1]
+            return kept[i]
+        return trace
+
+    roots: List[int] = []
+    work = [(g, 0, traces(g, lambda i: _trace_map(1 << (127 - i), spread_powers)))]
+    while work:
+        h, i, trace = work.pop()
+        if len(h) == 2:
+            roots.append(h[0])      # x + h0 = 0
+            continue
+        # Two distinct roots r, s differ in Tr(beta r) vs Tr(beta s) for some basis element beta
+        for i in range(i, 128):
+            s = poly_gcd(h, trace(i))
+            if 1 < len(s) < len(h):
+                t = poly_divmod(h, s)[0]
+                work += [(s, i + 1, traces(s, trace)), (t, i + 1, traces(t, trace))]
+                break
+        else:
+            raise ValueError('Polynomial does not split into distinct linear factors')
+    return roots
+
+def poly_roots(f: List[int]) -> List[int]:
+    """
+    The distinct roots of f in GF(2^128), sorted.
+
+    g = gcd(f, x^(2^128) - x) keeps exactly the linear factors of f, with
+    x^(2^128) mod f from 128 modular squarings; g is then split by
+    gcd(g, Tr(beta x)) (Berlekamp's trace algorithm), every Tr(beta x) mod g
+    a combination of the same powers x^(2^i) mod g.
+    """
+    f = poly_trim(list(f))
+    if len(f) <= 1: return []
+    mod = PolyModulus(f)
+    x = [0, gf128.ONE]
+    t = mod.reduce(x)
+    for _ in range(128):
+        t = mod.square(t)
+    g = poly_gcd(mod.f, poly_add(t, x))
+    if len(g) <= 2:
+        return [g[0]] if len(g) == 2 else []
+    return sorted(_split_roots(g, _frobenius_powers(PolyModulus(g))))
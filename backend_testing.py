@@ -0,0 +1,96 @@
+# test_backends.py
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import backends
+from gcm import gcm_encrypt
+
+# Every installed backend agrees with gcm_encrypt and rejects a wrong tag
+rng = random.Random(11)
+cases = [(rng.randbytes(16), rng.randbytes(12), rng.randbytes(rng.randrange(70)), rng.randbytes(rng.randrange(40)))
+         for _ in range(5)]
+for name in backends.available():
+    match = rejected = True
+    for key, iv, plaintext, aad in cases:
+        ciphertext, mac = backends.encrypt(plaintext, key, iv, aad, backend=name)
+        match &= (ciphertext, mac) == gcm_encrypt(plaintext, key, iv, aad)
+        match &= backends.decrypt(ciphertext, key, iv, aad, mac, backend=name) == (plaintext, True)
+        rejected &= backends.decrypt(ciphertext, key, iv, aad, bytes(16), backend=name) == (None, False)
+    print(f"{name}: matches {match}, wrong tag rejected {rejected}")
+# Should output (plus pycryptodome and numpy lines when installed):
+# table: matches True, wrong tag rejected True
+# bitslice: matches True, wrong tag rejected True
+# reference: matches True, wrong tag rejected True
+
+# Automatic choice by capability and size, override by select()
+installed = backends.available()
+small, large = backends.choose(100).name, backends.choose(1 << 20).name
+print(f"Automatic choice: {small == ('pycryptodome' if 'pycryptodome' in installed else 'table')}, "
+      f"{large == installed[0]}, bitsliced AES: {backends.choose(require=['bitsliced']).name}")
+# Should output: Automatic choice: True, True, bitsliced AES: bitslice
+backends.select('reference')
+print(f"Forced: {backends.choose(1 << 20).name}, numpy allowed: {backends.allows('numpy')}")
+# Should output: Forced: reference, numpy allowed: False
+backends.select(None)
+try:
+    backends.select('quantum')
+    unknown = False
+except ValueError:
+    unknown = True
+print(f"Unknown backend rejected: {unknown}")
+# Should output: Unknown backend rejected: True
+
+# backend= is validated like select()
+errors = []
+for name in ('quantum', 'pycryptodome' if 'pycryptodome' not in installed else 'quantum'):
+    try:
+        backends.encrypt(b"x", bytes(16), bytes(12), backend=name)
+    except ValueError:
+        errors.append(name)
+print(f"Unknown or missing backend= rejected: {len(errors) == 2}")
+# Should output: Unknown or missing backend= rejected: True
+
+# backend='table' pins the engine per call: a large message does not touch NumPy
+probe = ("import sys, backends; backends.encrypt(bytes(1 << 16), bytes(16), bytes(12), backend='table');"
+         "print('numpy' in sys.modules)")
+out = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True).stdout.strip()
+print(f"backend='table' avoids NumPy: {out == 'False'}")
+# Should output: backend='table' avoids NumPy: True
+
+# The engines of gcm.AESGCM agree
+from gcm import AESGCM
+key, iv, plaintext = bytes(range(16)), bytes(12), bytes(range(256)) * 40
+engines = ['auto', 'table'] + (['numpy'] if 'numpy' in installed else [])
+print(f"AESGCM engines agree: {len({AESGCM(key, engine=e).encrypt(iv, plaintext) for e in engines}) == 1}")
+# Should output: AESGCM engines agree: True
+
+# A misspelled AES_GCM_BACKEND does not break imports, it fails on first use
+# (even for a message too short for NumPy), unless select() overrides it
+env = dict(os.environ, AES_GCM_BACKEND='tabel')
+probe = "import gcm; print('imported', flush=True); gcm.gcm_encrypt(b'x', bytes(16), bytes(12))"
+result = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True, env=env)
+rejected = result.stdout.strip() == 'imported' and result.returncode != 0 and 'AES_GCM_BACKEND' in result.stderr
+probe = "import backends, gcm; backends.select('table'); gcm.gcm_encrypt(b'x', bytes(16), bytes(12))"
+overridden = subprocess.run([sys.executable, '-c', probe], env=env).returncode == 0
+print(f"Bad AES_GCM_BACKEND rejected on first use: {rejected}, select() overrides it: {overridden}")
+# Should output: Bad AES_GCM_BACKEND rejected on first use: True, select() overrides it: True
+
+# Importing the CLI and the facade pulls in neither NumPy nor pycryptodome
+probe = "import sys, aes_gcm, backends; print(any(m in sys.modules for m in ('numpy', 'Crypto')))"
+out = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True).stdout.strip()
+print(f"Lazy imports at startup: {out == 'False'}")
+# Should output: Lazy imports at startup: True
+
+# AES_GCM_BACKEND=table keeps NumPy out of a large file encryption
+with tempfile.TemporaryDirectory() as tmp:
+    src = os.path.join(tmp, 'in.bin')
+    with open(src, 'wb') as f:
+        f.write(bytes(1 << 16))
+    probe = ("import sys, aes_gcm; aes_gcm.main(['encrypt', '--key', '00' * 16, sys.argv[1], sys.argv[1] + '.agcm']);"
+             "print('numpy' in sys.modules)")
+    env = dict(os.environ, AES_GCM_BACKEND='table')
+    out = subprocess.run([sys.executable, '-c', probe, src], capture_output=True, text=True, env=env).stdout.strip()
+print(f"AES_GCM_BACKEND=table avoids NumPy: {out == 'False'}")
+# Should output: AES_GCM_BACKEND=table avoids NumPy: True
@@ -0,0 +1,272 @@
+"""
+One AES-128-GCM facade over several implementations.
+
+    from backends import encrypt, decrypt
+    ciphertext, mac = encrypt(plaintext, key, iv, aad)
+    plaintext, is_valid = decrypt(ciphertext, key, iv, aad, mac)
+
+Backends, in order of preference:
+
+- pycryptodome: Crypto.Cipher.AES in GCM mode (C code), when installed
+- numpy: gcm.AESGCM(engine='numpy'), the T-table context with the NumPy
+  batch engine (aes_numpy) for messages of at least gcm.NUMPY_MIN_BYTES,
+  when NumPy is installed
+- table: gcm.AESGCM(engine='table'), T-tables and GHASH tables only, always there
+- bitslice: AES from aes_bitslice (no table indexed with secret data) and
+  GHASH by gf128.mul
+- reference: the list-based aes.aes128_reference and ghash.gcm_gf_mult,
+  one block at a time; slow, for cross-checking
+
+Nothing is imported until a backend is used, availability is checked with
+importlib.util.find_spec, so importing this module (and gcm, which asks it
+whether NumPy may be used) costs neither NumPy nor pycryptodome.
+
+By default the first available backend that has the required capabilities
+and handles the message size is used. AES_GCM_BACKEND=<name> in the
+environment, or select(name), forces one backend for encrypt / decrypt /
+choose here. The gcm module functions (gcm_encrypt, the aes_gcm_* wrappers)
+and gcm.AESGCM(engine='auto') keep running gcm.AESGCM: for them the forced
+backend only decides whether the NumPy batch engine may be used, so any
+backend other than numpy keeps NumPy out (AES_GCM_BACKEND=table never
+imports NumPy). A bad AES_GCM_BACKEND is reported with ValueError on first
+use (the first call here or the first AESGCM(engine='auto')), not on import.
+"""
+import importlib.util
+import os
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+ENV_VAR = 'AES_GCM_BACKEND'
+
+class Backend:
+    """
+    name: registry key
+    modules: top-level modules that must be importable for the backend to work
+    capabilities: what the backend offers ("native", "batch", "tables",
+        "bitsliced", "reference"; "streaming" for the ones that drive
+        gcm.AESGCM and so its incremental encryptor / decryptor)
+    min_bytes: smallest message the automatic choice gives it
+    load: returns (encrypt, decrypt) with the signatures of gcm_encrypt /
+        gcm_decrypt, imports happen here
+    """
+
+    def __init__(self, name: str, modules: Iterable[str], capabilities: Iterable[str], min_bytes: int,
+                 load: Callable[[], Tuple[Callable, Callable]]):
+        self.name = name
+        self.modules = tuple(modules)
+        self.capabilities: FrozenSet[str] = frozenset(capabilities)
+        self.min_bytes = min_bytes
+        self._load = load
+        self._functions = None
+        self._available = None
+
+    def available(self) -> bool:
+        if self._available is None:
+            self._available = all(importlib.util.find_spec(m) is not None for m in self.modules)
+        return self._available
+
+    def functions(self) -> Tuple[Callable, Callable]:
+        """(encrypt, decrypt), imported on first use"""
+        if self._functions is None:
+            self._functions = self._load()
+        return self._functions
+
+    def encrypt(self, plaintext, key, iv, aad=b'') -> Tuple[bytes, bytes]:
+        return self.functions()[0](plaintext, key, iv, aad)
+
+    def decrypt(self, ciphertext, key, iv, aad=b'', mac=b'') -> Tuple[Optional[bytes], bool]:
+        return self.functions()[1](ciphertext, key, iv, aad, mac)
+
+    def __repr__(self):
+        return f'Backend({self.name!r})'
+
+# --- Backend implementations (imports stay inside) ---
+
+def _load_gcm(engine: str) -> Tuple[Callable, Callable]:
+    """gcm_encrypt / gcm_decrypt over contexts pinned to one gcm.AESGCM engine"""
+    from gcm import AESGCM
+    from key_cache import KeyCache
+    cache = KeyCache(lambda key: AESGCM(key, engine=engine))
+
+    def encrypt(plaintext, key, iv, aad=b''):
+        with cache.context(key) as cipher:
+            return cipher.encrypt(iv, plaintext, aad)
+
+    def decrypt(ciphertext, key, iv, aad=b'', mac=b''):
+        with cache.context(key) as cipher:
+            return cipher.decrypt(iv, ciphertext, aad, mac)
+    return encrypt, decrypt
+
+def _load_pycryptodome():
+    from Crypto.Cipher import AES
+
+    def encrypt(plaintext, key, iv, aad=b''):
+        cipher = AES.new(bytes(key), AES.MODE_GCM, nonce=bytes(iv))
+        cipher.update(bytes(aad))
+        return cipher.encrypt_and_digest(bytes(plaintext))
+
+    def decrypt(ciphertext, key, iv, aad=b'', mac=b''):
+        cipher = AES.new(bytes(key), AES.MODE_GCM, nonce=bytes(iv))
+        cipher.update(bytes(aad))
+        try:
+            return cipher.decrypt_and_verify(bytes(ciphertext), bytes(mac)), True
+        except ValueError:
+            return None, False
+    return encrypt, decrypt
+
+def _gcm_from_blocks(keystream: Callable, h: int, mul: Callable, iv: bytes, text: bytes, aad: bytes,
+                     decrypting: bool) -> Tuple[bytes, bytes]:
+    """
+    GCM from keystream(counter, blocks) -> E(IV || counter) ..., the hash key h
+    and mul(x, y) in GF(2^128); returns (output text, tag)
+    """
+    n = len(text)
+    stream = keystream(1, 1 + (n + 15) // 16)
+    output = (int.from_bytes(text, 'big') ^ int.from_bytes(stream[16:16 + n], 'big')).to_bytes(n, 'big')
+    ciphertext = text if decrypting else output
+    X = 0
+    for data in (aad, ciphertext):
+        padded = data + bytes(-len(data) % 16)
+        for i in range(0, len(padded), 16):
+            X = mul(X ^ int.from_bytes(padded[i:i + 16], 'big'), h)
+    X = mul(X ^ (((len(aad) * 8) << 64) | (n * 8)), h)
+    return output, (X ^ int.from_bytes(stream[:16], 'big')).to_bytes(16, 'big')
+
+def _block_backend(setup: Callable, mul: Callable) -> Tuple[Callable, Callable]:
+    """encrypt / decrypt from setup(key, iv) -> (keystream(counter, blocks), H)"""
+    from gcm_auxiliary import as_buffer, tags_equal
+
+    def run(text, key, iv, aad, decrypting):
+        key, iv = bytes(as_buffer(key)), bytes(as_buffer(iv))
+        assert len(key) == 16, 'AES-128 key must be 16 bytes'
+        assert len(iv) == 12, 'IV must be 12 bytes in this standard implementation'
+        keystream, h = setup(key, iv)
+        return _gcm_from_blocks(keystream, h, mul, iv, bytes(as_buffer(text)), bytes(as_buffer(aad)), decrypting)
+
+    def encrypt(plaintext, key, iv, aad=b''):
+        return run(plaintext, key, iv, aad, False)
+
+    def decrypt(ciphertext, key, iv, aad=b'', mac=b''):
+        plaintext, tag = run(ciphertext, key, iv, aad, True)
+        is_valid = tags_equal(tag, mac)
+        return (plaintext if is_valid else None), is_valid
+    return encrypt, decrypt
+
+def _load_bitslice():
+    import struct
+    import gf128
+    from aes_bitslice import round_key_bits, keystream, encrypt_blocks
+
+    def setup(key: bytes, iv: bytes):
+        key_bits = round_key_bits(list(key))
+        iv_words = struct.unpack('>3I', iv)
+        h = int.from_bytes(encrypt_blocks(bytes(16), key_bits), 'big')
+        return (lambda counter, blocks: keystream(key_bits, iv_words, counter, blocks)), h
+    return _block_backend(setup, gf128.mul)
+
+def _load_reference():
+    from aes import aes128_reference
+    from ghash import gcm_gf_mult
+    from gcm_auxiliary import int_to_list, list_to_int
+
+    def setup(key: bytes, iv: bytes):
+        key = list(key)
+
+        def keystream(counter, blocks):
+            return b''.join(bytes(aes128_reference(list(iv) + list((c & 0xFFFFFFFF).to_bytes(4, 'big')), key))
+                            for c in range(counter, counter + blocks))
+        return keystream, list_to_int(aes128_reference([0] * 16, key))
+
+    def mul(x: int, y: int) -> int:
+        return list_to_int(gcm_gf_mult(int_to_list(x, 16), int_to_list(y, 16)))
+    return _block_backend(setup, mul)
+
+# --- Registry ---
+
+BACKENDS: Dict[str, Backend] = {}
+
+def register(backend: Backend):
+    """add a backend, after the ones already registered in order of preference"""
+    BACKENDS[backend.name] = backend
+
+register(Backend('pycryptodome', ['Crypto'], ['native'], 0, _load_pycryptodome))
+register(Backend('numpy', ['numpy'], ['batch', 'tables', 'streaming'], 2048, lambda: _load_gcm('numpy')))
+register(Backend('table', [], ['tables', 'streaming'], 0, lambda: _load_gcm('table')))
+register(Backend('bitslice', [], ['bitsliced'], 0, _load_bitslice))
+register(Backend('reference', [], ['reference'], 0, _load_reference))
+
+def get(name: str) -> Backend:
+    """the installed backend of that name, ValueError for an unknown or missing one"""
+    backend = BACKENDS.get(name)
+    if backend is None:
+        raise ValueError(f'Unknown backend {name!r}, expected one of {", ".join(BACKENDS)}')
+    if not backend.available():
+        raise ValueError(f'Backend {name!r} is not installed')
+    return backend
+
+def select(name: Optional[str]):
+    """force a backend by name (overriding AES_GCM_BACKEND), None restores the automatic choice"""
+    if name is not None:
+        get(name)
+    global _selected, _pending
+    _selected, _pending = name, None
+
+# Forced backend name, None for the automatic choice. AES_GCM_BACKEND is only
+# checked on first use: until it is, it waits in _pending, and a bad value
+# raises on every use rather than quietly turning NumPy off inside gcm
+_selected: Optional[str] = None
+_pending: Optional[str] = os.environ.get(ENV_VAR) or None
+
+def selected() -> Optional[str]:
+    """the forced backend name (from select() or AES_GCM_BACKEND), or None"""
+    if _pending is not None:
+        try:
+            select(_pending)
+        except ValueError as e:
+            raise ValueError(f'{ENV_VAR}: {e}') from None
+    return _selected
+
+def allows(name: str) -> bool:
+    """whether the backend may be used, i.e. nothing else is forced"""
+    forced = selected()
+    return forced is None or forced == name
+
+def available() -> List[str]:
+    """names of the backends whose modules are installed, in order of preference"""
+    return [name for name, backend in BACKENDS.items() if backend.available()]
+
+def choose(nbytes: int = 0, require: Iterable[str] = ()) -> Backend:
+    """
+    the forced backend, or the first available backend with every required
+    capability whose min_bytes is at most nbytes
+    """
+    require = frozenset(require)
+    forced = selected()
+    if forced is not None:
+        backend = get(forced)
+        if not require <= backend.capabilities:
+            raise ValueError(f'Backend {forced!r} lacks {", ".join(sorted(require - backend.capabilities))}')
+        return backend
+    for backend in BACKENDS.values():
+        if require <= backend.capabilities and nbytes >= backend.min_bytes and backend.available():
+            return backend
+    raise ValueError(f'No installed backend offers {", ".join(sorted(require))}')
+
+def encrypt(plaintext, key, iv, aad=b'', backend: str = None) -> Tuple[bytes, bytes]:
+    """
+    AES-128-GCM encryption on bytes-like objects with the chosen (or named) backend
+
+    return:
+        (ciphertext, MAC) as bytes
+    """
+    chosen = get(backend) if backend else choose(len(plaintext))
+    return chosen.encrypt(plaintext, key, iv, aad)
+
+def decrypt(ciphertext, key, iv, aad=b'', mac=b'', backend: str = None) -> Tuple[Optional[bytes], bool]:
+    """
+    AES-128-GCM decryption on bytes-like objects with the chosen (or named) backend
+
+    return:
+        (plaintext, is_valid), plaintext is None if the tag does not match
+    """
+    chosen = get(backend) if backend else choose(len(ciphertext))
+    return chosen.decrypt(ciphertext, key, iv, aad, mac)
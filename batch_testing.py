@@ -0,0 +1,32 @@
+# test_batch.py
+import random
+from gcm import gcm_encrypt, gcm_decrypt
+from gcm_batch import encrypt_many, decrypt_many
+
+rng = random.Random(8)
+keys = [rng.randbytes(16) for _ in range(3)]
+records = [(rng.choice(keys), rng.randbytes(12), rng.randbytes(rng.randrange(256)),
+            rng.randbytes(rng.randrange(32))) for _ in range(300)]
+
+results = encrypt_many(records)
+expected = [gcm_encrypt(plaintext, key, iv, aad) for key, iv, plaintext, aad in records]
+print(f"encrypt_many matches gcm_encrypt: {results == expected}")
+# Should output: encrypt_many matches gcm_encrypt: True
+
+encrypted = [(key, iv, ciphertext, aad, mac)
+             for (key, iv, _, aad), (ciphertext, mac) in zip(records, results)]
+encrypted[0] = encrypted[0][:4] + (bytes(16),)
+results = decrypt_many(encrypted)
+expected = [gcm_decrypt(ciphertext, key, iv, aad, mac) for key, iv, ciphertext, aad, mac in encrypted]
+print(f"decrypt_many matches gcm_decrypt: {results == expected and results[0] == (None, False)}")
+# Should output: decrypt_many matches gcm_decrypt: True
+
+# Tampered records in every key group are rejected, the others still decrypt
+for i in range(0, 300, 7):
+    key, iv, ciphertext, aad, mac = encrypted[i]
+    encrypted[i] = (key, iv, ciphertext, aad + b'x', mac)
+results = decrypt_many(encrypted)
+rejected = all(results[i] == (None, False) for i in range(0, 300, 7))
+accepted = all(results[i] == expected[i] for i in range(300) if i % 7)
+print(f"Tampered records rejected: {rejected}, others accepted: {accepted}")
+# Should output: Tampered records rejected: True, others accepted: True
@@ -0,0 +1,217 @@
+"""
+Throughput benchmarks with JSON regression baselines.
+
+    python benchmark.py                         # run everything, print a table
+    python benchmark.py --quick                 # messages up to 64 KiB only
+    python benchmark.py --save baseline.json    # store the results
+    python benchmark.py --compare baseline.json --tolerance 0.25
+                                                # exit 1 if any case is >25% slower
+    python benchmark.py --crossover             # bitsliced vs per-block AES by batch size
+
+Every case reports blocks/sec and MB/s (attack solvers report solves/sec).
+When pycryptodome is installed the GCM cases also show our speed as a
+fraction of its AES-GCM.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+SIZES = [16, 256, 4 << 10, 64 << 10, 1 << 20, 16 << 20]
+QUICK_SIZES = [16, 256, 4 << 10, 64 << 10]
+
+KEY = bytes.fromhex("feffe9928665731c6d6a8f9467308308")
+IV = bytes.fromhex("cafebabefacedbaddecaf888")
+AAD = bytes.fromhex("feedfacedeadbeeffeedfacedeadbeefabaddad2")
+
+
+def measure(fn: Callable[[], object], min_time: float) -> float:
+    """seconds per call: repeat fn until min_time has passed (at least once)"""
+    fn()  # warm up tables, caches and lazy imports
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while calls == 0 or elapsed < min_time:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+    return elapsed / calls
+
+
+def _primitive_cases(rng: random.Random) -> List[Tuple[str, int, Callable[[], object]]]:
+    from key_expansion import key_expansion
+    from aes import aes128
+    from ghash import gcm_gf_mult
+
+    key = list(KEY)
+    block = [rng.randrange(256) for _ in range(16)]
+    other = [rng.randrange(256) for _ in range(16)]
+    return [
+        ("key_expansion", 16, lambda: key_expansion(key)),
+        ("aes128", 16, lambda: aes128(block, key)),
+        ("gcm_gf_mult", 16, lambda: gcm_gf_mult(block, other)),
+    ]
+
+
+def _gcm_cases(rng: random.Random, sizes: List[int]) -> List[Tuple[str, int, Callable[[], object]]]:
+    from gcm import aes_gcm_encrypt, aes_gcm_decrypt, gcm_encrypt, gcm_decrypt
+
+    cases = []
+    for size in sizes:
+        data = rng.randbytes(size)
+        ciphertext, mac = gcm_encrypt(data, KEY, IV, AAD)
+        cases.append((f"gcm_encrypt/{size}", size,
+                      lambda d=data: gcm_encrypt(d, KEY, IV, AAD)))
+        cases.append((f"gcm_decrypt/{size}", size,
+                      lambda c=ciphertext, m=mac: gcm_decrypt(c, KEY, IV, AAD, m)))
+        # List[int] API, includes the list conversions its callers pay; aes_gcm_decrypt
+        # decodes UTF-8, so these cases use printable ASCII text
+        text = bytes(32 + b % 95 for b in data)
+        text_list = list(text)
+        ciphertext_list, mac_list = map(list, gcm_encrypt(text, KEY, IV, AAD))
+        cases.append((f"aes_gcm_encrypt/{size}", size,
+                      lambda d=text_list: aes_gcm_encrypt(d, list(KEY), list(IV), list(AAD))))
+        cases.append((f"aes_gcm_decrypt/{size}", size,
+                      lambda c=ciphertext_list, m=mac_list: aes_gcm_decrypt(c, list(KEY), list(IV), list(AAD), m)))
+    return cases
+
+
+def _solver_cases(rng: random.Random) -> List[Tuple[str, int, Callable[[], object]]]:
+    from attack_auxiliary import gf_inverse, gf_sqrt, solve_quadratic_gf2_128
+
+    a = [rng.randrange(256) for _ in range(16)]
+    b = [rng.randrange(256) for _ in range(16)]
+    c = [rng.randrange(256) for _ in range(16)]
+    # size 0: reported per solve, not per byte
+    return [
+        ("gf_inverse", 0, lambda: gf_inverse(a)),
+        ("gf_sqrt", 0, lambda: gf_sqrt(a)),
+        ("solve_quadratic_gf2_128", 0, lambda: solve_quadratic_gf2_128(a, b, c)),
+    ]
+
+
+def _pycryptodome_rates(sizes: List[int], rng: random.Random, min_time: float) -> Dict[int, float]:
+    """MB/s of pycryptodome AES-GCM per size, empty if it is not installed"""
+    try:
+        from Crypto.Cipher import AES
+    except ImportError:
+        return {}
+    rates = {}
+    for size in sizes:
+        data = rng.randbytes(size)
+
+        def run(d=data):
+            cipher = AES.new(KEY, AES.MODE_GCM, nonce=IV)
+            cipher.update(AAD)
+            return cipher.encrypt_and_digest(d)
+        rates[size] = size / measure(run, min_time) / 1e6
+    return rates
+
+
+def run(sizes: List[int], min_time: float, only: str = None) -> Dict[str, dict]:
+    rng = random.Random(2024)
+    cases = _primitive_cases(rng) + _gcm_cases(rng, sizes) + _solver_cases(rng)
+    results = {}
+    for name, size, fn in cases:
+        if only and only not in name:
+            continue
+        seconds = measure(fn, min_time)
+        entry = {"seconds": seconds, "ops_per_sec": 1 / seconds}
+        if size:
+            entry["blocks_per_sec"] = (size + 15) // 16 / seconds
+            entry["mb_per_sec"] = size / seconds / 1e6
+        results[name] = entry
+        print(_format(name, entry), flush=True)
+    reference = _pycryptodome_rates(sizes, rng, min_time) if not only or "gcm" in only else {}
+    for size, rate in reference.items():
+        entry = results.get(f"gcm_encrypt/{size}")
+        if entry:
+            entry["pycryptodome_ratio"] = entry["mb_per_sec"] / rate
+            print(f"{'vs pycryptodome/' + str(size):<32} {entry['pycryptodome_ratio']:>12.5f}x")
+    return results
+
+
+def crossover(batches: List[int], min_time: float) -> List[Tuple[int, float, float]]:
+    """
+    CTR keystream time per block of the bitsliced engine against the per-block
+    T-table engine, for each batch size; returns (blocks, bitsliced us, T-table us).
+    """
+    import struct
+    from t_table import round_key_words, encrypt_words
+    from aes_bitslice import round_key_bits, keystream
+
+    rk = round_key_words(KEY)
+    key_bits = round_key_bits(KEY)
+    iv_words = struct.unpack('>3I', IV)
+    rows = []
+    print(f"{'blocks':>8} {'bitsliced us/block':>20} {'T-table us/block':>18}")
+    for n in batches:
+        sliced = measure(lambda: keystream(key_bits, iv_words, 2, n), min_time) / n * 1e6
+        per_block = measure(lambda: [encrypt_words(*iv_words, c, rk) for c in range(2, n + 2)], min_time) / n * 1e6
+        rows.append((n, sliced, per_block))
+        marker = "  <- bitsliced faster" if sliced < per_block else ""
+        print(f"{n:>8} {sliced:>20.2f} {per_block:>18.2f}{marker}", flush=True)
+    return rows
+
+
+def _format(name: str, entry: dict) -> str:
+    if "mb_per_sec" in entry:
+        return f"{name:<32} {entry['blocks_per_sec']:>14.0f} blocks/s {entry['mb_per_sec']:>10.3f} MB/s"
+    return f"{name:<32} {entry['ops_per_sec']:>14.2f} solves/s"
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """names of cases slower than baseline by more than tolerance (a fraction)"""
+    regressions = []
+    for name, entry in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        ratio = entry["ops_per_sec"] / base["ops_per_sec"]
+        if ratio < 1 - tolerance:
+            regressions.append(f"{name}: {ratio:.2f}x of baseline")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quick', action='store_true', help='message sizes up to 64 KiB only')
+    parser.add_argument('--sizes', type=lambda s: [int(x) for x in s.split(',')],
+                        help='comma separated message sizes in bytes')
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds to repeat each case')
+    parser.add_argument('--only', help='run only cases whose name contains this text')
+    parser.add_argument('--crossover', action='store_true',
+                        help='only compare bitsliced and per-block AES over batch sizes')
+    parser.add_argument('--save', help='write results to this JSON baseline')
+    parser.add_argument('--compare', help='JSON baseline to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed slowdown against the baseline (fraction)')
+    args = parser.parse_args(argv)
+
+    if args.crossover:
+        crossover([1, 16, 64, 256, 1024, 4096, 16384], args.min_time)
+        return 0
+    sizes = args.sizes or (QUICK_SIZES if args.quick else SIZES)
+    results = run(sizes, args.min_time, args.only)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "cpus": os.cpu_count(), "results": results}, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("REGRESSIONS:", *regressions, sep="\n  ")
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,231 @@
+"""
+Conformance runner for GCM test vectors in the NIST CAVP .rsp format.
+
+    python cavp_runner.py gcmEncryptExtIV128.rsp gcmDecrypt128.rsp [--workers N] [--backend NAME]
+
+Files are streamed: [Keylen = ...] style headers set the parameters of the
+vectors that follow, each vector is a block of "Name = hex" lines starting
+with Count, and a FAIL line marks a vector whose tag must be rejected.
+
+Every vector is checked in both directions:
+
+- encryption of PT gives CT and Tag (truncated to Taglen)
+- decryption of CT with Tag gives PT, and with one tag bit flipped is rejected
+- FAIL vectors are rejected by decryption
+
+By default the checks go through gcm.aes_gcm_encrypt and gcm.gcm_decrypt (the
+bytes function behind aes_gcm_decrypt, which decodes its output as UTF-8);
+--backend checks one of backends.BACKENDS instead. Tags shorter than 128 bits
+cannot be passed to decryption, which verifies full tags, so for those the
+full tag of CT is recomputed by encryption and its prefix compared. Key sizes
+other than 128 bits and IVs other than 96 bits are counted as skipped.
+
+Vectors are checked on a process pool in batches and the run reports
+pass / fail / skip counts with vectors per second.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+VECTORS_PER_TASK = 256
+
+class Vector(NamedTuple):
+    source: str         # "file:line" of the Count line
+    params: Dict[str, str]
+    key: bytes
+    iv: bytes
+    plaintext: Optional[bytes]
+    aad: bytes
+    ciphertext: bytes
+    tag: bytes
+    fail: bool
+
+# --- Parsing ---
+
+def _vector(source: str, params: Dict[str, str], fields: Dict[str, str], fail: bool) -> Vector:
+    plaintext = fields.get("PT")
+    return Vector(source, params, bytes.fromhex(fields["Key"]), bytes.fromhex(fields["IV"]),
+                  None if plaintext is None else bytes.fromhex(plaintext), bytes.fromhex(fields.get("AAD", "")),
+                  bytes.fromhex(fields.get("CT", "")), bytes.fromhex(fields["Tag"]), fail)
+
+def parse_rsp(lines: Iterable[str], name: str = '<rsp>') -> Iterator[Vector]:
+    """vectors of a .rsp file, read line by line"""
+    params: Dict[str, str] = {}
+    fields: Dict[str, str] = {}
+    fail = False
+    source = None
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if line.startswith('['):
+            # A new section ends the previous vector
+            if source is not None:
+                yield _vector(source, params, fields, fail)
+                source = None
+            if line.endswith(']') and '=' in line:
+                k, v = line[1:-1].split('=', 1)
+                params = dict(params, **{k.strip(): v.strip()})
+            continue
+        if line == 'FAIL':
+            fail = True
+            continue
+        if '=' not in line:
+            continue
+        k, v = (s.strip() for s in line.split('=', 1))
+        if k == 'Count':
+            if source is not None:
+                yield _vector(source, params, fields, fail)
+            source, fields, fail = f'{name}:{number}', {}, False
+        fields[k] = v
+    if source is not None:
+        yield _vector(source, params, fields, fail)
+
+def write_rsp(vectors: Iterable[Vector], f: TextIO):
+    """write vectors in the .rsp format, one section per vector"""
+    for i, v in enumerate(vectors):
+        f.write(f"[Keylen = {len(v.key) * 8}]\n[IVlen = {len(v.iv) * 8}]\n"
+                f"[PTlen = {len(v.ciphertext) * 8}]\n[AADlen = {len(v.aad) * 8}]\n[Taglen = {len(v.tag) * 8}]\n\n")
+        f.write(f"Count = {i}\nKey = {v.key.hex()}\nIV = {v.iv.hex()}\n")
+        if v.plaintext is not None:
+            f.write(f"PT = {v.plaintext.hex()}\n")
+        f.write(f"AAD = {v.aad.hex()}\nCT = {v.ciphertext.hex()}\nTag = {v.tag.hex()}\n")
+        f.write("FAIL\n\n" if v.fail else "\n")
+
+# --- Checking ---
+
+def _functions(backend: Optional[str]) -> Tuple[Callable, Callable]:
+    """(encrypt, decrypt) on bytes for the backend, or the gcm functions"""
+    if backend is not None:
+        import backends
+        chosen = backends.get(backend)
+        return chosen.encrypt, chosen.decrypt
+    from gcm import aes_gcm_encrypt, gcm_decrypt
+
+    def encrypt(plaintext, key, iv, aad=b''):
+        ciphertext, mac = aes_gcm_encrypt(list(plaintext), list(key), list(iv), list(aad))
+        return bytes(ciphertext), bytes(mac)
+    return encrypt, gcm_decrypt
+
+def check_vector(vector: Vector, encrypt: Callable, decrypt: Callable) -> Optional[str]:
+    """None if the vector passes, "skip" if it is unsupported, otherwise what went wrong"""
+    v = vector
+    if len(v.key) != 16 or len(v.iv) != 12:
+        return "skip"
+    if len(v.tag) < 16:
+        # Recover the plaintext by running CTR over CT, then the full tag of CT
+        plaintext, _ = encrypt(v.ciphertext, v.key, v.iv, v.aad)
+        ciphertext, mac = encrypt(plaintext, v.key, v.iv, v.aad)
+        valid = mac[:len(v.tag)] == v.tag
+        if v.fail:
+            return "truncated tag accepted" if valid else None
+        if not valid:
+            return "truncated tag mismatch"
+        if v.plaintext is not None and plaintext != v.plaintext:
+            return "plaintext mismatch"
+        return None
+    if v.fail:
+        result = decrypt(v.ciphertext, v.key, v.iv, v.aad, v.tag)
+        return "invalid tag accepted" if result != (None, False) else None
+    if v.plaintext is not None:
+        ciphertext, mac = encrypt(v.plaintext, v.key, v.iv, v.aad)
+        if ciphertext != v.ciphertext:
+            return "ciphertext mismatch"
+        if mac != v.tag:
+            return "tag mismatch"
+    plaintext, is_valid = decrypt(v.ciphertext, v.key, v.iv, v.aad, v.tag)
+    if not is_valid:
+        return "valid tag rejected"
+    if v.plaintext is not None and plaintext != v.plaintext:
+        return "plaintext mismatch"
+    flipped = v.tag[:-1] + bytes([v.tag[-1] ^ 1])
+    if decrypt(v.ciphertext, v.key, v.iv, v.aad, flipped) != (None, False):
+        return "flipped tag accepted"
+    return None
+
+def _check_batch(vectors: List[Vector], backend: Optional[str]) -> List[Tuple[str, Optional[str]]]:
+    """worker: (source, check result) per vector"""
+    encrypt, decrypt = _functions(backend)
+    return [(v.source, check_vector(v, encrypt, decrypt)) for v in vectors]
+
+def check_vectors(vectors: Iterable[Vector], workers: int = None, backend: str = None, executor: Executor = None,
+                  vectors_per_task: int = VECTORS_PER_TASK) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    (source, check result) for every vector, in completion order, on a process
+    pool of workers processes (default: all CPUs) or executor; workers=1 without
+    an executor runs serially. vectors is consumed lazily.
+    """
+    workers = workers or os.cpu_count() or 1
+    vectors = iter(vectors)
+    if workers == 1 and executor is None:
+        while True:
+            batch = list(islice(vectors, vectors_per_task))
+            if not batch:
+                return
+            yield from _check_batch(batch, backend)
+    pool = executor or ProcessPoolExecutor(max_workers=workers)
+    try:
+        pending = set()
+        while True:
+            while len(pending) < 2 * workers:
+                batch = list(islice(vectors, vectors_per_task))
+                if not batch:
+                    break
+                pending.add(pool.submit(_check_batch, batch, backend))
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+    finally:
+        if executor is None:
+            pool.shutdown(cancel_futures=True)
+
+def read_vectors(paths: Iterable[str]) -> Iterator[Vector]:
+    for path in paths:
+        with open(path, 'r') as f:
+            yield from parse_rsp(f, os.path.basename(path))
+
+def run(paths: Iterable[str], workers: int = None, backend: str = None) -> dict:
+    """check every vector of the files, returns counts, failures and throughput"""
+    start = time.perf_counter()
+    passed = skipped = 0
+    failures = []
+    for source, result in check_vectors(read_vectors(paths), workers, backend):
+        if result is None:
+            passed += 1
+        elif result == "skip":
+            skipped += 1
+        else:
+            failures.append((source, result))
+    seconds = time.perf_counter() - start
+    checked = passed + len(failures)
+    return {"vectors": checked + skipped, "passed": passed, "failed": len(failures), "skipped": skipped,
+            "failures": sorted(failures), "seconds": seconds,
+            "vectors_per_second": checked / seconds if seconds > 0 else float('inf')}
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Check AES-GCM against CAVP .rsp test vectors')
+    parser.add_argument('files', nargs='+', help='.rsp vector files')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='processes (1 = serial)')
+    parser.add_argument('--backend', help='backend from backends.py (default: the gcm module functions)')
+    args = parser.parse_args(argv)
+    if args.backend:
+        import backends
+        if args.backend not in backends.available():
+            parser.error(f'backend must be one of {", ".join(backends.available())}')
+
+    report = run(args.files, max(args.workers, 1), args.backend)
+    for source, reason in report["failures"]:
+        print(f"FAIL {source}: {reason}")
+    print(f"{report['vectors']} vectors: {report['passed']} passed, {report['failed']} failed, "
+          f"{report['skipped']} skipped in {report['seconds']:.3f} s "
+          f"({report['vectors_per_second']:.0f} vectors/s)")
+    return 1 if report["failed"] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,49 @@
+# test_cavp_runner.py
+import os
+import random
+import tempfile
+import backends
+from cavp_runner import Vector, check_vectors, parse_rsp, run, write_rsp
+
+def cavp_test():
+    # The McGrew-Viega sample: every supported vector passes, the 64-bit IV one is skipped
+    report = run(["gcm_sample_vectors.rsp"], workers=1)
+    print(f"Sample vectors: {report['passed']} passed, {report['failed']} failed, {report['skipped']} skipped")
+    # Should output: Sample vectors: 7 passed, 0 failed, 1 skipped
+
+    # A wrong CT or a FAIL vector that should have passed is reported
+    with open("gcm_sample_vectors.rsp") as f:
+        vectors = list(parse_rsp(f))
+    bad = vectors[3]._replace(ciphertext=bytes([vectors[3].ciphertext[0] ^ 1]) + vectors[3].ciphertext[1:])
+    wrong_fail = vectors[0]._replace(fail=True)
+    results = [r for _, r in check_vectors([bad, wrong_fail], workers=1)]
+    print(f"Mismatches detected: {results}")
+    # Should output: Mismatches detected: ['ciphertext mismatch', 'invalid tag accepted']
+
+    # Thousands of vectors made by the bitsliced engine, a third of them with a bad tag
+    rng = random.Random(24)
+    bitslice = backends.BACKENDS["bitslice"]
+    generated = []
+    for i in range(600):
+        key, iv = rng.randbytes(16), rng.randbytes(12)
+        plaintext, aad = rng.randbytes(rng.randrange(48)), rng.randbytes(rng.randrange(24))
+        ciphertext, tag = bitslice.encrypt(plaintext, key, iv, aad)
+        if i % 3 == 2:
+            generated.append(Vector("", {}, key, iv, None, aad, ciphertext, bytes([tag[0] ^ 0x80]) + tag[1:], True))
+        else:
+            tag = tag[:rng.choice([12, 16, 16])]
+            generated.append(Vector("", {}, key, iv, plaintext, aad, ciphertext, tag, False))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "generated.rsp")
+        with open(path, "w") as f:
+            write_rsp(generated * 5, f)
+        serial = run([path], workers=1)
+        parallel = run([path], workers=4)
+    print(f"Generated vectors: {parallel['vectors']}, all pass {parallel['failed'] == 0 and parallel['passed'] == 3000}, "
+          f"parallel matches serial {parallel['passed'] == serial['passed']}")
+    # Should output: Generated vectors: 3000, all pass True, parallel matches serial True
+    print(f"Throughput: serial {serial['vectors_per_second']:.0f} vectors/s, "
+          f"4 workers {parallel['vectors_per_second']:.0f} vectors/s")
+
+if __name__ == "__main__":
+    cavp_test()
@@ -0,0 +1,93 @@
+# test_cli.py
+import os
+import random
+import tempfile
+import gcm
+from aes_gcm import HEADER, decrypt_file, encrypt_file, main
+
+key = bytes.fromhex("feffe9928665731c6d6a8f9467308308")
+rng = random.Random(10)
+
+with tempfile.TemporaryDirectory() as tmp:
+    src, enc, dst = (os.path.join(tmp, name) for name in ("input", "input.agcm", "output"))
+
+    def write(path, data):
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    def read(path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    # Round trip across chunk boundaries, with and without AAD
+    match = True
+    for size, chunk_bytes, aad in ((1, 16, b''), (100, 16, b'header'), (5000, 64, b''), (70000, 1 << 20, b'x' * 33)):
+        plaintext = rng.randbytes(size)
+        write(src, plaintext)
+        match &= encrypt_file(key, src, enc, aad, chunk_bytes=chunk_bytes) == size
+        match &= os.path.getsize(enc) == HEADER.size + len(aad) + size
+        match &= decrypt_file(key, enc, dst, chunk_bytes=chunk_bytes) == size and read(dst) == plaintext
+    print(f"Round trip: {match}")
+    # Should output: Round trip: True
+
+    # The command line gives the same result
+    write(src, b"The quick brown fox")
+    encrypted = main(['encrypt', '--key', key.hex(), '--aad', 'meta', src, enc])
+    decrypted = main(['decrypt', '--key', key.hex(), enc, dst])
+    print(f"Command line: {encrypted == decrypted == 0 and read(dst) == b'The quick brown fox'}")
+    # Should output: Command line: True
+
+    # An empty input still carries a header and a tag
+    write(src, b'')
+    n = encrypt_file(key, src, enc)
+    print(f"Empty input: {n == 0 and os.path.getsize(enc) == HEADER.size}, "
+          f"{decrypt_file(key, enc, dst) == 0 and read(dst) == b''}")
+    # Should output: Empty input: True, True
+
+    # A tampered file is rejected and leaves neither OUTPUT nor OUTPUT.part
+    write(src, rng.randbytes(1000))
+    encrypt_file(key, src, enc, chunk_bytes=64)
+    os.remove(dst)
+    for offset in (HEADER.size + 500, 20):    # ciphertext byte, then IV byte
+        data = bytearray(read(enc))
+        data[offset] ^= 1
+        write(enc + '.bad', data)
+        rejected = decrypt_file(key, enc + '.bad', dst, chunk_bytes=64) == -1
+        print(f"Tampered rejected: {rejected}, no output: {not os.path.exists(dst) and not os.path.exists(dst + '.part')}")
+    # Should output: Tampered rejected: True, no output: True
+    # Should output: Tampered rejected: True, no output: True
+    print(f"Wrong key rejected: {decrypt_file(bytes(16), enc, dst) == -1 and not os.path.exists(dst)}")
+    # Should output: Wrong key rejected: True
+
+    # Inputs too short or without the magic number exit with an error
+    for data in (b'', b'AGCM', read(enc)[:HEADER.size - 1], b'XXXX' + read(enc)[4:]):
+        write(enc + '.bad', data)
+        try:
+            decrypt_file(key, enc + '.bad', dst)
+            exited = False
+        except SystemExit as e:
+            exited = str(e).startswith('error:')
+        print(f"Bad header exits: {exited}, no output: {not os.path.exists(dst + '.part')}")
+    # Should output: Bad header exits: True, no output: True
+    # Should output: Bad header exits: True, no output: True
+    # Should output: Bad header exits: True, no output: True
+    # Should output: Bad header exits: True, no output: True
+
+    # An error while decrypting removes OUTPUT.part and reaches the caller
+    update = gcm.GCMDecryptor.update
+    calls = []
+    def failing_update(self, chunk):
+        calls.append(len(chunk))
+        if len(calls) == 3:
+            raise RuntimeError("update failed")
+        return update(self, chunk)
+    gcm.GCMDecryptor.update = failing_update
+    try:
+        decrypt_file(key, enc, dst, chunk_bytes=64)
+        error = None
+    except RuntimeError as e:
+        error = str(e)
+    finally:
+        gcm.GCMDecryptor.update = update
+    print(f"Error raised: {error == 'update failed'}, no output: {not os.path.exists(dst) and not os.path.exists(dst + '.part')}")
+    # Should output: Error raised: True, no output: True
@@ -1,11 +1,502 @@
-from typing import List, Tuple
-from aes import aes128
-from gcm_auxiliary import int_to_list, xor_bytes, pad_16, inc32
-from ghash import gcm_gf_mult
+import struct
+from typing import List, Optional, Tuple
+from t_table import round_key_words, encrypt_words, encrypt_bytes
+from gcm_auxiliary import as_buffer, tags_equal, wipe
+from ghash import GHashTable, GHashPowers, _list_nbytes, _zero
+import instrumentation
+from instrumentation import stage
+import backends
+from key_cache import KeyCache
+
+_BLOCK = struct.Struct('>4I')
+
+# Messages of at least this many bytes use the NumPy batch engine (aes_numpy)
+# when NumPy is installed; below it the per-block overhead of NumPy dominates
+NUMPY_MIN_BYTES = 2048
+
+# Chunk size (a multiple of 16) of the single-pass GHASH + CTR decryption
+DECRYPT_CHUNK_BYTES = 1 << 16
+
+# Chunk size (a multiple of 16) of encrypt_into / decrypt_into, the unit of
+# their temporary allocations
+INTO_CHUNK_BYTES = 1 << 14
+
+_batch_engine = False   # not probed yet
+
+def _load_batch_engine():
+    """the aes_numpy module, or None when NumPy is not installed (imported on first use)"""
+    global _batch_engine
+    if _batch_engine is False:
+        try:
+            import aes_numpy
+        except ImportError:
+            aes_numpy = None
+        _batch_engine = aes_numpy
+    return _batch_engine
+
+def batch_engine():
+    """
+    the aes_numpy module, or None when NumPy is not installed or another
+    backend is forced (imported on first use)
+    """
+    if not backends.allows('numpy'):
+        return None
+    return _load_batch_engine()
+
+ENGINES = ('auto', 'table', 'numpy')
+
+class AESGCM:
+    """
+    AES-128-GCM cipher context bound to one key.
+
+    The round keys, the hash subkey H and the GHASH tables for H are derived
+    once in the constructor and reused by every encrypt / decrypt call.
+    table_bits selects 4-bit (small) or 8-bit (fast) GHASH tables; aggregate = 4
+    or 8 uses GHashPowers instead, reducing once per group of that many blocks.
+    engine 'table' never uses the NumPy batch engine, 'numpy' always uses it
+    for large enough runs, 'auto' uses it unless backends has another backend
+    forced (the only effect of a forced backend here).
+
+    Inputs may be any bytes-like object (bytes, bytearray, memoryview) or a
+    list of ints; outputs are bytes, or written into caller-owned buffers by
+    encrypt_into / decrypt_into.
+    """
+
+    def __init__(self, key, table_bits: int = 8, aggregate: int = 0, engine: str = 'auto'):
+        key = as_buffer(key)
+        assert len(key) == 16, 'AES-128 key must be 16 bytes'
+        if engine not in ENGINES:
+            raise ValueError(f'Unknown engine {engine!r}, expected one of {", ".join(ENGINES)}')
+        if engine == 'numpy' and _load_batch_engine() is None:
+            raise ValueError('The numpy engine needs NumPy, which is not installed')
+        if engine == 'auto':
+            # A bad AES_GCM_BACKEND is reported by the first context that follows it
+            backends.selected()
+        self.engine = engine
+        with stage('key_setup'):
+            self.round_keys = round_key_words(key)
+            self.h = self._encrypt_block(bytes(16))
+            if aggregate:
+                self.ghash_table = GHashPowers(self.h, aggregate)
+            else:
+                self.ghash_table = GHashTable(self.h, table_bits)
+
+    def _batch(self):
+        """the batch engine module for this context, or None"""
+        if self.engine == 'auto':
+            return batch_engine()
+        return _load_batch_engine() if self.engine == 'numpy' else None
+
+    def nbytes(self) -> int:
+        """approximate memory of the derived key material"""
+        return _list_nbytes(self.round_keys) + self.ghash_table.nbytes()
+
+    def wipe(self):
+        """overwrite the round keys, H and the GHASH tables; the context is unusable afterwards"""
+        _zero(self.round_keys)
+        self.h = 0
+        self.ghash_table.wipe()
+
+    def _encrypt_block(self, block: bytes) -> int:
+        """E(block) as an integer, for H = E(0) and the tag mask E(J0)"""
+        if instrumentation.ENABLED:
+            instrumentation.count_aes()
+        return int.from_bytes(encrypt_bytes(block, self.round_keys), 'big')
+
+    def _keystream(self, iv_words: Tuple[int, int, int], counter: int, blocks: int) -> bytes:
+        """E(IV || counter), E(IV || counter + 1), ... for the given number of blocks"""
+        rk = self.round_keys
+        if instrumentation.ENABLED:
+            instrumentation.count_aes(blocks)
+        if blocks * 16 >= NUMPY_MIN_BYTES and self._batch() is not None:
+            return self._batch().keystream(rk, iv_words, counter, blocks).tobytes()
+        w0, w1, w2 = iv_words
+        pack = _BLOCK.pack
+        # The last 32 bits of the counter block wrap around
+        return b''.join([pack(*encrypt_words(w0, w1, w2, c & 0xFFFFFFFF, rk))
+                         for c in range(counter, counter + blocks)])
+
+    def _ctr(self, iv: memoryview, data: memoryview, counter: int = 2) -> bytes:
+        """CTR mode from counter block IV || counter (2 is inc32(J0)), used for both directions"""
+        n = len(data)
+        if n == 0:
+            return b''
+        iv_words = struct.unpack('>3I', iv)
+        if n >= NUMPY_MIN_BYTES and self._batch() is not None:
+            if instrumentation.ENABLED:
+                instrumentation.count_aes((n + 15) // 16)
+            # Whole batch of counter blocks and the XOR vectorized
+            return self._batch().ctr_xor(self.round_keys, iv_words, counter, data)
+        # Counter blocks J0 + 1, J0 + 2, ...
+        keystream = self._keystream(iv_words, counter, (n + 15) // 16)
+        # XOR data with keystream in one big-integer operation
+        result = int.from_bytes(data, 'big') ^ int.from_bytes(keystream[:n], 'big')
+        return result.to_bytes(n, 'big')
+
+    def _ctr_into(self, out: memoryview, iv: memoryview, data: memoryview, counter: int):
+        """_ctr written into out (len(data) bytes, may be data itself)"""
+        n = len(data)
+        if n >= NUMPY_MIN_BYTES and self._batch() is not None:
+            if instrumentation.ENABLED:
+                instrumentation.count_aes((n + 15) // 16)
+            self._batch().ctr_xor(self.round_keys, struct.unpack('>3I', iv), counter, data, out)
+        else:
+            out[:] = self._ctr(iv, data, counter)
+
+    def _finish_tag(self, X: int, iv: memoryview, aad_len: int, text_len: int, E_J0: int = None) -> bytes:
+        """length block and E(J0) mask on top of the GHASH state X (E_J0 when already computed)"""
+        # Incorporate lengths of AAD and Ciphertext into GHASH(64 bits/8 bytes for each)
+        len_block = ((aad_len * 8) << 64) | (text_len * 8)
+        with stage('tag'):
+            X = self.ghash_table.mult(X ^ len_block)
+            # Derive the final MAC tag by XORing GHASH output with E(J0)
+            if E_J0 is None:
+                E_J0 = self._encrypt_block(bytes(iv) + b'\x00\x00\x00\x01')
+            return (X ^ E_J0).to_bytes(16, 'big')
+
+    def _tag(self, iv: memoryview, aad: memoryview, ciphertext) -> bytes:
+        """GHASH over AAD and ciphertext, masked with E(J0)"""
+        ghash = self.ghash_table.ghash
+        # Incorporate AAD and Ciphertext into GHASH
+        with stage('ghash'):
+            X = ghash(ghash(0, aad), ciphertext)
+        return self._finish_tag(X, iv, len(aad), len(ciphertext))
+
+    def encrypt(self, iv, plaintext, aad=b'') -> Tuple[bytes, bytes]:
+        """
+        param:
+            iv: (bytes-like)
+            plaintext: (bytes-like)
+            aad: (bytes-like): Optional, Additional Authenticated Data (AAD).
+
+        return:
+            (ciphertext, MAC)
+        """
+        iv = as_buffer(iv)
+        assert len(iv) == 12, 'IV must be 12 bytes in this standard implementation'
+        plaintext = as_buffer(plaintext)
+        if instrumentation.ENABLED:
+            instrumentation.count('bytes_encrypted', len(plaintext))
+        with stage('ctr'):
+            ciphertext = self._ctr(iv, plaintext)
+        mac = self._tag(iv, as_buffer(aad), ciphertext)
+        return ciphertext, mac
+
+    def decrypt(self, iv, ciphertext, aad=b'', mac=b'') -> Tuple[Optional[bytearray], bool]:
+        """
+        param:
+            iv: (bytes-like)
+            ciphertext: (bytes-like)
+            aad: (bytes-like): Optional, Additional Authenticated Data (AAD).
+            mac: (bytes-like): The authentication tag to verify against.
+
+        return:
+            (plaintext, is_valid), plaintext is the buffer the ciphertext was
+            decrypted into (a bytearray, not copied), or None if the tag does
+            not match (the buffer is wiped)
+        """
+        iv = as_buffer(iv)
+        assert len(iv) == 12, 'IV must be 12 bytes in this standard implementation'
+        ciphertext = as_buffer(ciphertext)
+        aad = as_buffer(aad)
+        n = len(ciphertext)
+        ghash = self.ghash_table.ghash
+        if instrumentation.ENABLED:
+            instrumentation.count('bytes_decrypted', n)
+
+        # Single pass: every chunk is hashed and decrypted while it is in cache,
+        # the plaintext goes to a scratch buffer that is only released if the tag matches
+        with stage('ghash'):
+            X = ghash(0, aad)
+        scratch = bytearray(n)
+        with memoryview(scratch) as out:
+            step = DECRYPT_CHUNK_BYTES
+            for start in range(0, n, step):
+                chunk = ciphertext[start:start + step]
+                with stage('ghash'):
+                    X = ghash(X, chunk)
+                with stage('ctr'):
+                    self._ctr_into(out[start:start + len(chunk)], iv, chunk, 2 + start // 16)
+
+        # Compare computed MAC with provided MAC in constant time
+        is_valid = tags_equal(self._finish_tag(X, iv, len(aad), n), mac)
+        if not is_valid:
+            wipe(scratch)
+            return None, False
+        return scratch, True
+
+    @staticmethod
+    def _into_buffers(out, data, slot) -> Tuple[memoryview, memoryview, memoryview]:
+        out, data, slot = as_buffer(out), as_buffer(data), as_buffer(slot)
+        assert not out.readonly and len(out) >= len(data), 'out must be a writable buffer at least as long as the input'
+        assert len(slot) == 16, 'The tag must be 16 bytes'
+        return out[:len(data)], data, slot
+
+    def encrypt_into(self, out, iv, plaintext, tag, aad=b'') -> int:
+        """
+        Encrypt into caller-owned buffers, chunk by chunk, with no per-block
+        buffer allocation.
+
+        param:
+            out: (writable bytes-like): receives the ciphertext, at least len(plaintext)
+                bytes; may be plaintext itself for in-place encryption (other overlaps
+                are not supported)
+            iv: (bytes-like)
+            plaintext: (bytes-like)
+            tag: (writable bytes-like): 16-byte slot that receives the MAC
+            aad: (bytes-like): Optional, Additional Authenticated Data (AAD).
+
+        return:
+            number of bytes written to out
+        """
+        iv = as_buffer(iv)
+        assert len(iv) == 12, 'IV must be 12 bytes in this standard implementation'
+        out, plaintext, tag = self._into_buffers(out, plaintext, tag)
+        assert not tag.readonly, 'The tag slot must be writable'
+        aad = as_buffer(aad)
+        n = len(plaintext)
+        ghash = self.ghash_table.ghash
+        if instrumentation.ENABLED:
+            instrumentation.count('bytes_encrypted', n)
+        with stage('ghash'):
+            X = ghash(0, aad)
+        step = INTO_CHUNK_BYTES
+        for start in range(0, n, step):
+            end = min(start + step, n)
+            with stage('ctr'):
+                self._ctr_into(out[start:end], iv, plaintext[start:end], 2 + start // 16)
+            # The ciphertext is hashed from out while it is still in cache
+            with stage('ghash'):
+                X = ghash(X, out[start:end])
+        tag[:] = self._finish_tag(X, iv, len(aad), n)
+        return n
+
+    def decrypt_into(self, out, iv, ciphertext, mac, aad=b'') -> bool:
+        """
+        Verify the tag, then decrypt into a caller-owned buffer. out is only
+        written when the tag matches, so a rejected in-place decryption leaves
+        the ciphertext as it was.
+
+        param:
+            out: (writable bytes-like): receives the plaintext, at least len(ciphertext)
+                bytes; may be ciphertext itself (other overlaps are not supported)
+            iv: (bytes-like)
+            ciphertext: (bytes-like)
+            mac: (bytes-like): The 16-byte authentication tag to verify against.
+            aad: (bytes-like): Optional, Additional Authenticated Data (AAD).
+
+        return:
+            is_valid
+        """
+        iv = as_buffer(iv)
+        assert len(iv) == 12, 'IV must be 12 bytes in this standard implementation'
+        out, ciphertext, mac = self._into_buffers(out, ciphertext, mac)
+        aad = as_buffer(aad)
+        n = len(ciphertext)
+        ghash = self.ghash_table.ghash
+        if instrumentation.ENABLED:
+            instrumentation.count('bytes_decrypted', n)
+        with stage('ghash'):
+            X = ghash(ghash(0, aad), ciphertext)
+        if not tags_equal(self._finish_tag(X, iv, len(aad), n), mac):
+            return False
+        step = INTO_CHUNK_BYTES
+        for start in range(0, n, step):
+            end = min(start + step, n)
+            with stage('ctr'):
+                self._ctr_into(out[start:end], iv, ciphertext[start:end], 2 + start // 16)
+        return True
+
+    def encryptor(self, iv) -> 'GCMEncryptor':
+        """start an incremental encryption with the given IV"""
+        return GCMEncryptor(self, iv)
+
+    def decryptor(self, iv) -> 'GCMDecryptor':
+        """start an incremental decryption with the given IV"""
+        return GCMDecryptor(self, iv)
+
+class _GCMStream:
+    """
+    Incremental GCM state shared by GCMEncryptor and GCMDecryptor.
+
+    Only the leftover keystream of the current block and at most 15 bytes of
+    not yet hashed data are kept between calls, so memory use does not depend
+    on the message size.
+    """
+
+    def __init__(self, cipher: AESGCM, iv):
+        iv = as_buffer(iv)
+        assert len(iv) == 12, 'IV must be 12 bytes in this standard implementation'
+        self._cipher = cipher
+        self._iv = bytes(iv)
+        self._iv_words = struct.unpack('>3I', iv)
+        self._counter = 2           # next counter value after J0
+        self._keystream = b''       # unused keystream of the last partial block
+        self._X = 0                 # GHASH state
+        self._pending = b''         # partial block waiting for GHASH
+        self._aad_len = 0
+        self._text_len = 0
+        self._in_text = False
+        self._finalized = False
+
+    def _hash(self, data: memoryview):
+        """feed data to GHASH, carrying a partial block over to the next call"""
+        ghash = self._cipher.ghash_table.ghash
+        if self._pending:
+            take = 16 - len(self._pending)
+            self._pending += bytes(data[:take])
+            data = data[take:]
+            if len(self._pending) < 16:
+                return
+            self._X = ghash(self._X, self._pending)
+        n = len(data)
+        full = n - n % 16
+        self._X = ghash(self._X, data[:full])
+        self._pending = bytes(data[full:])
+
+    def _flush(self):
+        """hash the zero padded partial block"""
+        if self._pending:
+            self._X = self._cipher.ghash_table.ghash(self._X, self._pending)
+            self._pending = b''
+
+    def update_aad(self, chunk):
+        """add a chunk of AAD, all AAD must come before the first update()"""
+        assert not self._finalized, 'Stream is already finalized'
+        assert not self._in_text, 'AAD must be supplied before any data'
+        chunk = as_buffer(chunk)
+        self._aad_len += len(chunk)
+        self._hash(chunk)
+
+    def _start_text(self):
+        assert not self._finalized, 'Stream is already finalized'
+        if not self._in_text:
+            # AAD is padded to a block boundary before the text starts
+            self._flush()
+            self._in_text = True
+
+    def _xor(self, data: memoryview) -> bytes:
+        """XOR data with the next len(data) bytes of keystream"""
+        n = len(data)
+        self._text_len += n
+        if n == 0:
+            return b''
+        need = n - len(self._keystream)
+        if need > 0:
+            blocks = (need + 15) // 16
+            self._keystream += self._cipher._keystream(self._iv_words, self._counter, blocks)
+            self._counter += blocks
+        keystream = self._keystream[:n]
+        self._keystream = self._keystream[n:]
+        result = int.from_bytes(data, 'big') ^ int.from_bytes(keystream, 'big')
+        return result.to_bytes(n, 'big')
+
+    def _finish(self) -> bytes:
+        """compute the tag over everything seen so far"""
+        assert not self._finalized, 'Stream is already finalized'
+        self._finalized = True
+        self._flush()
+        table = self._cipher.ghash_table
+        # Incorporate lengths of AAD and text into GHASH(64 bits/8 bytes for each)
+        X = table.mult(self._X ^ (((self._aad_len * 8) << 64) | (self._text_len * 8)))
+        # Derive the final MAC tag by XORing GHASH output with E(J0)
+        E_J0 = self._cipher._encrypt_block(self._iv + b'\x00\x00\x00\x01')
+        return (X ^ E_J0).to_bytes(16, 'big')
+
+class GCMEncryptor(_GCMStream):
+    """
+    Incremental AES-128-GCM encryption:
+        enc = AESGCM(key).encryptor(iv)
+        enc.update_aad(aad)
+        ciphertext = enc.update(chunk) ...
+        mac = enc.finalize()
+    """
+
+    def update(self, chunk) -> bytes:
+        """encrypt a chunk of any size, returns the same number of ciphertext bytes"""
+        self._start_text()
+        if instrumentation.ENABLED:
+            instrumentation.count('bytes_encrypted', len(chunk))
+        ciphertext = self._xor(as_buffer(chunk))
+        self._hash(memoryview(ciphertext))
+        return ciphertext
+
+    def finalize(self) -> bytes:
+        """return the MAC tag"""
+        return self._finish()
+
+class GCMDecryptor(_GCMStream):
+    """
+    Incremental AES-128-GCM decryption:
+        dec = AESGCM(key).decryptor(iv)
+        dec.update_aad(aad)
+        plaintext = dec.update(chunk) ...
+        is_valid = dec.finalize(mac)
+
+    Plaintext is released before the tag is checked, so it must not be acted
+    on until finalize() has returned True.
+    """
+
+    def update(self, chunk) -> bytes:
+        """decrypt a chunk of any size, returns the same number of plaintext bytes"""
+        chunk = as_buffer(chunk)
+        self._start_text()
+        if instrumentation.ENABLED:
+            instrumentation.count('bytes_decrypted', len(chunk))
+        self._hash(chunk)
+        return self._xor(chunk)
+
+    def finalize(self, mac) -> bool:
+        """check the MAC tag"""
+        return tags_equal(self._finish(), mac)
+
+# Contexts of recently used keys, shared by gcm_encrypt / gcm_decrypt and
+# gcm_batch; resize(max_entries=0) turns caching off
+KEY_CACHE = KeyCache(AESGCM)
+
+def gcm_encrypt(plaintext, key, iv, aad=b'') -> Tuple[bytes, bytes]:
+    """
+    AES-128-GCM encryption on bytes-like objects
+
+    return:
+        (ciphertext, MAC) as bytes
+    """
+    with KEY_CACHE.context(key) as cipher:
+        return cipher.encrypt(iv, plaintext, aad)
+
+def gcm_decrypt(ciphertext, key, iv, aad=b'', mac=b'') -> Tuple[Optional[bytearray], bool]:
+    """
+    AES-128-GCM decryption on bytes-like objects
+
+    return:
+        (plaintext, is_valid), plaintext a bytearray, None if the tag does not match
+    """
+    with KEY_CACHE.context(key) as cipher:
+        return cipher.decrypt(iv, ciphertext, aad, mac)
+
+def encrypt_into(out, plaintext, key, iv, tag, aad=b'') -> int:
+    """
+    AES-128-GCM encryption into caller-owned buffers (see AESGCM.encrypt_into)
+
+    return:
+        number of ciphertext bytes written to out, the MAC is written to tag
+    """
+    with KEY_CACHE.context(key) as cipher:
+        return cipher.encrypt_into(out, iv, plaintext, tag, aad)
+
+def decrypt_into(out, ciphertext, key, iv, mac, aad=b'') -> bool:
+    """
+    AES-128-GCM decryption into a caller-owned buffer (see AESGCM.decrypt_into)
+
+    return:
+        is_valid, out is only written when the tag matches
+    """
+    with KEY_CACHE.context(key) as cipher:
+        return cipher.decrypt_into(out, iv, ciphertext, mac, aad)
 
 def aes_gcm_encrypt(plaintext: List[int], key: List[int], iv: List[int], aad: List[int] = []) -> Tuple[List[int], List[int]]:
     """
-    AES-128-GCM encryption function
+    AES-128-GCM encryption function (List[int] compatibility wrapper of gcm_encrypt)
     
     param:
         plaintext: (List[int])
@@ -18,48 +509,12 @@ def aes_gcm_encrypt(plaintext: List[int], key: List[int], iv: List[int], aad: Li
     """
     assert len(key) == 16, 'AES-128 key must be 16 bytes'
     assert len(iv) == 12, 'IV must be 12 bytes in this standard implementation'
+    ciphertext, mac = gcm_encrypt(plaintext, key, iv, aad)
+    return list(ciphertext), list(mac)
 
-    h = aes128([0] * 16, key)
-
-    # J0 = Nonce(12bytes Nonce) + Counter(4 bytes)
-    J0 = iv + [0, 0, 0, 1]
-    counter = J0.copy()
-
-    # CTR mode encryption
-    ciphertext = []
-    # Seperate plaintext into 16-byte blocks and encrypt each block
-    for i in range(0, len(plaintext), 16):
-        counter = inc32(counter) # Increase counter for each block
-        keystream = aes128(counter, key)
-        block = plaintext[i:i+16]
-        # XOR plaintext block with keystream to get ciphertext block 
-        ciphertext.extend(xor_bytes(block, keystream))
-
-    # Compute GHASH for authentication tag
-    X = [0] * 16
-    
-    # Incorporate AAD into GHASH
-    padded_aad = pad_16(aad)
-    for i in range(0, len(padded_aad), 16):
-        X = gcm_gf_mult(xor_bytes(X, padded_aad[i:i+16]), h)
-        
-    # Incorporate Ciphertext into GHASH
-    padded_ciphertext = pad_16(ciphertext)
-    for i in range(0, len(padded_ciphertext), 16):
-        X = gcm_gf_mult(xor_bytes(X, padded_ciphertext[i:i+16]), h)
-
-    # Incorporate lengths of AAD and Ciphertext into GHASH(64 bits/8 bytes for each)
-    len_block = int_to_list(len(aad) * 8, 8) + int_to_list(len(ciphertext) * 8, 8)
-    X = gcm_gf_mult(xor_bytes(X, len_block), h)
-    # Derive the final MAC tag by XORing GHASH output with E(J0)
-    E_J0 = aes128(J0, key)      
-    mac = xor_bytes(X, E_J0)
-
-    return ciphertext, mac
-
-def aes_gcm_decrypt(ciphertext: List[int], key: List[int], iv: List[int], aad: List[int] = [], mac: List[int] = []) -> Tuple[List[int], bool]:
+def aes_gcm_decrypt(ciphertext: List[int], key: List[int], iv: List[int], aad: List[int] = [], mac: List[int] = []) -> Tuple[str, bool]:
     """
-    AES-128-GCM decryption function
+    AES-128-GCM decryption function (List[int] compatibility wrapper of gcm_decrypt)
     
     param:
         ciphertext: (List[int])
@@ -69,50 +524,13 @@ def aes_gcm_decrypt(ciphertext: List[int], key: List[int], iv: List[int], aad: L
         mac: (List[int]): The authentication tag to verify against.
         
     return:
-        (plaintext, is_valid)
+        (plaintext, is_valid), plaintext is decoded as UTF-8 and empty if the tag does not match
     """
-    # Decryption process is similar to encryption, but we also need to verify the MAC tag
     assert len(key) == 16, 'AES-128 key must be 16 bytes'
     assert len(iv) == 12, 'IV must be 12 bytes in this standard implementation'
+    plaintext, is_valid = gcm_decrypt(ciphertext, key, iv, aad, mac)
 
-    h = aes128([0] * 16, key)
+    if plaintext is None:
+        return "", is_valid
 
-    # Compute GHASH for authentication tag
-    X = [0] * 16
-    J0 = iv + [0, 0, 0, 1]
-    
-    # Incorporate AAD into GHASH
-    padded_aad = pad_16(aad)
-    for i in range(0, len(padded_aad), 16):
-        X = gcm_gf_mult(xor_bytes(X, padded_aad[i:i+16]), h)
-        
-    # Incorporate Ciphertext into GHASH
-    padded_ciphertext = pad_16(ciphertext)
-    for i in range(0, len(padded_ciphertext), 16):
-        X = gcm_gf_mult(xor_bytes(X, padded_ciphertext[i:i+16]), h)
-
-    # Incorporate lengths of AAD and Ciphertext into GHASH(64 bits/8 bytes for each)
-    len_block = int_to_list(len(aad) * 8, 8) + int_to_list(len(ciphertext) * 8, 8)
-    X = gcm_gf_mult(xor_bytes(X, len_block), h)
-    # Derive the final MAC tag by XORing GHASH output with E(J0)
-    E_J0 = aes128(J0, key)
-    pend_mac = xor_bytes(X, E_J0)
-
-    # Compare computed MAC with provided MAC
-    is_valid = pend_mac == mac
-
-    # If valid, proceed to decrypt the ciphertext
-    plaintext = []
-    if is_valid:
-        counter = J0.copy()
-        for i in range(0, len(ciphertext), 16):
-            counter = inc32(counter) # Increase counter for each block
-            keystream = aes128(counter, key)
-            block = ciphertext[i:i+16]
-            # XOR ciphertext block with keystream to get plaintext block 
-            plaintext.extend(xor_bytes(block, keystream))
-
-    if plaintext is not None:
-        plaintext = bytes(plaintext).decode("utf-8")
-
-    return plaintext, is_valid
\ No newline at end of file
+    return plaintext.decode("utf-8"), is_valid
@@ -1,3 +1,4 @@
+import hmac
 from typing import List
 
 def list_to_int(l: List[int]) -> int:
@@ -37,3 +38,17 @@ def inc32(block: List[int]) -> List[int]:
     counter = list_to_int(block[12:16])
     counter = (counter + 1) & 0xFFFFFFFF
     return block[:12] + int_to_list(counter, 4)
+
+def as_buffer(data) -> memoryview:
+    """view any bytes-like object (bytes, bytearray, memoryview) or list of ints as flat bytes"""
+    if isinstance(data, list):
+        data = bytes(data)
+    return memoryview(data).cast('B')
+
+def tags_equal(a, b) -> bool:
+    """constant-time comparison of two authentication tags"""
+    return hmac.compare_digest(bytes(as_buffer(a)), bytes(as_buffer(b)))
+
+def wipe(buffer: bytearray):
+    """overwrite a mutable buffer with zeros in place"""
+    buffer[:] = bytes(len(buffer))
@@ -0,0 +1,119 @@
+"""
+Batch AES-128-GCM for many small records.
+
+Records are grouped by key so key expansion, H and the GHASH tables are
+derived once per key (and kept in gcm.KEY_CACHE across calls). Within a group
+the J0 and counter blocks of every record are laid out together and encrypted
+in one batch (on the NumPy engine when it is installed and the batch is large
+enough), then each record is XORed and GHASHed from slices of that batch.
+When decrypting, the tag of a record is checked before its keystream is
+applied, so no plaintext is ever built for a record that is rejected.
+"""
+import struct
+from typing import Dict, List, Optional, Sequence, Tuple
+from t_table import encrypt_words
+import gcm
+import instrumentation
+from gcm import AESGCM
+from gcm_auxiliary import as_buffer, tags_equal
+
+_BLOCK = struct.Struct('>4I')
+
+def _group_by_key(records: Sequence[tuple]) -> Dict[bytes, List[int]]:
+    """record indices per key, in order of first appearance"""
+    groups = {}
+    for i, record in enumerate(records):
+        groups.setdefault(bytes(as_buffer(record[0])), []).append(i)
+    return groups
+
+def _batch_keystream(cipher: AESGCM, ivs: List[memoryview], lengths: List[int]) -> bytes:
+    """E(J0) followed by the CTR keystream blocks of every record, concatenated"""
+    iv_words = []
+    blocks = []
+    for iv, n in zip(ivs, lengths):
+        assert len(iv) == 12, 'IV must be 12 bytes in this standard implementation'
+        iv_words.append((int.from_bytes(iv[0:4], 'big'), int.from_bytes(iv[4:8], 'big'),
+                         int.from_bytes(iv[8:12], 'big')))
+        # J0 = IV || 1, then IV || 2, IV || 3, ...
+        blocks.append(1 + (n + 15) // 16)
+    rk = cipher.round_keys
+    engine = cipher._batch()
+    if instrumentation.ENABLED:
+        instrumentation.count_aes(sum(blocks))
+    if sum(blocks) * 16 >= gcm.NUMPY_MIN_BYTES and engine is not None:
+        return engine.multi_keystream(rk, iv_words, blocks)
+    pack = _BLOCK.pack
+    return b''.join([pack(*encrypt_words(w0, w1, w2, c, rk))
+                     for (w0, w1, w2), count in zip(iv_words, blocks)
+                     for c in range(1, count + 1)])
+
+def _process_group(cipher: AESGCM, ivs: List[memoryview], texts: List[memoryview],
+                   aads: List[memoryview], macs: List[memoryview] = None) -> List[Tuple[Optional[bytes], bytes]]:
+    """
+    (output text, tag) per record; the tag is over the ciphertext in both
+    directions. With macs (decrypting) the output of a record whose tag does
+    not match is None, its plaintext is never computed.
+    """
+    keystream = _batch_keystream(cipher, ivs, [len(t) for t in texts])
+    table = cipher.ghash_table
+    results = []
+    offset = 0
+    for k, (text, aad) in enumerate(zip(texts, aads)):
+        n = len(text)
+        E_J0 = int.from_bytes(keystream[offset:offset + 16], 'big')
+        stream = keystream[offset + 16:offset + 16 + n]
+        offset += 16 + (n + 15) // 16 * 16
+        output = None
+        if macs is None:
+            output = (int.from_bytes(text, 'big') ^ int.from_bytes(stream, 'big')).to_bytes(n, 'big')
+        ciphertext = text if macs is not None else output
+        X = table.ghash(table.ghash(0, aad), ciphertext)
+        X = table.mult(X ^ (((len(aad) * 8) << 64) | (n * 8)))
+        tag = (X ^ E_J0).to_bytes(16, 'big')
+        if macs is not None and tags_equal(tag, macs[k]):
+            output = (int.from_bytes(text, 'big') ^ int.from_bytes(stream, 'big')).to_bytes(n, 'big')
+        results.append((output, tag))
+    return results
+
+def encrypt_many(records: Sequence[tuple]) -> List[Tuple[bytes, bytes]]:
+    """
+    Encrypt many records at once.
+
+    param:
+        records: sequence of (key, iv, plaintext, aad), all bytes-like
+
+    return:
+        [(ciphertext, MAC), ...] in record order, identical to gcm_encrypt per record
+    """
+    results = [None] * len(records)
+    for key, indices in _group_by_key(records).items():
+        group = [records[i] for i in indices]
+        with gcm.KEY_CACHE.context(key) as cipher:
+            outputs = _process_group(cipher, [as_buffer(r[1]) for r in group],
+                                     [as_buffer(r[2]) for r in group],
+                                     [as_buffer(r[3]) for r in group])
+        for i, output in zip(indices, outputs):
+            results[i] = output
+    return results
+
+def decrypt_many(records: Sequence[tuple]) -> List[Tuple[Optional[bytes], bool]]:
+    """
+    Decrypt and verify many records at once.
+
+    param:
+        records: sequence of (key, iv, ciphertext, aad, mac), all bytes-like
+
+    return:
+        [(plaintext, is_valid), ...] in record order, identical to gcm_decrypt per record
+    """
+    results = [None] * len(records)
+    for key, indices in _group_by_key(records).items():
+        group = [records[i] for i in indices]
+        with gcm.KEY_CACHE.context(key) as cipher:
+            outputs = _process_group(cipher, [as_buffer(r[1]) for r in group],
+                                     [as_buffer(r[2]) for r in group],
+                                     [as_buffer(r[3]) for r in group],
+                                     [as_buffer(r[4]) for r in group])
+        for i, (plaintext, _) in zip(indices, outputs):
+            results[i] = (plaintext, plaintext is not None)
+    return results
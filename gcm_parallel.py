@@ -0,0 +1,136 @@
+"""
+Parallel AES-128-GCM for large single messages.
+
+CTR blocks are independent, so the message is cut into shards that are
+encrypted on a process pool. Each worker also GHASHes its own ciphertext
+shard starting from zero; the partial hashes are recombined in order with
+
+    Y = Y * H^(blocks in shard) xor partial(shard)
+
+which gives exactly the serial GHASH, so ciphertext and tag match
+gcm.gcm_encrypt / gcm.gcm_decrypt bit for bit.
+"""
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from gcm import AESGCM
+from gcm_auxiliary import as_buffer, tags_equal
+from ghash import gf_mult, gf_power
+
+# Messages shorter than this are encrypted serially
+PARALLEL_MIN_BYTES = 1 << 20
+
+# Cipher contexts of the keys a worker process has seen
+_worker_ciphers = {}
+
+def _worker_cipher(key: bytes, aggregate: int) -> AESGCM:
+    cipher = _worker_ciphers.get((key, aggregate))
+    if cipher is None:
+        _worker_ciphers.clear()
+        cipher = _worker_ciphers[key, aggregate] = AESGCM(key, aggregate=aggregate)
+    return cipher
+
+def _encrypt_shard(key: bytes, aggregate: int, iv: bytes, counter: int, data: bytes) -> Tuple[bytes, int]:
+    """worker: CTR on one shard, then GHASH of the resulting ciphertext from zero"""
+    cipher = _worker_cipher(key, aggregate)
+    ciphertext = cipher._ctr(memoryview(iv), memoryview(data), counter)
+    return ciphertext, cipher.ghash_table.ghash(0, ciphertext)
+
+def _decrypt_shard(key: bytes, aggregate: int, iv: bytes, counter: int, data: bytes) -> Tuple[bytes, int]:
+    """worker: GHASH of one ciphertext shard from zero, then CTR"""
+    cipher = _worker_cipher(key, aggregate)
+    partial = cipher.ghash_table.ghash(0, data)
+    return cipher._ctr(memoryview(iv), memoryview(data), counter), partial
+
+def _worker_count(workers: Optional[int]) -> int:
+    """workers, else os.cpu_count(); also the size of the pool _run starts"""
+    return workers or os.cpu_count() or 1
+
+def _shards(n: int, workers: int) -> List[Tuple[int, int]]:
+    """(start, end) byte ranges, every shard but the last a multiple of 16 bytes"""
+    blocks = (n + 15) // 16
+    per_shard = max((blocks + workers - 1) // workers, 1) * 16
+    return [(start, min(start + per_shard, n)) for start in range(0, n, per_shard)]
+
+def _run(worker, data: memoryview, key: bytes, aggregate: int, iv: bytes, workers: int,
+         executor: Optional[Executor]) -> Tuple[List[bytes], List[Tuple[int, int]]]:
+    """run worker over the shards, returns the outputs and (blocks, partial hash) per shard"""
+    shards = _shards(len(data), workers)
+    pool = executor or ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [pool.submit(worker, key, aggregate, iv, 2 + start // 16, bytes(data[start:end]))
+                   for start, end in shards]
+        results = [f.result() for f in futures]
+    finally:
+        if executor is None:
+            pool.shutdown()
+    outputs = [output for output, _ in results]
+    partials = [((end - start + 15) // 16, partial) for (start, end), (_, partial) in zip(shards, results)]
+    return outputs, partials
+
+def _combine(cipher: AESGCM, iv: bytes, aad: memoryview, text_len: int,
+             partials: List[Tuple[int, int]]) -> bytes:
+    """fold the per-shard partial hashes into the final tag"""
+    h = cipher.h
+    X = cipher.ghash_table.ghash(0, aad)
+    powers = {}
+    for blocks, partial in partials:
+        if blocks not in powers:
+            powers[blocks] = gf_power(h, blocks)
+        X = gf_mult(X, powers[blocks]) ^ partial
+    # Incorporate lengths of AAD and text into GHASH(64 bits/8 bytes for each)
+    X = cipher.ghash_table.mult(X ^ (((len(aad) * 8) << 64) | (text_len * 8)))
+    E_J0 = int.from_bytes(cipher._ctr(memoryview(iv), memoryview(bytes(16)), 1), 'big')
+    return (X ^ E_J0).to_bytes(16, 'big')
+
+def parallel_encrypt(plaintext, key, iv, aad=b'', workers: Optional[int] = None,
+                     min_bytes: int = PARALLEL_MIN_BYTES,
+                     executor: Optional[Executor] = None, aggregate: int = 0) -> Tuple[bytes, bytes]:
+    """
+    AES-128-GCM encryption sharded over a process pool.
+
+    param:
+        workers: number of shards / processes, defaults to os.cpu_count()
+            (also with an executor, whose size is not inspected)
+        min_bytes: messages shorter than this are encrypted serially
+        executor: optional pool to reuse instead of starting one per call
+        aggregate: GHASH aggregation group (0, 4 or 8), see AESGCM
+
+    return:
+        (ciphertext, MAC), identical to gcm_encrypt
+    """
+    plaintext = as_buffer(plaintext)
+    workers = _worker_count(workers)
+    if len(plaintext) < min_bytes or workers < 2:
+        return AESGCM(key, aggregate=aggregate).encrypt(iv, plaintext, aad)
+    key = bytes(as_buffer(key))
+    iv = bytes(as_buffer(iv))
+    assert len(iv) == 12, 'IV must be 12 bytes in this standard implementation'
+    cipher = AESGCM(key, aggregate=aggregate)
+    outputs, partials = _run(_encrypt_shard, plaintext, key, aggregate, iv, workers, executor)
+    mac = _combine(cipher, iv, as_buffer(aad), len(plaintext), partials)
+    return b''.join(outputs), mac
+
+def parallel_decrypt(ciphertext, key, iv, aad=b'', mac=b'', workers: Optional[int] = None,
+                     min_bytes: int = PARALLEL_MIN_BYTES,
+                     executor: Optional[Executor] = None, aggregate: int = 0) -> Tuple[Optional[bytes], bool]:
+    """
+    AES-128-GCM decryption sharded over a process pool, parameters as for
+    parallel_encrypt.
+
+    return:
+        (plaintext, is_valid), identical to gcm_decrypt
+    """
+    ciphertext = as_buffer(ciphertext)
+    workers = _worker_count(workers)
+    if len(ciphertext) < min_bytes or workers < 2:
+        return AESGCM(key, aggregate=aggregate).decrypt(iv, ciphertext, aad, mac)
+    key = bytes(as_buffer(key))
+    iv = bytes(as_buffer(iv))
+    assert len(iv) == 12, 'IV must be 12 bytes in this standard implementation'
+    cipher = AESGCM(key, aggregate=aggregate)
+    outputs, partials = _run(_decrypt_shard, ciphertext, key, aggregate, iv, workers, executor)
+    is_valid = tags_equal(_combine(cipher, iv, as_buffer(aad), len(ciphertext), partials), mac)
+    if not is_valid:
+        return None, False
+    return b''.join(outputs), True
@@ -1,5 +1,4 @@
 from gcm import aes_gcm_encrypt
-from Crypto.Random import get_random_bytes
 from gcm_auxiliary import hex_to_list, list_to_hex, string_to_list
 
 def test_aes_gcm():
@@ -0,0 +1,154 @@
+"""
+GF(2^128) field arithmetic on plain 128-bit integers, GCM bit order (the most
+significant bit is the coefficient of x^0, so 1 is 0x8000...).
+
+- mul: carry-less product via one integer multiplication of bit-spread
+  operands, then a single reduction.
+- square, sqrt and x -> x^(2^k): linear over GF(2), applied as 16 byte-table
+  lookups of a precomputed 128x128 map.
+- inverse: Itoh-Tsujii, a^-1 = (a^(2^127 - 1))^2 with 12 multiplications.
+- power: fixed 4-bit window exponentiation.
+"""
+from typing import Dict, List
+from ghash import gf_mult, _reduce256
+
+ONE = 1 << 127
+
+# --- Multiplication ---
+
+# '0'/'1' characters to byte values 0/1, and any byte to '0'/'1' by its low bit
+_SPREAD = bytes.maketrans(b'01', b'\x00\x01')
+_PARITY = bytes(48 + (v & 1) for v in range(256))
+
+
+def spread(a: int) -> int:
+    """one bit per byte: byte k (from the least significant end) holds bit k of a"""
+    return int.from_bytes(format(a, '0128b').encode('ascii').translate(_SPREAD), 'big')
+
+
+def clmul(a: int, b: int) -> int:
+    """carry-less product of two 128-bit integers (255 bits)"""
+    return clmul_spread(spread(a), spread(b))
+
+
+def clmul_spread(sa: int, sb: int) -> int:
+    """clmul from spread(a) and spread(b), for operands used in many products"""
+    # Every byte of the integer product counts the terms of one output bit
+    # (at most 128, so nothing carries into the next byte); its parity is that bit
+    return int((sa * sb).to_bytes(255, 'big').translate(_PARITY), 2)
+
+
+def mul(a: int, b: int) -> int:
+    """a * b"""
+    # In GCM bit order the integer carry-less product is one bit short of the 256-bit frame
+    return _reduce256(clmul(a, b) << 1)
+
+
+def mul_spread(sa: int, sb: int) -> int:
+    """a * b from spread(a) and spread(b)"""
+    return _reduce256(clmul_spread(sa, sb) << 1)
+
+
+# --- Linear maps (squaring and its powers) ---
+
+class LinearMap:
+    """
+    A GF(2)-linear map on 128-bit integers given by the images of the basis
+    vectors, applied as 16 byte-table lookups.
+    """
+
+    def __init__(self, images: List[int]):
+        assert len(images) == 128, 'A linear map needs 128 basis images'
+        self.images = images
+        self.tables = []
+        for b in range(16):
+            table = [0] * 256
+            for v in range(1, 256):
+                low = v & -v
+                # bit 7 - j of byte b is basis vector 8b + j
+                table[v] = table[v ^ low] ^ images[8 * b + 8 - low.bit_length()]
+            self.tables.append(table)
+
+    def __call__(self, x: int) -> int:
+        t = self.tables
+        return (t[0][x >> 120] ^ t[1][(x >> 112) & 0xFF] ^ t[2][(x >> 104) & 0xFF] ^ t[3][(x >> 96) & 0xFF]
+                ^ t[4][(x >> 88) & 0xFF] ^ t[5][(x >> 80) & 0xFF] ^ t[6][(x >> 72) & 0xFF] ^ t[7][(x >> 64) & 0xFF]
+                ^ t[8][(x >> 56) & 0xFF] ^ t[9][(x >> 48) & 0xFF] ^ t[10][(x >> 40) & 0xFF] ^ t[11][(x >> 32) & 0xFF]
+                ^ t[12][(x >> 24) & 0xFF] ^ t[13][(x >> 16) & 0xFF] ^ t[14][(x >> 8) & 0xFF] ^ t[15][x & 0xFF])
+
+    def then(self, other: 'LinearMap') -> 'LinearMap':
+        """the map x -> other(self(x))"""
+        return LinearMap([other(v) for v in self.images])
+
+
+# k -> map x -> x^(2^k), built on first use
+_frobenius: Dict[int, LinearMap] = {}
+
+
+def frobenius(k: int) -> LinearMap:
+    """the linear map x -> x^(2^k)"""
+    k %= 128
+    m = _frobenius.get(k)
+    if m is None:
+        if k == 1:
+            m = LinearMap([gf_mult(1 << (127 - i), 1 << (127 - i)) for i in range(128)])
+        elif k == 0:
+            m = LinearMap([1 << (127 - i) for i in range(128)])
+        else:
+            half = frobenius(k // 2)
+            m = half.then(half)
+            if k % 2:
+                m = m.then(frobenius(1))
+        _frobenius[k] = m
+    return m
+
+
+def square(a: int) -> int:
+    return frobenius(1)(a)
+
+
+def sqrt(a: int) -> int:
+    """the unique square root, a^(2^127)"""
+    return frobenius(127)(a)
+
+
+# --- Inverse and powers ---
+
+def inverse(a: int) -> int:
+    """a^-1 by Itoh-Tsujii (0 maps to 0, like a^(2^128 - 2))"""
+    if a == 0:
+        return 0
+    # beta(k) = a^(2^k - 1), beta(j + k) = beta(j)^(2^k) * beta(k)
+    b1 = a
+    b2 = mul(frobenius(1)(b1), b1)
+    b3 = mul(frobenius(1)(b2), b1)
+    b6 = mul(frobenius(3)(b3), b3)
+    b7 = mul(frobenius(1)(b6), b1)
+    b14 = mul(frobenius(7)(b7), b7)
+    b15 = mul(frobenius(1)(b14), b1)
+    b30 = mul(frobenius(15)(b15), b15)
+    b31 = mul(frobenius(1)(b30), b1)
+    b62 = mul(frobenius(31)(b31), b31)
+    b63 = mul(frobenius(1)(b62), b1)
+    b126 = mul(frobenius(63)(b63), b63)
+    b127 = mul(frobenius(1)(b126), b1)
+    # a^(2^128 - 2) = (a^(2^127 - 1))^2
+    return frobenius(1)(b127)
+
+
+def power(a: int, n: int) -> int:
+    """a^n with a fixed 4-bit window"""
+    if n == 0:
+        return ONE
+    window = [ONE, a]
+    for _ in range(14):
+        window.append(mul(window[-1], a))
+    sq = frobenius(1)
+    result = ONE
+    for shift in range((n.bit_length() + 3) // 4 * 4 - 4, -4, -4):
+        if result != ONE:
+            result = sq(sq(sq(sq(result))))
+        digit = (n >> shift) & 0xF
+        if digit:
+            result = mul(result, window[digit])
+    return result
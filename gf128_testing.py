@@ -0,0 +1,28 @@
+# test_gf128.py
+import random
+import gf128
+from ghash import gf_mult, gf_power
+
+# Multiplication against the bit-serial gf_mult
+rng = random.Random(2128)
+match = True
+for _ in range(200):
+    a, b = rng.getrandbits(128), rng.getrandbits(128)
+    match &= gf128.mul(a, b) == gf_mult(a, b)
+for a in (0, gf128.ONE, (1 << 128) - 1):
+    match &= gf128.mul(a, a) == gf_mult(a, a)
+print(f"mul matches gf_mult: {match}")
+# Should output: mul matches gf_mult: True
+
+# Squaring, square root, inverse and powering
+match = True
+for _ in range(50):
+    a = rng.getrandbits(128)
+    n = rng.getrandbits(rng.randrange(1, 140))
+    match &= gf128.square(a) == gf_mult(a, a)
+    match &= gf128.square(gf128.sqrt(a)) == a
+    match &= gf128.mul(a, gf128.inverse(a)) == gf128.ONE
+    match &= gf128.power(a, n) == gf_power(a, n)
+match &= gf128.inverse(0) == 0 and gf128.power(0, 0) == gf128.ONE
+print(f"square, sqrt, inverse and power are consistent: {match}")
+# Should output: square, sqrt, inverse and power are consistent: True
@@ -1,13 +1,13 @@
+import sys
 from typing import List
+import instrumentation
 from gcm_auxiliary import list_to_int, int_to_list
 
 # GF(2^128) Algorithm for GCM (GHASH)
-def gcm_gf_mult(x: List[int], y: List[int]) -> List[int]:
+def gf_mult(X: int, Y: int) -> int:
     """
-    GCM GF(2^128) multiplication function
+    GCM GF(2^128) multiplication on 128-bit integers
     """
-    X = list_to_int(x)
-    Y = list_to_int(y)
     R = 0xe1000000000000000000000000000000   # P(x) = x^128 + x^7 + x^2 + x + 1 
     Z = 0
     V = Y
@@ -20,4 +20,195 @@ def gcm_gf_mult(x: List[int], y: List[int]) -> List[int]:
             V = (V >> 1) ^ R
         else:
             V >>= 1
-    return int_to_list(Z, 16)
\ No newline at end of file
+    return Z
+
+def gf_power(X: int, n: int) -> int:
+    """X^n by square and multiply, 1 is 0x8000..."""
+    result = 1 << 127
+    while n:
+        if n & 1:
+            result = gf_mult(result, X)
+        X = gf_mult(X, X)
+        n >>= 1
+    return result
+
+def gcm_gf_mult(x: List[int], y: List[int]) -> List[int]:
+    """
+    GCM GF(2^128) multiplication function
+    """
+    if instrumentation.ENABLED:
+        instrumentation.count('gf_mult_calls')
+    return int_to_list(gf_mult(list_to_int(x), list_to_int(y)), 16)
+
+R = 0xe1000000000000000000000000000000   # P(x) = x^128 + x^7 + x^2 + x + 1
+
+def _mult_x(v: int, n: int) -> int:
+    """multiply a field element (as 128-bit integer) by x^n, bit by bit"""
+    for _ in range(n):
+        if v & 1:
+            v = (v >> 1) ^ R
+        else:
+            v >>= 1
+    return v
+
+def _list_nbytes(values: List[int]) -> int:
+    return sys.getsizeof(values) + sum(sys.getsizeof(v) for v in values)
+
+def _zero(values: List[int]):
+    """
+    replace every entry by 0 in place; CPython ints are immutable, so this drops
+    the references to the key dependent values rather than overwriting their memory
+    """
+    values[:] = [0] * len(values)
+
+class GHashTable:
+    """
+    GF(2^128) multiplication by a fixed H using Shoup's precomputed tables.
+
+    bits = 4: 16-entry multiple table of H plus a 16-entry reduction table,
+              32 table steps per multiplication (small memory).
+    bits = 8: 256-entry tables, 16 table steps per multiplication (faster).
+
+    Field elements are 128-bit integers in GCM bit order (the most
+    significant bit is the coefficient of x^0).
+    """
+
+    def __init__(self, h: int, bits: int = 8):
+        assert bits in (4, 8), 'Table width must be 4 or 8 bits'
+        self.h = h
+        self.bits = bits
+        size = 1 << bits
+        # M[n] = n * H, where the most significant bit of n is the coefficient of x^0
+        M = [0] * size
+        v = h
+        bit = size >> 1
+        while bit:
+            M[bit] = v
+            v = _mult_x(v, 1)
+            bit >>= 1
+        for n in range(1, size):
+            low = n & -n
+            if n != low:
+                M[n] = M[low] ^ M[n ^ low]
+        self.M = M
+        # RED[r] = r * x^bits, where r are the low bits shifted out of Z
+        self.RED = [_mult_x(r, bits) for r in range(size)]
+
+    def nbytes(self) -> int:
+        """approximate memory of the tables"""
+        return _list_nbytes(self.M) + _list_nbytes(self.RED)
+
+    def wipe(self):
+        """overwrite H and its multiples (RED does not depend on H); the table is unusable afterwards"""
+        self.h = 0
+        _zero(self.M)
+
+    def mult(self, x: int) -> int:
+        """return x * H"""
+        M = self.M
+        RED = self.RED
+        bits = self.bits
+        mask = (1 << bits) - 1
+        # Horner evaluation from the highest powers of x (lowest bits of x) down
+        Z = M[x & mask]
+        for shift in range(bits, 128, bits):
+            Z = (Z >> bits) ^ RED[Z & mask] ^ M[(x >> shift) & mask]
+        return Z
+
+    def ghash(self, y: int, data: bytes) -> int:
+        """fold data into the GHASH state y, zero padding the last partial block"""
+        mult = self.mult
+        n = len(data)
+        if instrumentation.ENABLED:
+            instrumentation.count('ghash_blocks', (n + 15) // 16)
+        full = n - n % 16
+        for i in range(0, full, 16):
+            y = mult(y ^ int.from_bytes(data[i:i+16], 'big'))
+        if full != n:
+            y = mult(y ^ (int.from_bytes(data[full:], 'big') << (8 * (16 - n + full))))
+        return y
+
+def _reduce256(P: int) -> int:
+    """
+    Reduce an unreduced 256-bit product (bit 255 - i is the coefficient of x^i)
+    modulo x^128 + x^7 + x^2 + x + 1, using x^128 = x^7 + x^2 + x + 1.
+    """
+    hi = P >> 128
+    lo = P & 0xffffffffffffffffffffffffffffffff
+    # Bits pushed past x^127 by the shifts fold back once more
+    over = ((lo & 1) << 127) ^ ((lo & 3) << 126) ^ ((lo & 0x7f) << 121)
+    return hi ^ lo ^ (lo >> 1) ^ (lo >> 2) ^ (lo >> 7) ^ over ^ (over >> 1) ^ (over >> 2) ^ (over >> 7)
+
+class GHashPowers:
+    """
+    GHASH with aggregated reduction over precomputed powers H, H^2, ..., H^group.
+
+    A group of blocks X_1..X_g is folded as
+        Y' = (Y ^ X_1) H^g ^ X_2 H^(g-1) ^ ... ^ X_g H
+    with each product carry-less and unreduced (byte tables of H^k), and one
+    reduction per group instead of one per block. Same interface as GHashTable.
+    """
+
+    def __init__(self, h: int, group: int = 8):
+        assert group in (4, 8), 'Aggregation group must be 4 or 8 blocks'
+        self.h = h
+        self.group = group
+        powers = [h]
+        for _ in range(group - 1):
+            powers.append(gf_mult(powers[-1], h))
+        self.powers = powers
+        # tables[k - 1][v] = v * H^k unreduced, v's top bit is the coefficient of x^0
+        self.tables = []
+        for hk in powers:
+            shifted = [(hk << 128) >> m for m in range(8)]
+            table = [0] * 256
+            for v in range(1, 256):
+                low = v & -v
+                table[v] = table[v ^ low] ^ shifted[7 - low.bit_length() + 1]
+            self.tables.append(table)
+
+    def nbytes(self) -> int:
+        """approximate memory of the powers and tables"""
+        return _list_nbytes(self.powers) + sum(_list_nbytes(t) for t in self.tables)
+
+    def wipe(self):
+        """overwrite H, its powers and their tables; unusable afterwards"""
+        self.h = 0
+        _zero(self.powers)
+        for table in self.tables:
+            _zero(table)
+
+    @staticmethod
+    def _mul_unreduced(block: bytes, table: List[int]) -> int:
+        # Horner over the bytes from the highest powers of x down
+        acc = 0
+        for v in reversed(block):
+            acc = table[v] ^ (acc >> 8)
+        return acc
+
+    def mult(self, x: int) -> int:
+        """return x * H"""
+        return _reduce256(self._mul_unreduced(x.to_bytes(16, 'big'), self.tables[0]))
+
+    def ghash(self, y: int, data: bytes) -> int:
+        """fold data into the GHASH state y, zero padding the last partial block"""
+        n = len(data)
+        if instrumentation.ENABLED:
+            instrumentation.count('ghash_blocks', (n + 15) // 16)
+        data = bytes(data)
+        if n % 16:
+            data += bytes(16 - n % 16)
+        blocks = len(data) // 16
+        tables = self.tables
+        mul = self._mul_unreduced
+        i = 0
+        while i < blocks:
+            g = min(self.group, blocks - i)
+            # The running state joins the first block of the group
+            first = (y ^ int.from_bytes(data[16 * i:16 * i + 16], 'big')).to_bytes(16, 'big')
+            acc = mul(first, tables[g - 1])
+            for k in range(1, g):
+                acc ^= mul(data[16 * (i + k):16 * (i + k) + 16], tables[g - 1 - k])
+            y = _reduce256(acc)
+            i += g
+        return y
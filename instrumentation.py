@@ -0,0 +1,141 @@
+"""
+Opt-in counters and stage timers for the AES / GHASH hot paths.
+
+Disabled by default: instrumented code only checks the module flag ENABLED
+(counters) or enters a shared no-op context (stage timers), so the cost when
+off is one attribute lookup per call, never per block.
+
+    with instrumented(trace_allocations=True) as stats:
+        gcm_encrypt(data, key, iv)
+    print(stats.snapshot())
+    print(stats.prometheus())
+"""
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Dict
+
+ENABLED = False
+
+# name -> count, e.g. aes128_calls, key_expansions, gf_mult_calls, bytes_encrypted
+counters: Dict[str, int] = {}
+# stage -> cumulative seconds, stages are key_setup, ctr, ghash and tag
+timers: Dict[str, float] = {}
+
+_trace_allocations = False
+_last_allocations = None    # allocation data kept when tracing stops
+_NULL = nullcontext()
+
+
+def count(name: str, n: int = 1):
+    """add n to a counter, callers check ENABLED first"""
+    counters[name] = counters.get(name, 0) + n
+
+
+def count_aes(blocks: int = 1):
+    """
+    add to aes128_calls, the one counter of AES-128 block encryptions for the
+    list API (aes.aes128) and the bytes API (gcm.AESGCM) alike, on every
+    engine; callers check ENABLED first
+    """
+    count('aes128_calls', blocks)
+
+
+@contextmanager
+def _timed(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timers[name] = timers.get(name, 0.0) + time.perf_counter() - start
+
+
+def stage(name: str):
+    """context manager adding the time spent in it to a stage timer (no-op when disabled)"""
+    return _timed(name) if ENABLED else _NULL
+
+
+def reset():
+    """clear all counters, timers and kept allocation data"""
+    global _last_allocations
+    counters.clear()
+    timers.clear()
+    _last_allocations = None
+
+
+def enable(trace_allocations: bool = False):
+    """start counting; trace_allocations also starts tracemalloc"""
+    global ENABLED, _trace_allocations
+    ENABLED = True
+    if trace_allocations and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _trace_allocations = True
+
+
+def disable():
+    """stop counting (collected data is kept until reset())"""
+    global ENABLED, _trace_allocations, _last_allocations
+    ENABLED = False
+    if _trace_allocations:
+        _last_allocations = _allocations(10)
+        tracemalloc.stop()
+        _trace_allocations = False
+
+
+def _allocations(top: int) -> dict:
+    current, peak = tracemalloc.get_traced_memory()
+    stats = tracemalloc.take_snapshot().statistics('lineno')[:top]
+    return {
+        "current_bytes": current,
+        "peak_bytes": peak,
+        "top": [{"site": f"{s.traceback[0].filename}:{s.traceback[0].lineno}",
+                 "bytes": s.size, "count": s.count} for s in stats],
+    }
+
+
+def snapshot(top_allocations: int = 10) -> dict:
+    """counters, timers and (when traced) tracemalloc totals and top allocation sites"""
+    data = {"counters": dict(counters), "timers": dict(timers)}
+    if tracemalloc.is_tracing():
+        data["allocations"] = _allocations(top_allocations)
+    elif _last_allocations is not None:
+        data["allocations"] = _last_allocations
+    return data
+
+
+def prometheus(prefix: str = "aes_gcm") -> str:
+    """the current data in the Prometheus text exposition format"""
+    lines = []
+    for name in sorted(counters):
+        lines.append(f"# TYPE {prefix}_{name}_total counter")
+        lines.append(f"{prefix}_{name}_total {counters[name]}")
+    if timers:
+        lines.append(f"# TYPE {prefix}_stage_seconds_total counter")
+        for name in sorted(timers):
+            lines.append(f'{prefix}_stage_seconds_total{{stage="{name}"}} {timers[name]:.9f}')
+    allocations = snapshot(0).get("allocations")
+    if allocations:
+        current, peak = allocations["current_bytes"], allocations["peak_bytes"]
+        lines.append(f"# TYPE {prefix}_traced_memory_bytes gauge")
+        lines.append(f'{prefix}_traced_memory_bytes{{kind="current"}} {current}')
+        lines.append(f'{prefix}_traced_memory_bytes{{kind="peak"}} {peak}')
+    return "\n".join(lines) + "\n"
+
+
+class _Stats:
+    """handle returned by instrumented()"""
+    snapshot = staticmethod(snapshot)
+    prometheus = staticmethod(prometheus)
+    reset = staticmethod(reset)
+
+
+@contextmanager
+def instrumented(trace_allocations: bool = False, fresh: bool = True):
+    """enable instrumentation for the duration of the block"""
+    if fresh:
+        reset()
+    enable(trace_allocations)
+    try:
+        yield _Stats
+    finally:
+        disable()
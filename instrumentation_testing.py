@@ -0,0 +1,80 @@
+# test_instrumentation.py
+import re
+import instrumentation
+from instrumentation import instrumented
+from aes import aes128
+from gcm import AESGCM
+from gcm_batch import encrypt_many
+
+key = bytes(range(16))
+iv = bytes(12)
+plaintext = bytes(100)      # 7 CTR blocks
+aad = bytes(20)             # 2 GHASH blocks
+
+# Counters after one context setup, one encryption and one decryption
+with instrumented() as stats:
+    cipher = AESGCM(key)
+    ciphertext, mac = cipher.encrypt(iv, plaintext, aad)
+    decrypted, is_valid = cipher.decrypt(iv, ciphertext, aad, mac)
+    data = stats.snapshot()
+# AES: E(0) for H once, then E(J0) and 7 CTR blocks per operation
+expected = {"key_expansions": 1, "aes128_calls": 1 + 2 * (1 + 7), "ghash_blocks": 2 * (2 + 7),
+            "bytes_encrypted": 100, "bytes_decrypted": 100}
+print(f"Counters: {data['counters'] == expected}, round trip: {is_valid and decrypted == plaintext}")
+# Should output: Counters: True, round trip: True
+
+# Every stage timer of the context was filled
+timers = data["timers"]
+print(f"Stage timers: {sorted(timers)}, all positive: {all(t > 0 for t in timers.values())}")
+# Should output: Stage timers: ['ctr', 'ghash', 'key_setup', 'tag'], all positive: True
+
+# Prometheus text: a TYPE line before each metric, then "name{labels} value" samples
+text = instrumentation.prometheus()
+sample = re.compile(r'^([a-z0-9_]+)(\{[a-z_]+="[a-z_]+"\})? (\d+(\.\d+)?)$')
+typed = set()
+well_formed = text.endswith("\n")
+for line in text.splitlines():
+    if line.startswith("# TYPE "):
+        name, kind = line[len("# TYPE "):].split(" ")
+        well_formed &= kind in ("counter", "gauge")
+        typed.add(name)
+        continue
+    match = sample.match(line)
+    well_formed &= match is not None and match.group(1) in typed
+well_formed &= "aes_gcm_aes128_calls_total 17" in text.splitlines()
+well_formed &= 'aes_gcm_stage_seconds_total{stage="ctr"}' in text
+print(f"Prometheus output well formed: {well_formed}")
+# Should output: Prometheus output well formed: True
+
+# Block encryptions count the same on the list API, the bytes API and the batch API
+def aes128_calls(run):
+    with instrumented() as stats:
+        run()
+        return stats.snapshot()["counters"].get("aes128_calls")
+block = aes128_calls(lambda: aes128(list(range(16)), list(key)))
+single = aes128_calls(lambda: AESGCM(key).encrypt(iv, plaintext, aad))
+listed = aes128_calls(lambda: AESGCM(list(key)).encrypt(list(iv), list(plaintext), list(aad)))
+batch = aes128_calls(lambda: encrypt_many([(key, iv, plaintext, aad)]))
+print(f"aes128_calls: {block}, {single}, {listed}, {batch}")
+# Should output: aes128_calls: 1, 9, 9, 9
+
+# Allocation tracing is reported while on and kept after disable()
+with instrumented(trace_allocations=True) as stats:
+    AESGCM(key).encrypt(iv, plaintext, aad)
+allocations = stats.snapshot().get("allocations")
+traced = allocations is not None and allocations["peak_bytes"] > 0
+print(f"Allocations kept: {traced}, memory gauge: {'aes_gcm_traced_memory_bytes' in stats.prometheus()}")
+# Should output: Allocations kept: True, memory gauge: True
+
+# Nothing is recorded once disabled
+before = instrumentation.snapshot()
+cipher = AESGCM(key)
+cipher.encrypt(iv, plaintext, aad)
+cipher.decrypt(iv, ciphertext, aad, mac)
+after = instrumentation.snapshot()
+print(f"Disabled: {not instrumentation.ENABLED}, nothing recorded: {before == after}")
+# Should output: Disabled: True, nothing recorded: True
+
+instrumentation.reset()
+print(f"Reset: {instrumentation.snapshot() == {'counters': {}, 'timers': {}}}, {instrumentation.prometheus() == chr(10)}")
+# Should output: Reset: True, True
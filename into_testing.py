@@ -0,0 +1,93 @@
+# test_into.py
+import random
+import tracemalloc
+from gcm import AESGCM, gcm_encrypt, encrypt_into, decrypt_into
+
+key = bytes.fromhex("feffe9928665731c6d6a8f9467308308")
+iv = bytes.fromhex("cafebabefacedbaddecaf888")
+aad = bytes.fromhex("feedfacedeadbeeffeedfacedeadbeefabaddad2")
+
+# Same output as gcm_encrypt, into a separate buffer and in place, on both engines' sizes
+rng = random.Random(25)
+match = True
+for n in [0, 1, 15, 16, 60, 1000, 3000, 40000]:
+    plaintext = rng.randbytes(n)
+    expected = gcm_encrypt(plaintext, key, iv, aad)
+
+    out, tag = bytearray(n + 7), bytearray(16)
+    written = encrypt_into(out, plaintext, key, iv, tag, aad)
+    match &= written == n and (bytes(out[:n]), bytes(tag)) == expected and out[n:] == bytes(7)
+
+    buf = bytearray(plaintext)
+    slot = memoryview(bytearray(32))[8:24]
+    encrypt_into(buf, buf, key, iv, slot, aad)
+    match &= (bytes(buf), bytes(slot)) == expected
+
+    match &= decrypt_into(buf, buf, key, iv, slot, aad) and buf == plaintext
+print(f"encrypt_into / decrypt_into match: {match}")
+# Should output: encrypt_into / decrypt_into match: True
+
+# A wrong tag leaves the buffer untouched
+ciphertext, mac = gcm_encrypt(b"pooled network buffer", key, iv)
+buf = bytearray(ciphertext)
+ok = decrypt_into(buf, buf, key, iv, bytes(16))
+print(f"Wrong tag rejected, ciphertext intact: {not ok and buf == ciphertext}")
+# Should output: Wrong tag rejected, ciphertext intact: True
+
+# Read-only output is refused
+try:
+    encrypt_into(bytes(4), b"data", key, iv, bytearray(16))
+    refused = False
+except AssertionError:
+    refused = True
+print(f"Read-only out refused: {refused}")
+# Should output: Read-only out refused: True
+
+# Steady state: memory allocated while encrypting 1 MiB into a pooled buffer
+cipher = AESGCM(key)
+data = bytearray(rng.randbytes(1 << 20))
+out, tag = bytearray(len(data)), bytearray(16)
+cipher.encrypt_into(out, iv, data, tag)
+tracemalloc.start()
+cipher.encrypt_into(out, iv, data, tag)
+_, into_peak = tracemalloc.get_traced_memory()
+tracemalloc.reset_peak()
+cipher.encrypt(iv, data)
+_, encrypt_peak = tracemalloc.get_traced_memory()
+tracemalloc.stop()
+print(f"Peak allocation bounded by the chunk: {into_peak < 16 * 16384}")
+# Should output: Peak allocation bounded by the chunk: True
+print(f"Peak allocation for 1 MiB: encrypt_into {into_peak / 1024:.0f} KiB, encrypt {encrypt_peak / 1024:.0f} KiB")
+
+# One-pass decrypt: same plaintext as verifying the tag first and decrypting
+# after (two passes), the decryption buffer itself returned, and wiped on a bad tag
+import gcm
+from gcm_auxiliary import tags_equal
+wiped = []
+wipe = gcm.wipe
+gcm.wipe = lambda buffer: (wipe(buffer), wiped.append(buffer))
+try:
+    match = True
+    for n in [0, 1, 1000, 40000]:
+        plaintext = rng.randbytes(n)
+        ciphertext, mac = cipher.encrypt(iv, plaintext, aad)
+        two_pass = cipher._ctr(memoryview(iv), memoryview(ciphertext)) if tags_equal(
+            cipher._tag(memoryview(iv), memoryview(aad), memoryview(ciphertext)), mac) else None
+        decrypted, is_valid = cipher.decrypt(iv, ciphertext, aad, mac)
+        match &= is_valid and decrypted == two_pass == plaintext and isinstance(decrypted, bytearray)
+        rejected, is_valid = cipher.decrypt(iv, ciphertext, aad, bytes(16))
+        match &= not is_valid and rejected is None
+        match &= len(wiped) == 1 and len(wiped[0]) == n and not any(wiped.pop())
+finally:
+    gcm.wipe = wipe
+print(f"One-pass decrypt matches two passes, scratch wiped on a bad tag: {match}")
+# Should output: One-pass decrypt matches two passes, scratch wiped on a bad tag: True
+
+# The plaintext is not copied out of the decryption buffer
+ciphertext, mac = cipher.encrypt(iv, data)
+tracemalloc.start()
+cipher.decrypt(iv, ciphertext, b'', mac)
+_, decrypt_peak = tracemalloc.get_traced_memory()
+tracemalloc.stop()
+print(f"Decrypt peak allocation below two copies: {decrypt_peak < 2 * len(data)}")
+# Should output: Decrypt peak allocation below two copies: True
@@ -3,13 +3,12 @@
 # one-block message
 
 from gcm import aes_gcm_encrypt, aes_gcm_decrypt
-from ghash import gcm_gf_mult
 from gcm_auxiliary import (
     hex_to_list, list_to_hex, xor_bytes, 
     int_to_list, string_to_list
 )
 from aes import aes128
-from attack_auxiliary import gf_inverse, gf_sqrt
+from attack_auxiliary import gf_inverse, gf_sqrt, gf_mul
 
 def iv_reused_attack_b():
     # Simulation of the shared key between the Bank and Alice
@@ -36,7 +35,7 @@ def iv_reused_attack_b():
     # A. Solve for H^2 = Delta_T * inv(Delta_C)
     print("[*] Calculating Multiplicative Inverse of Delta_C...")
     inv_delta_c = gf_inverse(delta_c)
-    h_squared = gcm_gf_mult(delta_t, inv_delta_c)
+    h_squared = gf_mul(delta_t, inv_delta_c)
     
     # B. Solve for H = sqrt(H^2)
     print("[*] Extracting Square Root in GF(2^128)...")
@@ -49,8 +48,8 @@ def iv_reused_attack_b():
 
     # C. Recover masking value E(J0) = T1 ^ C1*H^2 ^ L*H
     l_block = int_to_list(0, 8) + int_to_list(128, 8) 
-    ch2 = gcm_gf_mult(c1, h_squared)
-    lh = gcm_gf_mult(l_block, h)
+    ch2 = gf_mul(c1, h_squared)
+    lh = gf_mul(l_block, h)
     recovered_e_j0 = xor_bytes(xor_bytes(t1, ch2), lh)
     
     print(f"[!] Recovered Ek(J0): {list_to_hex(recovered_e_j0)}")
@@ -65,7 +64,7 @@ def iv_reused_attack_b():
     keystream = xor_bytes(known_c, string_to_list(known_p_str))
     c_forged = xor_bytes(string_to_list(p_forged), keystream)
     
-    ch2_forged = gcm_gf_mult(c_forged, h_squared)
+    ch2_forged = gf_mul(c_forged, h_squared)
     t_forged = xor_bytes(xor_bytes(ch2_forged, lh), recovered_e_j0)
     
     print(f"[*] Forged Ciphertext: {list_to_hex(c_forged)}")
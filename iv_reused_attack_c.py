@@ -3,12 +3,11 @@
 # and no larger than one-block message (<= 128 bits)
 
 from gcm import aes_gcm_encrypt, aes_gcm_decrypt
-from ghash import gcm_gf_mult
 from gcm_auxiliary import (
     hex_to_list, list_to_hex, xor_bytes, 
     int_to_list, string_to_list
 )
-from attack_auxiliary import solve_quadratic_gf2_128
+from attack_auxiliary import solve_quadratic_gf2_128, gf_mul
 
 def pad_block(data):
     """Pad data to 16 bytes (128 bits) with zeros."""
@@ -93,20 +92,20 @@ def iv_reused_attack_c():
 
     for i, h_cand in enumerate(roots):
         # 1. Recover Ek(J0) using Msg 1 and this candidate H
-        h_sq = gcm_gf_mult(h_cand, h_cand)
-        h_cu = gcm_gf_mult(h_sq, h_cand)
+        h_sq = gf_mul(h_cand, h_cand)
+        h_cu = gf_mul(h_sq, h_cand)
         
-        term_aad = gcm_gf_mult(aad_padded, h_cu)
-        term_c1  = gcm_gf_mult(c1_padded, h_sq)
-        term_l1  = gcm_gf_mult(l1_block, h_cand)
+        term_aad = gf_mul(aad_padded, h_cu)
+        term_c1  = gf_mul(c1_padded, h_sq)
+        term_l1  = gf_mul(l1_block, h_cand)
         
         sum_terms = xor_bytes(xor_bytes(term_aad, term_c1), term_l1)
         e_j0_cand = xor_bytes(t1, sum_terms)
         
         # 2. Check validity using Msg 3
-        check_aad = gcm_gf_mult(aad_padded, h_cu)
-        check_c3  = gcm_gf_mult(c3_padded, h_sq)
-        check_l3  = gcm_gf_mult(l3_block, h_cand)
+        check_aad = gf_mul(aad_padded, h_cu)
+        check_c3  = gf_mul(c3_padded, h_sq)
+        check_l3  = gf_mul(l3_block, h_cand)
         
         ghash3 = xor_bytes(xor_bytes(check_aad, check_c3), check_l3)
         t3_calculated = xor_bytes(ghash3, e_j0_cand)
@@ -148,12 +147,12 @@ def iv_reused_attack_c():
     c_forged_padded = pad_block(c_forged)
     l_forged_block = int_to_list(aad_len_bits, 8) + int_to_list(len(c_forged)*8, 8)
     
-    h_sq = gcm_gf_mult(real_h, real_h)
-    h_cu = gcm_gf_mult(h_sq, real_h)
+    h_sq = gf_mul(real_h, real_h)
+    h_cu = gf_mul(h_sq, real_h)
     
-    ghash_aad = gcm_gf_mult(aad_padded, h_cu)
-    ghash_c   = gcm_gf_mult(c_forged_padded, h_sq)
-    ghash_l   = gcm_gf_mult(l_forged_block, real_h)
+    ghash_aad = gf_mul(aad_padded, h_cu)
+    ghash_c   = gf_mul(c_forged_padded, h_sq)
+    ghash_l   = gf_mul(l_forged_block, real_h)
     
     t_forged = xor_bytes(xor_bytes(xor_bytes(ghash_aad, ghash_c), ghash_l), recovered_e_j0)
     
@@ -0,0 +1,154 @@
+"""
+Bounded LRU cache of per-key cipher contexts.
+
+Deriving a context (key expansion, H, GHASH tables) costs far more than
+encrypting a short message, so services that rotate among many keys keep the
+contexts of recently used keys:
+
+    cache = KeyCache(AESGCM, max_entries=4096, max_bytes=64 << 20)
+    with cache.context(key) as cipher:
+        ciphertext, mac = cipher.encrypt(iv, plaintext, aad)
+
+Entries are found by a keyed BLAKE2b fingerprint of the key (with a random
+per-cache salt), so raw keys are never held as dictionary keys. When either
+budget is exceeded the least recently used contexts are evicted and wiped.
+A context still in use by a context() block is wiped when that block ends.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable
+
+class _Entry:
+    __slots__ = ('cipher', 'size', 'users', 'evicted')
+
+    def __init__(self, cipher, size: int):
+        self.cipher = cipher
+        self.size = size
+        self.users = 0
+        self.evicted = False
+
+class KeyCache:
+    """
+    LRU cache of factory(key) contexts, bounded by max_entries and max_bytes
+    (as reported by the context's nbytes()). Contexts must provide nbytes()
+    and wipe(). max_entries = 0 disables caching: every context() builds a
+    fresh context and wipes it afterwards. Safe to share between threads.
+    """
+
+    def __init__(self, factory: Callable, max_entries: int = 1024, max_bytes: int = 64 << 20):
+        self.factory = factory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._salt = os.urandom(16)
+        self._entries: 'OrderedDict[bytes, _Entry]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def fingerprint(self, key) -> bytes:
+        return hashlib.blake2b(bytes(key), digest_size=16, key=self._salt).digest()
+
+    @contextmanager
+    def context(self, key):
+        """the cached context for key (built on a miss), pinned for the duration of the block"""
+        entry = self._acquire(key)
+        try:
+            yield entry.cipher
+        finally:
+            self._release(entry)
+
+    def _acquire(self, key) -> _Entry:
+        fp = self.fingerprint(key)
+        with self._lock:
+            entry = self._entries.get(fp)
+            if entry is not None:
+                self._entries.move_to_end(fp)
+                self.hits += 1
+                entry.users += 1
+                return entry
+            self.misses += 1
+        # Derive outside the lock, other keys stay served meanwhile
+        cipher = self.factory(key)
+        entry = _Entry(cipher, cipher.nbytes())
+        entry.users = 1
+        with self._lock:
+            if self.max_entries <= 0 or entry.size > self.max_bytes:
+                # Not cached: wiped when the caller is done
+                entry.evicted = True
+                return entry
+            current = self._entries.get(fp)
+            if current is not None:
+                # Another thread derived it first, keep theirs
+                entry.evicted = True
+                return entry
+            self._entries[fp] = entry
+            self.bytes += entry.size
+            self._evict()
+        return entry
+
+    def _release(self, entry: _Entry):
+        with self._lock:
+            entry.users -= 1
+            done = entry.evicted and entry.users == 0
+        if done:
+            entry.cipher.wipe()
+
+    def _evict(self):
+        """drop least recently used entries until both budgets hold (lock held)"""
+        while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            self.evictions += 1
+            self._drop(entry)
+
+    def _drop(self, entry: _Entry):
+        """forget an entry (lock held), wiping it now or when its last user is done"""
+        self.bytes -= entry.size
+        entry.evicted = True
+        if entry.users == 0:
+            entry.cipher.wipe()
+
+    def invalidate(self, key) -> bool:
+        """remove and wipe the context of key, returns whether it was cached"""
+        with self._lock:
+            entry = self._entries.pop(self.fingerprint(key), None)
+            if entry is None:
+                return False
+            self.invalidations += 1
+            self._drop(entry)
+            return True
+
+    def clear(self):
+        """remove and wipe every context"""
+        with self._lock:
+            while self._entries:
+                self._drop(self._entries.popitem()[1])
+
+    def resize(self, max_entries: int = None, max_bytes: int = None):
+        """change the budgets, evicting right away if they shrink"""
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            self._evict()
+
+    def __contains__(self, key) -> bool:
+        return self.fingerprint(key) in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"entries": len(self._entries), "bytes": self.bytes,
+                    "max_entries": self.max_entries, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / lookups if lookups else 0.0,
+                    "evictions": self.evictions, "invalidations": self.invalidations}
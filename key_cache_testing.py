@@ -0,0 +1,96 @@
+# test_key_cache.py
+import threading
+import gcm
+from gcm import AESGCM, gcm_encrypt, gcm_decrypt
+from key_cache import KeyCache
+
+keys = [bytes([i]) * 16 for i in range(8)]
+iv = bytes.fromhex("cafebabefacedbaddecaf888")
+plaintext = b"rotating data keys" * 5
+
+# Cached and fresh contexts give identical results
+cache = KeyCache(AESGCM, max_entries=4)
+match = True
+for _ in range(3):
+    for key in keys[:4]:
+        with cache.context(key) as cipher:
+            match &= cipher.encrypt(iv, plaintext) == AESGCM(key).encrypt(iv, plaintext)
+stats = cache.stats()
+print(f"Results match: {match}, hits {stats['hits']}, misses {stats['misses']}, evictions {stats['evictions']}")
+# Should output: Results match: True, hits 8, misses 4, evictions 0
+
+# The least recently used key goes first
+with cache.context(keys[0]):
+    pass
+with cache.context(keys[4]):
+    pass
+print(f"LRU eviction: {keys[0] in cache and keys[1] not in cache and len(cache) == 4}")
+# Should output: LRU eviction: True
+
+# Evicted material is zeroed
+evicted = []
+cache = KeyCache(lambda key: evicted.append(AESGCM(key)) or evicted[-1], max_entries=2)
+for key in keys[:3]:
+    with cache.context(key):
+        pass
+ctx = evicted[0]
+print(f"Evicted context wiped: {not any(ctx.round_keys) and ctx.h == 0 and not any(ctx.ghash_table.M)}")
+# Should output: Evicted context wiped: True
+
+# A context in use is only wiped when released
+with cache.context(keys[5]) as cipher:
+    cache.invalidate(keys[5])
+    still_usable = cipher.encrypt(iv, plaintext) == AESGCM(keys[5]).encrypt(iv, plaintext)
+print(f"Pinned until released: {still_usable and not any(cipher.round_keys)}")
+# Should output: Pinned until released: True
+
+# Byte budget: room for about two contexts
+size = AESGCM(keys[0]).nbytes()
+cache = KeyCache(AESGCM, max_entries=100, max_bytes=2 * size + size // 2)
+for key in keys:
+    with cache.context(key):
+        pass
+stats = cache.stats()
+print(f"Byte budget: {len(cache)} entries, within budget {stats['bytes'] <= stats['max_bytes']}")
+# Should output: Byte budget: 2 entries, within budget True
+
+cache.resize(max_entries=1)
+cache.clear()
+print(f"Cleared: {len(cache) == 0 and cache.stats()['bytes'] == 0}")
+# Should output: Cleared: True
+
+# Caching disabled: every call derives and wipes its own context
+cache = KeyCache(AESGCM, max_entries=0)
+with cache.context(keys[0]) as cipher:
+    ok = cipher.encrypt(iv, plaintext) == AESGCM(keys[0]).encrypt(iv, plaintext)
+print(f"Disabled cache: {ok and len(cache) == 0 and not any(cipher.round_keys)}")
+# Should output: Disabled cache: True
+
+# Many threads sharing one cache
+cache = KeyCache(AESGCM, max_entries=3)
+expected = {key: AESGCM(key).encrypt(iv, plaintext) for key in keys}
+errors = []
+
+def worker(n):
+    for i in range(40):
+        key = keys[(n + i) % len(keys)]
+        with cache.context(key) as cipher:
+            if cipher.encrypt(iv, plaintext) != expected[key]:
+                errors.append(key)
+threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+print(f"Threads consistent: {not errors and len(cache) <= 3}")
+# Should output: Threads consistent: True
+
+# The module-level functions go through gcm.KEY_CACHE
+gcm.KEY_CACHE.clear()
+before = gcm.KEY_CACHE.stats()
+ciphertext, mac = gcm_encrypt(plaintext, keys[0], iv)
+result, is_valid = gcm_decrypt(ciphertext, keys[0], iv, b'', mac)
+after = gcm.KEY_CACHE.stats()
+print(f"Module functions cached: {is_valid and result == plaintext}, "
+      f"misses +{after['misses'] - before['misses']}, hits +{after['hits'] - before['hits']}")
+# Should output: Module functions cached: True, misses +1, hits +1
@@ -1,5 +1,6 @@
 # Author: Fang Zihao
 from typing import List
+import instrumentation
 from confusion import byte_substitution
 from aes_auxiliary import list_xor
 
@@ -7,6 +8,8 @@ RCon = [0x01, 0x02, 0x04, 0x08, 0x10, 0x20, 0x40, 0x80, 0x1B, 0x36]
 
 def key_expansion(key: List[int]) -> List[List[int]]:
     assert len(key) == 16, 'Dimension of key is not 16'
+    if instrumentation.ENABLED:
+        instrumentation.count('key_expansions')
     result = [key.copy()]
     for i in range(10):
         nextkey = result[-1].copy()
@@ -0,0 +1,185 @@
+"""
+Precomputed keystream for senders with a deterministic IV sequence.
+
+Senders that build the IV as a fixed prefix followed by a message counter
+(the deterministic construction of NIST SP 800-38D, 8.2.1) know every IV
+ahead of time. A background thread encrypts E(J0) and the first few counter
+blocks of the upcoming IVs, so encrypting a short message only costs the XOR
+and GHASH:
+
+    with KeystreamPool(key, prefix=bytes(4)) as pool:
+        iv, ciphertext, mac = pool.encrypt(plaintext, aad)
+
+Every IV is handed out at most once, in counter order. Entries still in the
+pool when it is closed are discarded, their IVs are never used; a sender
+that restarts continues from stats()["next_counter"]. If the worker fails,
+the entries it made are still handed out, then encrypt raises its error.
+
+The worker shares the interpreter with the sender, so the gain is in moving
+the block encryptions off the send path into idle time, not in extra
+throughput.
+"""
+import struct
+import threading
+import time
+from collections import deque
+from typing import Tuple
+from gcm import AESGCM
+from gcm_auxiliary import as_buffer
+
+class KeystreamPool:
+    """
+    Pool of (IV, E(J0), keystream) for IV = prefix || counter, with counter
+    taking the remaining 12 - len(prefix) bytes, starting at start.
+
+    blocks: keystream blocks precomputed per IV (messages up to 16 * blocks
+        bytes need no block encryption at send time, longer ones compute the rest)
+    size: most entries kept ready
+    refill: the worker tops the pool back up to size once it falls to this
+        many entries (default size // 2)
+    batch: entries computed between two lock acquisitions of the worker
+    """
+
+    def __init__(self, key, prefix, start: int = 0, blocks: int = 4, size: int = 256,
+                 refill: int = None, batch: int = 16):
+        prefix = bytes(as_buffer(prefix))
+        assert len(prefix) < 12, 'The prefix must leave room for the counter in the 12-byte IV'
+        assert blocks >= 0 and size >= 1 and batch >= 1, 'blocks, size and batch must be positive'
+        self.cipher = AESGCM(key)
+        self.prefix = prefix
+        self.width = 12 - len(prefix)
+        self.blocks = blocks
+        self.size = size
+        self.refill = size // 2 if refill is None else min(refill, size - 1)
+        self.batch = batch
+        self._limit = 1 << (8 * self.width)
+        assert 0 <= start < self._limit, 'start does not fit in the counter'
+        self._next = start          # first counter not yet claimed by the worker
+        self._entries = deque()
+        self._cond = threading.Condition()
+        self._filling = True
+        self._exhausted = False
+        self._closed = False
+        self._error = None          # what stopped the worker, raised to senders once the pool is empty
+        # Statistics
+        self.issued = 0
+        self.hits = 0               # message fitted in the precomputed blocks
+        self.extended = 0           # message needed more blocks at send time
+        self.stalls = 0             # sender found the pool empty and waited
+        self.stall_seconds = 0.0
+        self.produced = 0
+        self._worker = threading.Thread(target=self._run, name='keystream-pool', daemon=True)
+        self._worker.start()
+
+    def _compute(self, counter: int) -> Tuple[bytes, int, bytes]:
+        iv = self.prefix + counter.to_bytes(self.width, 'big')
+        # J0 = IV || 1 followed by the first CTR blocks, in one run
+        stream = self.cipher._keystream(struct.unpack('>3I', iv), 1, self.blocks + 1)
+        return iv, int.from_bytes(stream[:16], 'big'), stream[16:]
+
+    def _run(self):
+        cond = self._cond
+        while True:
+            with cond:
+                while not self._closed and not self._filling:
+                    cond.wait()
+                if self._closed:
+                    return
+                if self._next >= self._limit:
+                    self._exhausted = True
+                    cond.notify_all()
+                    return
+                start = self._next
+                n = min(self.batch, self.size - len(self._entries), self._limit - start)
+                self._next += n
+            try:
+                entries = [self._compute(c) for c in range(start, start + n)]
+            except Exception as e:
+                # The counters of this batch are burned; senders waiting for it get the error
+                with cond:
+                    self._error = e
+                    cond.notify_all()
+                return
+            with cond:
+                if self._closed:
+                    return
+                self._entries.extend(entries)
+                self.produced += n
+                if len(self._entries) >= self.size:
+                    self._filling = False
+                cond.notify_all()
+
+    def _take(self, n: int) -> Tuple[bytes, int, bytes]:
+        """the next entry for an n-byte message, removed from the pool (waits for the worker when empty)"""
+        cond = self._cond
+        with cond:
+            if not self._entries:
+                self.stalls += 1
+                start = time.perf_counter()
+                while not self._entries and not self._closed and not self._exhausted and self._error is None:
+                    cond.wait()
+                self.stall_seconds += time.perf_counter() - start
+            if self._closed:
+                raise RuntimeError('Keystream pool is closed')
+            if not self._entries:
+                if self._error is not None:
+                    raise self._error
+                raise RuntimeError('IV sequence exhausted')
+            entry = self._entries.popleft()
+            self.issued += 1
+            if n <= 16 * self.blocks:
+                self.hits += 1
+            else:
+                self.extended += 1
+            if len(self._entries) <= self.refill and not self._filling:
+                self._filling = True
+                cond.notify_all()
+            return entry
+
+    def encrypt(self, plaintext, aad=b'') -> Tuple[bytes, bytes, bytes]:
+        """
+        param:
+            plaintext: (bytes-like)
+            aad: (bytes-like): Optional, Additional Authenticated Data (AAD).
+
+        return:
+            (IV, ciphertext, MAC), the same as AESGCM(key).encrypt(IV, plaintext, aad)
+        """
+        plaintext = as_buffer(plaintext)
+        aad = as_buffer(aad)
+        n = len(plaintext)
+        iv, E_J0, keystream = self._take(n)
+        cipher = self.cipher
+        if n <= len(keystream):
+            ciphertext = (int.from_bytes(plaintext, 'big') ^ int.from_bytes(keystream[:n], 'big')).to_bytes(n, 'big')
+        else:
+            k = len(keystream)
+            head = (int.from_bytes(plaintext[:k], 'big') ^ int.from_bytes(keystream, 'big')).to_bytes(k, 'big')
+            ciphertext = head + cipher._ctr(iv, plaintext[k:], 2 + self.blocks)
+        ghash = cipher.ghash_table.ghash
+        X = ghash(ghash(0, aad), ciphertext)
+        return iv, ciphertext, cipher._finish_tag(X, iv, len(aad), n, E_J0)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"available": len(self._entries), "issued": self.issued, "produced": self.produced,
+                    "hits": self.hits, "extended": self.extended, "stalls": self.stalls,
+                    "stall_ms": self.stall_seconds * 1000, "next_counter": self._next,
+                    "exhausted": self._exhausted and not self._entries}
+
+    def close(self):
+        """stop the worker, discard the remaining entries and wipe the key material"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._entries.clear()
+            self._cond.notify_all()
+        self._worker.join()
+        self.cipher.wipe()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,293 @@
+"""
+Nonce-reuse scanner for captured AES-GCM traffic.
+
+    python nonce_scanner.py capture.jsonl [more captures] [--index scan.db] [--report reuse.jsonl]
+
+JSONL captures hold one object per line with hex fields ("aad" and
+"plaintext" may be omitted, key_id is any string):
+
+    {"key_id": "k1", "iv": "...", "aad": "...", "ciphertext": "...", "tag": "...", "plaintext": "..."}
+
+Any other file (or --format binary) is a stream of binary records:
+
+    key-id length (2 bytes) | IV (12 bytes) | AAD length (4 bytes) | ciphertext length (4 bytes)
+    | tag (16 bytes) | key-id (UTF-8) | AAD | ciphertext
+
+The first pass streams every capture once and stores (hash of key-id and IV,
+capture, offset) rows in an SQLite index on disk. The second pass walks the
+hash buckets with more than one row, re-reads those records by offset and
+sends each reuse group to attack_recovery.recover_group, on a process pool
+with --workers. Memory use depends on the insert batch, max_group and the
+groups in flight, not on the size of the captures.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import struct
+import sys
+import tempfile
+import time
+from concurrent.futures import Executor
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Tuple
+from attack_recovery import Record, recover_group, recover_groups
+
+# key-id length, IV, AAD length, ciphertext length, tag
+FRAME = struct.Struct('>H12sII16s')
+
+INSERT_BATCH = 10000
+DEFAULT_MAX_GROUP = 64
+
+def bucket(key_id: str, iv: bytes) -> int:
+    """signed 64-bit hash of (key-id, IV), the index key"""
+    digest = hashlib.blake2b(key_id.encode('utf-8') + b'\0' + bytes(iv), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+# --- Record formats ---
+
+def record_from_json(obj: dict) -> Record:
+    plaintext = obj.get("plaintext")
+    return Record(str(obj["key_id"]), bytes.fromhex(obj["iv"]), bytes.fromhex(obj.get("aad", "")),
+                  bytes.fromhex(obj["ciphertext"]), bytes.fromhex(obj["tag"]),
+                  None if plaintext is None else bytes.fromhex(plaintext))
+
+def record_to_json(record: Record) -> dict:
+    obj = {"key_id": record.key_id, "iv": record.iv.hex(), "aad": record.aad.hex(),
+           "ciphertext": record.ciphertext.hex(), "tag": record.tag.hex()}
+    if record.plaintext is not None:
+        obj["plaintext"] = record.plaintext.hex()
+    return obj
+
+def write_binary(records: Iterable[Record], f: BinaryIO):
+    """append records in the binary capture format (known plaintexts are not stored)"""
+    for r in records:
+        key_id = r.key_id.encode('utf-8')
+        assert len(r.iv) == 12, 'IV must be 12 bytes in the binary format'
+        f.write(FRAME.pack(len(key_id), r.iv, len(r.aad), len(r.ciphertext), r.tag))
+        f.write(key_id + r.aad + r.ciphertext)
+
+def _index_jsonl(f: BinaryIO) -> Iterator[Tuple[int, str, bytes]]:
+    """(offset, key-id, IV) per record"""
+    offset = 0
+    for line in f:
+        if line.strip():
+            obj = json.loads(line)
+            yield offset, str(obj["key_id"]), bytes.fromhex(obj["iv"])
+        offset += len(line)
+
+def _index_binary(f: BinaryIO) -> Iterator[Tuple[int, str, bytes]]:
+    """(offset, key-id, IV) per record, AAD and ciphertext are skipped, not read"""
+    offset = 0
+    while True:
+        header = f.read(FRAME.size)
+        if not header:
+            return
+        if len(header) < FRAME.size:
+            raise ValueError(f'Truncated record at offset {offset}')
+        key_len, iv, aad_len, text_len, _ = FRAME.unpack(header)
+        key_id = f.read(key_len).decode('utf-8')
+        f.seek(aad_len + text_len, os.SEEK_CUR)
+        yield offset, key_id, iv
+        offset += FRAME.size + key_len + aad_len + text_len
+
+def _read_jsonl(f: BinaryIO, offset: int) -> Record:
+    f.seek(offset)
+    return record_from_json(json.loads(f.readline()))
+
+def _read_binary(f: BinaryIO, offset: int) -> Record:
+    f.seek(offset)
+    key_len, iv, aad_len, text_len, tag = FRAME.unpack(f.read(FRAME.size))
+    key_id = f.read(key_len).decode('utf-8')
+    aad = f.read(aad_len)
+    return Record(key_id, iv, aad, f.read(text_len), tag)
+
+_FORMATS = {"jsonl": (_index_jsonl, _read_jsonl), "binary": (_index_binary, _read_binary)}
+
+def detect_format(path: str) -> str:
+    return "jsonl" if path.endswith(('.jsonl', '.json', '.ndjson')) else "binary"
+
+# --- Scanner ---
+
+class NonceScanner:
+    """
+    On-disk (key-id, IV) index over one or more captures.
+
+    index_path keeps the SQLite index at that path (replacing an old one),
+    the default is a temporary file removed by close().
+    """
+
+    def __init__(self, index_path: str = None, max_group: int = DEFAULT_MAX_GROUP):
+        assert max_group >= 2, 'max_group must be at least 2'
+        self.max_group = max_group
+        self._temporary = index_path is None
+        if self._temporary:
+            fd, index_path = tempfile.mkstemp(suffix='.db', prefix='nonce_scan_')
+            os.close(fd)
+        self.index_path = index_path
+        self.db = sqlite3.connect(index_path)
+        # The index is scratch data, rebuilt from the captures on every run
+        self.db.execute("PRAGMA journal_mode = OFF")
+        self.db.execute("PRAGMA synchronous = OFF")
+        self.db.execute("DROP TABLE IF EXISTS records")
+        self.db.execute("CREATE TABLE records (bucket INTEGER, source INTEGER, offset INTEGER)")
+        self._indexed = False
+        self.sources: List[Tuple[str, str]] = []
+        # Throughput of the indexing pass
+        self.records = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def add(self, path: str, fmt: str = None) -> int:
+        """index one capture, returns its number of records"""
+        fmt = fmt or detect_format(path)
+        index_records, _ = _FORMATS[fmt]
+        source = len(self.sources)
+        self.sources.append((path, fmt))
+        start = time.perf_counter()
+        n = 0
+        with open(path, 'rb') as f:
+            rows = []
+            for offset, key_id, iv in index_records(f):
+                rows.append((bucket(key_id, iv), source, offset))
+                if len(rows) >= INSERT_BATCH:
+                    self.db.executemany("INSERT INTO records VALUES (?, ?, ?)", rows)
+                    n += len(rows)
+                    rows = []
+            self.db.executemany("INSERT INTO records VALUES (?, ?, ?)", rows)
+            n += len(rows)
+        self.db.commit()
+        self._indexed = False
+        self.records += n
+        self.bytes += os.path.getsize(path)
+        self.seconds += time.perf_counter() - start
+        return n
+
+    def groups(self) -> Iterator[Tuple[List[Record], int]]:
+        """
+        (records, count) per (key-id, IV) seen more than once; at most max_group
+        records are loaded, count is the full number of occurrences.
+        """
+        if not self._indexed:
+            # Built after the bulk insert, which is much faster than keeping it up to date
+            self.db.execute("CREATE INDEX IF NOT EXISTS records_bucket ON records (bucket)")
+            self._indexed = True
+        files = [open(path, 'rb') for path, _ in self.sources]
+        try:
+            rows = self.db.execute(
+                "SELECT bucket, source, offset FROM records WHERE bucket IN "
+                "(SELECT bucket FROM records GROUP BY bucket HAVING COUNT(*) > 1) "
+                "ORDER BY bucket, source, offset")
+            current = None
+            members: Dict[Tuple[str, bytes], List] = {}
+            for b, source, offset in rows:
+                if b != current:
+                    yield from self._split(members)
+                    current = b
+                    members = {}
+                record = _FORMATS[self.sources[source][1]][1](files[source], offset)
+                # A bucket may (very rarely) hold colliding (key-id, IV) pairs
+                entry = members.setdefault((record.key_id, record.iv), [[], 0])
+                if len(entry[0]) < self.max_group:
+                    entry[0].append(record)
+                entry[1] += 1
+            yield from self._split(members)
+        finally:
+            for f in files:
+                f.close()
+
+    @staticmethod
+    def _split(members: dict) -> Iterator[Tuple[List[Record], int]]:
+        for records, count in members.values():
+            if count > 1:
+                yield records, count
+
+    def report(self, workers: int = 1, executor: Executor = None) -> Iterator[dict]:
+        """
+        one JSON-ready entry per reuse group with everything recovered from it;
+        with more than one worker (or an executor) the recovery runs on a process
+        pool and entries come in completion order
+        """
+        if workers == 1 and executor is None:
+            for records, count in self.groups():
+                yield report_entry(records, count, recover_group(records))
+            return
+        # Groups waiting for their result, bounded by the tasks in flight
+        pending = {}
+
+        def remember():
+            for i, (records, count) in enumerate(self.groups()):
+                pending[i] = (records, count)
+                yield records
+        for i, result in recover_groups(remember(), workers, executor):
+            records, count = pending.pop(i)
+            yield report_entry(records, count, result)
+
+    def close(self):
+        self.db.close()
+        if self._temporary:
+            os.remove(self.index_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _hex128(x: int) -> str:
+    return x.to_bytes(16, 'big').hex()
+
+def report_entry(records: List[Record], count: int, result: dict) -> dict:
+    """recover_group result as JSON-ready values"""
+    entry = {"key_id": records[0].key_id, "iv": records[0].iv.hex(), "count": count, "case": result["case"]}
+    if "keystream" in result:
+        entry["keystream"] = result["keystream"].hex()
+        entry["plaintexts"] = [p.hex() for p in result["plaintexts"]]
+    else:
+        entry["plaintext_xor"] = result["plaintext_xor"].hex()
+    if "candidates" in result:
+        entry["candidates"] = [{"h": _hex128(h), "e_j0": _hex128(e_j0)} for h, e_j0 in result["candidates"]]
+        entry["verified"] = result["verified"]
+    if "h" in result:
+        entry["h"] = _hex128(result["h"])
+        entry["e_j0"] = _hex128(result["e_j0"])
+    if "case_d" in result:
+        entry["case_d"] = result["case_d"]
+    return entry
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Find and exploit (key-id, IV) reuse in AES-GCM captures')
+    parser.add_argument('inputs', nargs='+', help='JSONL or binary capture files')
+    parser.add_argument('--format', choices=sorted(_FORMATS), help='capture format (default: by extension)')
+    parser.add_argument('--index', help='keep the SQLite index at this path (default: temporary file)')
+    parser.add_argument('--report', help='write the JSONL report here instead of stdout')
+    parser.add_argument('--max-group', type=int, default=DEFAULT_MAX_GROUP,
+                        help='records loaded per reuse group for recovery')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='processes solving reuse groups (1 = serial)')
+    args = parser.parse_args(argv)
+
+    out = open(args.report, 'w') if args.report else sys.stdout
+    try:
+        with NonceScanner(args.index, max(args.max_group, 2)) as scanner:
+            for path in args.inputs:
+                scanner.add(path, args.format)
+            rate = scanner.records / scanner.seconds if scanner.seconds > 0 else float('inf')
+            print(f"indexed {scanner.records} records ({scanner.bytes / 1e6:.1f} MB) in {scanner.seconds:.3f} s "
+                  f"({rate:.0f} records/s, {scanner.bytes / max(scanner.seconds, 1e-9) / 1e6:.2f} MB/s)",
+                  file=sys.stderr)
+            start = time.perf_counter()
+            groups = recovered = 0
+            for entry in scanner.report(max(args.workers, 1)):
+                out.write(json.dumps(entry) + "\n")
+                groups += 1
+                recovered += "h" in entry
+            print(f"found {groups} reuse groups, H recovered in {recovered}, "
+                  f"in {time.perf_counter() - start:.3f} s", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
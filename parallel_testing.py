@@ -0,0 +1,60 @@
+# test_parallel.py
+import os
+import random
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from gcm import gcm_encrypt, gcm_decrypt
+from gcm_parallel import parallel_encrypt, parallel_decrypt
+
+def parallel_test():
+    key = bytes.fromhex("feffe9928665731c6d6a8f9467308308")
+    iv = bytes.fromhex("cafebabefacedbaddecaf888")
+    aad = bytes.fromhex("feedfacedeadbeeffeedfacedeadbeefabaddad2")
+    rng = random.Random(7)
+
+    match = True
+    for n in (1, 16, 1000, 65537):
+        plaintext = rng.randbytes(n)
+        serial = gcm_encrypt(plaintext, key, iv, aad)
+        parallel = parallel_encrypt(plaintext, key, iv, aad, workers=3, min_bytes=0)
+        match &= serial == parallel
+        match &= parallel_decrypt(parallel[0], key, iv, aad, parallel[1], workers=3, min_bytes=0) \
+            == gcm_decrypt(serial[0], key, iv, aad, serial[1])
+    print(f"Parallel matches serial: {match}")
+    # Should output: Parallel matches serial: True
+
+    _, is_valid = parallel_decrypt(parallel[0], key, iv, aad, bytes(16), workers=3, min_bytes=0)
+    print(f"Wrong tag rejected: {not is_valid}")
+    # Should output: Wrong tag rejected: True
+
+    # workers sets the shard count with a passed executor too; without it
+    # the count is os.cpu_count(), whatever the size of the executor
+    class CountingPool(ProcessPoolExecutor):
+        def submit(self, *args, **kwargs):
+            self.submitted += 1
+            return super().submit(*args, **kwargs)
+    plaintext = rng.randbytes(1000)
+    with CountingPool(max_workers=2) as pool:
+        pool.submitted = 0
+        encrypted = parallel_encrypt(plaintext, key, iv, aad, workers=3, min_bytes=0, executor=pool)
+        shards = pool.submitted
+        decrypted = parallel_decrypt(encrypted[0], key, iv, aad, encrypted[1], min_bytes=0, executor=pool)
+    cpus = os.cpu_count() or 1
+    match = encrypted == gcm_encrypt(plaintext, key, iv, aad) and decrypted == (plaintext, True)
+    counted = shards == 3 and pool.submitted == 3 + (cpus if cpus > 1 else 0)
+    print(f"Shard counts: {counted}, matches serial: {match}")
+    # Should output: Shard counts: True, matches serial: True
+
+    # Any Executor works, its size is never looked up
+    class InlineExecutor(Executor):
+        def submit(self, fn, *args, **kwargs):
+            future = Future()
+            future.set_result(fn(*args, **kwargs))
+            return future
+    encrypted = parallel_encrypt(plaintext, key, iv, aad, workers=4, min_bytes=0, executor=InlineExecutor())
+    decrypted = parallel_decrypt(encrypted[0], key, iv, aad, encrypted[1], min_bytes=0, executor=InlineExecutor())
+    match = encrypted == gcm_encrypt(plaintext, key, iv, aad) and decrypted == (plaintext, True)
+    print(f"Executor of unknown size: {match}")
+    # Should output: Executor of unknown size: True
+
+if __name__ == "__main__":
+    parallel_test()
@@ -0,0 +1,61 @@
+"""
+Products of polynomials over GF(2^128) on NumPy.
+
+The same Kronecker substitution as attack_auxiliary._mul_kronecker: every
+coefficient gets a 256-bit slot, one array element per bit, and a
+convolution of the two bit arrays counts the terms of every bit of the
+unreduced coefficient products. The convolution is a float64 FFT, exact
+after rounding while the counts stay far below 2^53 (at most 128 times the
+shorter length). Requires NumPy; attack_auxiliary imports this module only
+for operands long enough to use it.
+"""
+from typing import List
+import numpy as np
+from ghash import _reduce256
+
+# Coefficient bits per slot: 128 input bits, room for the 255-bit product
+SLOT = 256
+
+
+def fft_length(n: int) -> int:
+    """
+    FFT length for a product of n coefficients: the smallest 2^k, 3 * 2^k or
+    5 * 2^k that holds the bits (as fast per point as powers of 2), always a
+    multiple of SLOT so that products mod x^(size / SLOT) - 1 keep whole slots
+    """
+    return min(m << max(8, (-(-SLOT * n // m) - 1).bit_length()) for m in (1, 3, 5))
+
+
+def _bits(p: List[int]) -> np.ndarray:
+    """one float per bit, coefficient i in slot i, x^0 of the field element first"""
+    raw = np.frombuffer(b''.join([c.to_bytes(16, 'big') for c in p]), dtype=np.uint8).reshape(-1, 16)
+    bits = np.zeros((len(p), SLOT), dtype=np.float64)
+    bits[:, :128] = np.unpackbits(raw, axis=1)
+    return bits.ravel()
+
+
+def transform(p: List[int], size: int) -> np.ndarray:
+    """spectrum of p for products of FFT length size, reusable for a fixed operand"""
+    return np.fft.rfft(_bits(p), size)
+
+
+def _coefficients(spectrum: np.ndarray, size: int, n: int) -> List[int]:
+    counts = np.fft.irfft(spectrum, size)[:SLOT * n]
+    parity = (np.rint(counts).astype(np.int64) & 1).astype(np.uint8).reshape(n, SLOT)
+    packed = np.packbits(parity, axis=1).tobytes()
+    return [_reduce256(int.from_bytes(packed[i:i + 32], 'big')) for i in range(0, 32 * n, 32)]
+
+
+def mul_transformed(a: List[int], b_spectrum: np.ndarray, size: int, n: int) -> List[int]:
+    """
+    the first n coefficients of a * b mod x^(size / SLOT) - 1, for
+    b_spectrum = transform(b, size); the product itself when size covers it
+    """
+    return _coefficients(transform(a, size) * b_spectrum, size, n)
+
+
+def mul(a: List[int], b: List[int]) -> List[int]:
+    """untrimmed product (len(a) + len(b) - 1 coefficients) of non-empty a and b"""
+    n = len(a) + len(b) - 1
+    size = fft_length(n)
+    return mul_transformed(a, transform(b, size), size, n)
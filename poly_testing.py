@@ -0,0 +1,101 @@
+# test_poly.py
+import random
+import time
+import gf128
+import attack_auxiliary
+from attack_auxiliary import (
+    poly_add, poly_mul, poly_square, poly_divmod, poly_powmod, poly_gcd, poly_gcd_many,
+    poly_eval, poly_monic, poly_roots, poly_trim, PolyModulus
+)
+
+rng = random.Random(19)
+
+def random_poly(n):
+    return poly_trim([rng.getrandbits(128) for _ in range(n)]) or [gf128.ONE]
+
+def schoolbook(a, b):
+    out = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        for j, y in enumerate(b):
+            out[i + j] ^= gf128.mul(x, y)
+    return poly_trim(out)
+
+def euclid(a, b):
+    while b:
+        a, b = b, poly_divmod(a, b)[1]
+    return poly_monic(a)
+
+# Multiplication on both sides of the Karatsuba, Kronecker and FFT thresholds,
+# with and without NumPy
+match = True
+engine = attack_auxiliary._load_fft_engine()
+for n, m in ((1, 1), (3, 20), (8, 9), (16, 17), (40, 90), (64, 64), (150, 130), (300, 20)):
+    a, b = random_poly(n), random_poly(m)
+    expected = schoolbook(a, b)
+    match &= poly_mul(a, b) == expected
+    attack_auxiliary._fft_engine = None
+    match &= poly_mul(a, b) == expected
+    attack_auxiliary._fft_engine = engine
+a = random_poly(50)
+match &= poly_square(a) == schoolbook(a, a)
+print(f"poly_mul matches schoolbook: {match}")
+# Should output: poly_mul matches schoolbook: True
+
+# Division, reduction (long and Newton) and modular powering
+match = True
+for n in (5, 100, 300):
+    f, a = random_poly(n + 1), random_poly(2 * n)
+    q, r = poly_divmod(a, f)
+    match &= poly_add(poly_mul(q, f), r) == a and len(r) < len(f)
+    mod = PolyModulus(f)
+    match &= poly_divmod(a, mod.f)[1] == mod.reduce(a)
+    b = random_poly(n)
+    expected = [gf128.ONE]
+    for _ in range(11):
+        expected = poly_divmod(poly_mul(expected, b), f)[1]
+    match &= poly_powmod(b, 11, mod) == expected
+print(f"poly_divmod and poly_powmod are consistent: {match}")
+# Should output: poly_divmod and poly_powmod are consistent: True
+
+# gcd and roots: plant roots in a random polynomial
+roots = sorted(rng.getrandbits(128) for _ in range(5))
+planted = [gf128.ONE]
+for r in roots:
+    planted = poly_mul(planted, [r, gf128.ONE])
+f = poly_mul(planted, random_poly(30))
+g = poly_mul(planted, random_poly(40))
+found = poly_roots(f)
+match = set(roots) <= set(found) and all(poly_eval(f, x) == 0 for x in found)
+match &= poly_gcd(f, g) == planted and poly_gcd_many([f, g, poly_mul(planted, random_poly(7))]) == planted
+print(f"poly_gcd and poly_roots find the planted roots: {match}")
+# Should output: poly_gcd and poly_roots find the planted roots: True
+
+# Half-gcd steps against Euclid's algorithm, around HGCD_THRESHOLD and far above it
+match = True
+for n, m, k in ((20, 15, 3), (40, 30, 1), (100, 99, 7), (200, 33, 40), (301, 150, 1), (400, 400, 90)):
+    common = random_poly(k + 1)
+    a, b = poly_mul(random_poly(n), common), poly_mul(random_poly(m), common)
+    match &= poly_gcd(a, b) == poly_gcd(b, a) == euclid(a, b)
+print(f"poly_gcd matches Euclid: {match}")
+# Should output: poly_gcd matches Euclid: True
+
+def degree_2000_test():
+    # The tag polynomials of 2000-block messages: gcd and roots within seconds
+    # (with NumPy, the pure-Python products are several times slower)
+    if engine is None:
+        print("NumPy is not installed, degree 2000 timing skipped")
+        return
+    f = poly_mul(planted, random_poly(1996))
+    g = poly_mul(planted, random_poly(1996))
+    start = time.perf_counter()
+    common = poly_gcd(f, g)
+    gcd_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    found = poly_roots(f)
+    roots_seconds = time.perf_counter() - start
+    match = common == planted and set(roots) <= set(found) and all(poly_eval(f, x) == 0 for x in found)
+    print(f"Degree 2000 gcd and roots: {match}, within 10 s and 40 s: {gcd_seconds < 10 and roots_seconds < 40}")
+    print(f"    gcd {gcd_seconds:.1f} s, roots {roots_seconds:.1f} s")
+
+degree_2000_test()
+# Should output: Degree 2000 gcd and roots: True, within 10 s and 40 s: True
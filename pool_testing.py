@@ -0,0 +1,100 @@
+# test_keystream_pool.py
+import random
+import threading
+import time
+from gcm import AESGCM
+from keystream_pool import KeystreamPool
+
+key = bytes.fromhex("feffe9928665731c6d6a8f9467308308")
+prefix = bytes.fromhex("cafebabe")
+cipher = AESGCM(key)
+
+# Pool output equals AESGCM.encrypt with the handed-out IV, short and long messages
+rng = random.Random(7)
+with KeystreamPool(key, prefix, start=1000, blocks=4, size=32) as pool:
+    ivs = []
+    match = True
+    for _ in range(200):
+        plaintext = rng.randbytes(rng.choice([0, 5, 16, 64, rng.randrange(65, 300)]))
+        aad = rng.randbytes(rng.randrange(20))
+        iv, ciphertext, mac = pool.encrypt(plaintext, aad)
+        ivs.append(iv)
+        match &= (ciphertext, mac) == cipher.encrypt(iv, plaintext, aad)
+    stats = pool.stats()
+print(f"Pool matches AESGCM.encrypt: {match}")
+# Should output: Pool matches AESGCM.encrypt: True
+expected = [prefix + c.to_bytes(8, 'big') for c in range(1000, 1200)]
+print(f"IVs sequential and unique: {ivs == expected}")
+# Should output: IVs sequential and unique: True
+print(f"Hits and extended counted: {stats['hits'] + stats['extended'] == 200 and stats['extended'] > 0}")
+# Should output: Hits and extended counted: True
+
+# Idle time refills the pool, so sends do not stall
+with KeystreamPool(key, prefix, size=64) as pool:
+    time.sleep(0.2)
+    for _ in range(30):
+        pool.encrypt(b"x" * 48)
+    print(f"No stalls after warm-up: {pool.stats()['stalls'] == 0}")
+    # Should output: No stalls after warm-up: True
+
+# A 1-byte counter runs out after 256 IVs and is never reused
+with KeystreamPool(key, bytes(11), start=250, size=4) as pool:
+    ivs = [pool.encrypt(b"m")[0] for _ in range(6)]
+    try:
+        pool.encrypt(b"m")
+        exhausted = False
+    except RuntimeError:
+        exhausted = True
+print(f"Counter exhaustion: {exhausted and [iv[-1] for iv in ivs] == list(range(250, 256))}")
+# Should output: Counter exhaustion: True
+
+# A failing worker does not leave the sender waiting: the entries made before
+# the failure are used, then encrypt raises the worker's error
+class FailingPool(KeystreamPool):
+    def _compute(self, counter):
+        if counter == 3:
+            raise ValueError("worker failed")
+        return super()._compute(counter)
+
+outcome = []
+def send_all(pool):
+    try:
+        for _ in range(5):
+            pool.encrypt(b"m")
+            outcome.append("sent")
+    except ValueError as e:
+        outcome.append(str(e))
+with FailingPool(key, prefix, size=8, batch=1) as pool:
+    sender = threading.Thread(target=send_all, args=(pool,), daemon=True)
+    sender.start()
+    sender.join(10)
+print(f"Worker error raised to the sender: {outcome == ['sent'] * 3 + ['worker failed']}")
+# Should output: Worker error raised to the sender: True
+
+# Closing burns the remaining entries; a restart continues after them
+pool = KeystreamPool(key, prefix, size=16)
+first = pool.encrypt(b"a")[0]
+time.sleep(0.05)
+pool.close()
+restart = KeystreamPool(key, prefix, start=pool.stats()["next_counter"])
+second = restart.encrypt(b"b")[0]
+restart.close()
+print(f"Restart skips burned IVs: {int.from_bytes(second[4:], 'big') > int.from_bytes(first[4:], 'big') + 1}")
+# Should output: Restart skips burned IVs: True
+
+# Latency of a 64-byte send: pool vs computing E(J0) and CTR at send time
+plaintext = bytes(64)
+with KeystreamPool(key, prefix, blocks=4, size=2048) as pool:
+    time.sleep(1)
+    n = 1000
+    start = time.perf_counter()
+    for _ in range(n):
+        pool.encrypt(plaintext)
+    pooled = (time.perf_counter() - start) / n
+    stalls = pool.stats()['stalls']
+iv = prefix + bytes(8)
+start = time.perf_counter()
+for _ in range(n):
+    cipher.encrypt(iv, plaintext)
+direct = (time.perf_counter() - start) / n
+print(f"64-byte message: pool {pooled * 1e6:.0f} us, direct {direct * 1e6:.0f} us, {stalls} stalls")
@@ -0,0 +1,100 @@
+# test_scanner.py
+import os
+import random
+import tempfile
+import json
+from gcm import AESGCM
+from t_table import encrypt_bytes
+import attack_recovery
+from attack_recovery import Record, recover_group
+from nonce_scanner import NonceScanner, record_to_json, report_entry, write_binary
+
+rng = random.Random(17)
+keys = {f"k{i}": rng.randbytes(16) for i in range(4)}
+
+def capture(key_id, iv, plaintext, aad=b'', known=False):
+    ciphertext, tag = AESGCM(keys[key_id]).encrypt(iv, plaintext, aad)
+    return Record(key_id, iv, aad, ciphertext, tag, plaintext if known else None)
+
+iv_b, iv_c, iv_a = rng.randbytes(12), rng.randbytes(12), rng.randbytes(12)
+records = [capture(rng.choice(sorted(keys)), rng.randbytes(12), rng.randbytes(rng.randrange(64)))
+           for _ in range(2000)]
+records += [
+    # Case B: two one-block messages, same length and AAD
+    capture("k0", iv_b, b"Pay David $1000 "), capture("k0", iv_b, b"Pay Bob   $2000 "),
+    # Case C: different lengths, a third message picks the root
+    capture("k1", iv_c, b"Pay David $100", b"BankProtocol:v1"),
+    capture("k1", iv_c, b"Pay Bob   $2000 ", b"BankProtocol:v1"),
+    capture("k1", iv_c, b"Balance Query", b"BankProtocol:v1"),
+    # Case A: long messages, one plaintext known; case D recovers H from the tag polynomials
+    capture("k2", iv_a, b"A" * 40, known=True), capture("k2", iv_a, b"Transfer all funds to account 42"),
+    capture("k2", iv_a, b"Transfer half of the funds to account 7", b"BankProtocol:v1"),
+    # Same IV under a different key is not reuse
+    capture("k3", iv_b, b"Pay Carol $3000 "),
+]
+rng.shuffle(records)
+
+def expected(key_id, iv):
+    cipher = AESGCM(keys[key_id])
+    return cipher.h, int.from_bytes(encrypt_bytes(iv + b'\0\0\0\1', cipher.round_keys), 'big')
+
+def scanner_test():
+    with tempfile.TemporaryDirectory() as tmp:
+        jsonl = os.path.join(tmp, "capture.jsonl")
+        with open(jsonl, "w") as f:
+            for r in records:
+                f.write(json.dumps(record_to_json(r)) + "\n")
+        binary = os.path.join(tmp, "capture.bin")
+        with open(binary, "wb") as f:
+            write_binary(records, f)
+
+        for path in (jsonl, binary):
+            with NonceScanner() as scanner:
+                scanner.add(path)
+                report = {entry["key_id"]: entry for entry in scanner.report()}
+            ok = sorted(report) == ["k0", "k1", "k2"] and scanner.records == len(records)
+            for key_id, iv, case in (("k0", iv_b, "B"), ("k1", iv_c, "C"), ("k2", iv_a, "D")):
+                h, e_j0 = expected(key_id, iv)
+                entry = report[key_id]
+                ok &= entry["case"] == case and entry["h"] == f"{h:032x}" and entry["e_j0"] == f"{e_j0:032x}"
+            if path == jsonl:
+                ok &= b"Transfer all funds to account 42" in [bytes.fromhex(p) for p in report["k2"]["plaintexts"]]
+            print(f"{os.path.splitext(path)[1]} scan finds every reuse group and recovers H: {ok}")
+            # Should output: .jsonl scan finds every reuse group and recovers H: True
+            #                .bin scan finds every reuse group and recovers H: True
+
+        # The same groups recovered on a process pool, streamed in completion order
+        with NonceScanner() as scanner:
+            scanner.add(binary)
+            serial = sorted(json.dumps(entry) for entry in scanner.report())
+            parallel = sorted(json.dumps(entry) for entry in scanner.report(workers=2))
+        print(f"Parallel recovery matches serial: {parallel == serial}")
+        # Should output: Parallel recovery matches serial: True
+
+def limits_test():
+    # Case D beyond its limits is reported as skipped instead of silently missing
+    limit = attack_recovery.POLY_MAX_DEGREE
+    iv = rng.randbytes(12)
+    long_group = [capture("k0", iv, rng.randbytes(16 * limit + 100)) for _ in range(2)]
+    result = recover_group(long_group)
+    degree = limit + 8      # limit + 7 ciphertext blocks and the length block
+    skipped = result.get("case_d") == f"skipped: degree {degree} > {limit}" and "h" not in result
+    entry = report_entry(long_group, 2, result)
+    print(f"Long polynomials reported: {skipped}, {entry.get('case_d') == result.get('case_d')}")
+    # Should output: Long polynomials reported: True, True
+
+    short_group = [capture("k1", iv, rng.randbytes(40)), capture("k1", iv, rng.randbytes(40))]
+    root_limit = attack_recovery.ROOT_MAX_DEGREE
+    attack_recovery.ROOT_MAX_DEGREE = 2
+    try:
+        result = recover_group(short_group)
+    finally:
+        attack_recovery.ROOT_MAX_DEGREE = root_limit
+    # A single pair: the gcd is the tag polynomial, degree 3 ciphertext blocks + 1
+    skipped = result.get("case_d") == "skipped: gcd degree 4 > 2"
+    print(f"High gcd reported: {skipped}, found within the limit: {'case_d' not in recover_group(short_group)}")
+    # Should output: High gcd reported: True, found within the limit: True
+
+if __name__ == "__main__":
+    scanner_test()
+    limits_test()
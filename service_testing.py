@@ -0,0 +1,85 @@
+# test_service.py
+import asyncio
+import random
+from gcm import gcm_encrypt, gcm_decrypt
+from aead_service import ENCRYPT, AEADService, AEADClient, serve
+
+rng = random.Random(20)
+key = rng.randbytes(16)
+records = [(rng.randbytes(12), rng.randbytes(rng.randrange(100)), rng.randbytes(rng.randrange(20)))
+           for _ in range(200)]
+
+async def service_test():
+    async with AEADService(workers=2, max_batch=32) as service:
+        results = await asyncio.gather(*[service.encrypt(key, iv, p, aad) for iv, p, aad in records])
+        match = results == [gcm_encrypt(p, key, iv, aad) for iv, p, aad in records]
+        decrypted = await asyncio.gather(*[service.decrypt(key, iv, c, aad, mac)
+                                           for (iv, _, aad), (c, mac) in zip(records, results)])
+        match &= [p for p, _ in decrypted] == [p for _, p, _ in records]
+        match &= await service.decrypt(key, records[0][0], results[0][0], records[0][2], bytes(16)) == (None, False)
+        stats = service.stats()
+        print(f"Service matches gcm_encrypt / gcm_decrypt: {match}")
+        # Should output: Service matches gcm_encrypt / gcm_decrypt: True
+        print(f"Concurrent requests are batched: {stats['mean_batch'] > 1 and stats['requests'] == 401}")
+        # Should output: Concurrent requests are batched: True
+
+        # A malformed request fails alone, the rest of its batch still succeeds
+        calls = [service.encrypt(key, iv, p, aad) for iv, p, aad in records[:5]]
+        calls.append(service.encrypt(key, bytes(8), b"short IV"))
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        isolated = results[:5] == [gcm_encrypt(p, key, iv, aad) for iv, p, aad in records[:5]]
+        print(f"Bad request isolated: {isolated and isinstance(results[5], ValueError)}")
+        # Should output: Bad request isolated: True
+
+        # A record failing inside the worker (past the checks) only reaches its own caller
+        results = await asyncio.gather(service.encrypt(key, records[0][0], records[0][1]),
+                                       service._submit(ENCRYPT, (key, bytes(8), b"x", b"")),
+                                       return_exceptions=True)
+        print(f"Worker error isolated: {results[0] == gcm_encrypt(records[0][1], key, records[0][0])}"
+              f", {isinstance(results[1], Exception)}")
+        # Should output: Worker error isolated: True, True
+
+        server = await serve(service)
+        host, port = server.sockets[0].getsockname()[:2]
+        async with server:
+            client = await AEADClient.connect(host, port)
+            iv, plaintext, aad = records[1]
+            ciphertext, mac = await client.encrypt(key, iv, plaintext, aad)
+            match = (ciphertext, mac) == gcm_encrypt(plaintext, key, iv, aad)
+            match &= await client.decrypt(key, iv, ciphertext, aad, mac) == (plaintext, True)
+            match &= await client.decrypt(key, iv, ciphertext, aad, bytes(16)) == gcm_decrypt(
+                ciphertext, key, iv, aad, bytes(16))
+            await client.close()
+        print(f"Socket round trip matches: {match}")
+        # Should output: Socket round trip matches: True
+
+    # Closing while a batch is still being collected fails its requests instead of leaving them waiting
+    service = AEADService(workers=1, max_delay=0.5)
+    await service.start()
+    calls = [asyncio.create_task(service.encrypt(key, iv, p, aad)) for iv, p, aad in records[:3]]
+    await asyncio.sleep(0.05)
+    await service.close()
+    results = await asyncio.wait_for(asyncio.gather(*calls, return_exceptions=True), 5)
+    print(f"Close fails collected requests: {all(isinstance(r, RuntimeError) for r in results)}")
+    # Should output: Close fails collected requests: True
+
+    # A request reaching a closed service gets an error reply, the connection stays usable
+    service = AEADService(workers=1)
+    await service.start()
+    server = await serve(service)
+    host, port = server.sockets[0].getsockname()[:2]
+    async with server:
+        client = await AEADClient.connect(host, port)
+        await service.close()
+        replies = []
+        for _ in range(2):
+            try:
+                await client.encrypt(key, *records[0][:2])
+            except RuntimeError as e:
+                replies.append(str(e))
+        await client.close()
+    print(f"Closed service answers: {replies == ['Server error'] * 2}")
+    # Should output: Closed service answers: True
+
+if __name__ == "__main__":
+    asyncio.run(service_test())
@@ -0,0 +1,63 @@
+# test_solver.py
+import random
+import gf128
+from attack_auxiliary import (_batch_inverse, build_linear_map_matrix, list_to_int, solve_linear_system_gf2,
+                              solve_quadratic_gf2_128, solve_quadratic_gf2_128_batch, solve_trace_equation)
+from gcm_auxiliary import int_to_list
+
+rng = random.Random(20128)
+
+def is_root(a: int, b: int, c: int, x: int) -> bool:
+    return gf128.mul(a, gf128.mul(x, x)) ^ gf128.mul(b, x) ^ c == 0
+
+def transpose(columns):
+    """rows of the matrix whose columns are given (bit 127 - i is entry i)"""
+    return [sum(((c >> (127 - r)) & 1) << (127 - i) for i, c in enumerate(columns)) for r in range(128)]
+
+# Cached trace solver against Gaussian elimination on the matrix of z^2 + z,
+# whose columns are the images of the basis from build_linear_map_matrix
+matrix = transpose(build_linear_map_matrix())
+ks = [0, 1, gf128.ONE, (1 << 128) - 1] + [rng.getrandbits(128) for _ in range(100)]
+match = True
+solvable = 0
+for k in ks:
+    z = solve_trace_equation(k)
+    expected = solve_linear_system_gf2(matrix, k)
+    match &= (z is None) == (expected is None)
+    if z is not None:
+        solvable += 1
+        # Both roots z and z + 1 are valid, either may be returned
+        match &= gf128.mul(z, z) ^ z == k and z in (expected, expected ^ gf128.ONE)
+print(f"solve_trace_equation matches solve_linear_system_gf2: {match}, {0 < solvable < len(ks)}")
+# Should output: solve_trace_equation matches solve_linear_system_gf2: True, True
+
+# Montgomery batch inversion against one inversion per element, zeros included
+values = [rng.getrandbits(128) for _ in range(50)]
+values[3] = values[17] = values[-1] = 0
+match = _batch_inverse(values) == [gf128.inverse(v) for v in values]
+match &= _batch_inverse([]) == [] and _batch_inverse([0, 0]) == [0, 0]
+match &= _batch_inverse([gf128.ONE]) == [gf128.ONE]
+print(f"_batch_inverse matches gf128.inverse: {match}")
+# Should output: _batch_inverse matches gf128.inverse: True
+
+# Batch quadratic solver against the per-triple solver, degenerate triples included
+zero = [0] * 16
+def element():
+    return int_to_list(rng.getrandbits(128), 16)
+triples = [(element(), element(), element()) for _ in range(200)]
+triples += [(zero, element(), element()),     # a = 0: linear
+            (zero, zero, element()),          # a = b = 0: no root
+            (element(), zero, element()),     # b = 0: square root
+            (element(), zero, zero),          # b = c = 0: x = 0
+            (zero, zero, zero)]               # all zero
+batch = solve_quadratic_gf2_128_batch(triples)
+match = batch == [solve_quadratic_gf2_128(*t) for t in triples]
+valid = True
+for (a, b, c), roots in zip(triples, batch):
+    a, b, c = list_to_int(a), list_to_int(b), list_to_int(c)
+    valid &= all(is_root(a, b, c, list_to_int(x)) for x in roots)
+counts = [len(roots) for roots in batch[-5:]]
+print(f"Batch matches per triple: {match}, roots valid: {valid}, degenerate root counts: {counts}")
+# Should output: Batch matches per triple: True, roots valid: True, degenerate root counts: [1, 0, 1, 1, 0]
+print(f"Empty batch: {solve_quadratic_gf2_128_batch([]) == []}")
+# Should output: Empty batch: True
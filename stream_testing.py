@@ -0,0 +1,38 @@
+# test_stream.py
+import random
+from gcm import AESGCM
+
+key = bytes.fromhex("feffe9928665731c6d6a8f9467308308")
+iv = bytes.fromhex("cafebabefacedbaddecaf888")
+cipher = AESGCM(key)
+
+# Streaming in random chunk sizes must match the one-shot functions
+rng = random.Random(5)
+match = True
+for _ in range(100):
+    plaintext = rng.randbytes(rng.randrange(300))
+    aad = rng.randbytes(rng.randrange(60))
+    ciphertext, mac = cipher.encrypt(iv, plaintext, aad)
+
+    enc = cipher.encryptor(iv)
+    for i in range(0, len(aad), 7):
+        enc.update_aad(aad[i:i+7])
+    out = b''
+    i = 0
+    while i < len(plaintext):
+        step = rng.randrange(1, 40)
+        out += enc.update(plaintext[i:i+step])
+        i += step
+    match &= out == ciphertext and enc.finalize() == mac
+
+    dec = cipher.decryptor(iv)
+    dec.update_aad(aad)
+    out = b''.join(dec.update(ciphertext[i:i+13]) for i in range(0, len(ciphertext), 13))
+    match &= out == plaintext and dec.finalize(mac)
+print(f"Streaming matches one-shot: {match}")
+# Should output: Streaming matches one-shot: True
+
+dec = cipher.decryptor(iv)
+dec.update(ciphertext)
+print(f"Wrong tag rejected: {not dec.finalize(bytes(16))}")
+# Should output: Wrong tag rejected: True
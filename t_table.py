@@ -0,0 +1,86 @@
+import struct
+from typing import List, Tuple
+from confusion import SBOX
+from diffusion import gf_mul
+from key_expansion import key_expansion
+
+# One block as four big-endian 32-bit column words
+_BLOCK = struct.Struct('>4I')
+
+# T-tables: each entry folds SubBytes and MixColumns for one byte of a column,
+# ShiftRows is handled by picking the source column when the tables are indexed.
+# A column is a 32-bit big-endian word (row 0 in the most significant byte).
+TE0 = []
+TE1 = []
+TE2 = []
+TE3 = []
+# Final round table (no MixColumns): S-box value replicated in every byte
+TE4 = []
+
+for _x in range(256):
+    _s = SBOX[_x]
+    _s2 = gf_mul(2, _s)
+    _s3 = gf_mul(3, _s)
+    _t = (_s2 << 24) | (_s << 16) | (_s << 8) | _s3
+    TE0.append(_t)
+    TE1.append(((_t >> 8) | (_t << 24)) & 0xFFFFFFFF)
+    TE2.append(((_t >> 16) | (_t << 16)) & 0xFFFFFFFF)
+    TE3.append(((_t >> 24) | (_t << 8)) & 0xFFFFFFFF)
+    TE4.append(_s * 0x01010101)
+
+
+def round_key_words(key: List[int]) -> List[int]:
+    """
+    Expand an AES-128 key (list of ints or bytes-like) into 44 round key words
+    (11 round keys x 4 columns).
+    """
+    words = []
+    for round_key in key_expansion(list(bytes(key))):
+        for c in range(4):
+            words.append(int.from_bytes(bytes(round_key[4*c:4*c + 4]), 'big'))
+    return words
+
+
+def encrypt_words(s0: int, s1: int, s2: int, s3: int, rk: List[int]) -> Tuple[int, int, int, int]:
+    """
+    Encrypt one block held as four 32-bit column words with expanded round key words.
+    """
+    te0, te1, te2, te3 = TE0, TE1, TE2, TE3
+    # Add round key
+    s0 ^= rk[0]
+    s1 ^= rk[1]
+    s2 ^= rk[2]
+    s3 ^= rk[3]
+    for r in range(4, 40, 4):
+        # SubBytes + ShiftRows + MixColumns + AddRoundKey
+        t0 = te0[s0 >> 24] ^ te1[(s1 >> 16) & 0xFF] ^ te2[(s2 >> 8) & 0xFF] ^ te3[s3 & 0xFF] ^ rk[r]
+        t1 = te0[s1 >> 24] ^ te1[(s2 >> 16) & 0xFF] ^ te2[(s3 >> 8) & 0xFF] ^ te3[s0 & 0xFF] ^ rk[r + 1]
+        t2 = te0[s2 >> 24] ^ te1[(s3 >> 16) & 0xFF] ^ te2[(s0 >> 8) & 0xFF] ^ te3[s1 & 0xFF] ^ rk[r + 2]
+        t3 = te0[s3 >> 24] ^ te1[(s0 >> 16) & 0xFF] ^ te2[(s1 >> 8) & 0xFF] ^ te3[s2 & 0xFF] ^ rk[r + 3]
+        s0, s1, s2, s3 = t0, t1, t2, t3
+    # Final round: SubBytes + ShiftRows + AddRoundKey
+    te4 = TE4
+    t0 = ((te4[s0 >> 24] & 0xFF000000) ^ (te4[(s1 >> 16) & 0xFF] & 0x00FF0000)
+          ^ (te4[(s2 >> 8) & 0xFF] & 0x0000FF00) ^ (te4[s3 & 0xFF] & 0x000000FF) ^ rk[40])
+    t1 = ((te4[s1 >> 24] & 0xFF000000) ^ (te4[(s2 >> 16) & 0xFF] & 0x00FF0000)
+          ^ (te4[(s3 >> 8) & 0xFF] & 0x0000FF00) ^ (te4[s0 & 0xFF] & 0x000000FF) ^ rk[41])
+    t2 = ((te4[s2 >> 24] & 0xFF000000) ^ (te4[(s3 >> 16) & 0xFF] & 0x00FF0000)
+          ^ (te4[(s0 >> 8) & 0xFF] & 0x0000FF00) ^ (te4[s1 & 0xFF] & 0x000000FF) ^ rk[42])
+    t3 = ((te4[s3 >> 24] & 0xFF000000) ^ (te4[(s0 >> 16) & 0xFF] & 0x00FF0000)
+          ^ (te4[(s1 >> 8) & 0xFF] & 0x0000FF00) ^ (te4[s2 & 0xFF] & 0x000000FF) ^ rk[43])
+    return t0, t1, t2, t3
+
+
+def encrypt_bytes(block: bytes, rk: List[int]) -> bytes:
+    """
+    Encrypt one 16-byte block (any bytes-like object) with expanded round key words.
+    """
+    assert len(block) == 16, 'Dimension of block is not 16'
+    return _BLOCK.pack(*encrypt_words(*_BLOCK.unpack(block), rk))
+
+
+def encrypt_block(block: List[int], rk: List[int]) -> List[int]:
+    """
+    Encrypt one 16-byte block (list of ints) with expanded round key words.
+    """
+    return list(encrypt_bytes(bytes(block), rk))